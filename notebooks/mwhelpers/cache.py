@@ -0,0 +1,65 @@
+# Copyright 2025 The MathWorks, Inc.
+## This module hosts helpers for the on-disk caches used by mwhelpers.
+
+# The cache folder can be overridden with the environment variable MWHELPERS_CACHE_DIR.
+# It defaults to a folder in the system temp directory, as $HOME is changed for each MATLAB user.
+
+
+def get_cache_folder(*subfolders):
+    """Get (and create) the cache folder, optionally joined with the given subfolders.
+
+    Returns:
+        str: Path to the cache folder.
+    """
+    import os
+    import tempfile
+
+    cache_root = os.environ.get("MWHELPERS_CACHE_DIR") or os.path.join(
+        tempfile.gettempdir(), "mwhelpers"
+    )
+    cache_folder = os.path.join(cache_root, *subfolders)
+    os.makedirs(cache_folder, exist_ok=True)
+    return cache_folder
+
+
+def get_cache_key(*parts):
+    """Returns a filesystem safe key derived from the given parts."""
+    import hashlib
+
+    return hashlib.sha1("\0".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def read_json(path):
+    """Read a JSON file, returns None if the file is missing or unreadable."""
+    import json
+
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json(path, data):
+    """Atomically write data as JSON to the given path.
+
+    The data is written to a temporary file in the same folder which is then renamed,
+    so concurrent readers never observe a partially written file.
+    """
+    import json
+    import os
+    import tempfile
+
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Failed to write cache file {path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+    return True
@@ -0,0 +1,167 @@
+# Copyright 2025 The MathWorks, Inc.
+## This module hosts functions related to the catalog of products available for a MATLAB release.
+
+# The catalog is built from the mpm input files published in the mathworks-ref-arch/matlab-dockerfile
+# repository, and is cached on disk per release.
+# - A cached catalog younger than max_age is used without any network access.
+# - An older catalog is revalidated with a conditional request (ETag / If-Modified-Since).
+# - If the network is unavailable, the stale catalog is used.
+# - A pre-seeded catalog folder (argument or MWHELPERS_CATALOG_DIR) is always preferred, which
+#   allows air-gapped clusters & tests to never touch the network.
+#   The folder contains mpm input files, either as <folder>/mpm_input_r2025a.txt or
+#   <folder>/R2025a/mpm_input_r2025a.txt
+
+MPM_INPUT_FILE_URL = "https://raw.githubusercontent.com/mathworks-ref-arch/matlab-dockerfile/refs/heads/main/mpm-input-files/{release}/mpm_input_{release_lc}.txt"
+
+# Revalidate cached catalogs once a day.
+DEFAULT_MAX_AGE = 24 * 60 * 60
+
+
+def get_product_catalog(
+    release, catalog_folder=None, max_age=DEFAULT_MAX_AGE, timeout=10
+):
+    """Get the products, support packages & optional features available for a MATLAB release.
+
+    Args:
+        release (str): The MATLAB release, Example: R2025a
+        catalog_folder (str): Pre-seeded folder of mpm input files. Defaults to MWHELPERS_CATALOG_DIR.
+        max_age (int): Seconds for which a cached catalog is used without revalidation.
+        timeout (int): Timeout in seconds for the request to fetch the mpm input file.
+
+    Returns:
+        dict: Lists of "products", "support_packages" & "optional_features".
+              Returns None if the catalog could neither be fetched nor found in the cache.
+    """
+    import os
+    import time
+
+    from . import cache
+
+    if not release:
+        return None
+
+    seeded_catalog = _read_seeded_catalog(
+        release, catalog_folder or os.environ.get("MWHELPERS_CATALOG_DIR")
+    )
+    if seeded_catalog is not None:
+        return seeded_catalog
+
+    cache_file = os.path.join(cache.get_cache_folder("catalog"), f"{release}.json")
+    cached_entry = cache.read_json(cache_file)
+    if cached_entry and time.time() - cached_entry.get("fetched_at", 0) < max_age:
+        return cached_entry["catalog"]
+
+    fetched_entry = _fetch_catalog(release, cached_entry, timeout)
+    if fetched_entry is None:
+        if cached_entry:
+            print(
+                f"Using cached catalog for {release}, as it could not be revalidated."
+            )
+            return cached_entry["catalog"]
+        return None
+
+    cache.write_json(cache_file, fetched_entry)
+    return fetched_entry["catalog"]
+
+
+def parse_mpm_input_file(file_content):
+    """Parse the content of an mpm input file.
+
+    Returns:
+        dict: Lists of "products", "support_packages" & "optional_features".
+    """
+    catalog = {
+        "products": [],
+        "support_packages": [],
+        "optional_features": [],
+    }
+
+    current_section = None
+
+    for line in file_content.splitlines():
+        line = line.strip()
+        if line == "## PRODUCTS":
+            current_section = "products"
+        elif line == "## SUPPORT PACKAGES":
+            current_section = "support_packages"
+        elif line == "## OPTIONAL FEATURES":
+            current_section = "optional_features"
+        elif line.startswith("#product.") and current_section:
+            catalog[current_section].append(
+                line.replace("#product.", "").replace("_", " ")
+            )
+
+    return catalog
+
+
+################################################
+## Helper Functions
+################################################
+
+
+def _get_mpm_input_file_name(release):
+    # Lowercased MATLAB Version
+    # Example: R2023a -> r2023a
+    release_lc = release[0].lower() + release[1:]
+    return f"mpm_input_{release_lc}.txt"
+
+
+def _read_seeded_catalog(release, catalog_folder):
+    """Returns the catalog from the pre-seeded catalog folder, or None if not available."""
+    import os
+
+    if not catalog_folder:
+        return None
+
+    file_name = _get_mpm_input_file_name(release)
+    for candidate in (
+        os.path.join(catalog_folder, file_name),
+        os.path.join(catalog_folder, release, file_name),
+    ):
+        try:
+            with open(candidate) as f:
+                return parse_mpm_input_file(f.read())
+        except OSError:
+            continue
+    return None
+
+
+def _fetch_catalog(release, cached_entry, timeout):
+    """Fetch the mpm input file, revalidating the cached entry if there is one."""
+    """Returns the new cache entry, or None if the request failed."""
+    import time
+
+    import requests
+
+    url = MPM_INPUT_FILE_URL.format(
+        release=release, release_lc=release[0].lower() + release[1:]
+    )
+
+    headers = {}
+    if cached_entry:
+        if cached_entry.get("etag"):
+            headers["If-None-Match"] = cached_entry["etag"]
+        if cached_entry.get("last_modified"):
+            headers["If-Modified-Since"] = cached_entry["last_modified"]
+
+    try:
+        response = requests.get(url, headers=headers, timeout=timeout)
+    except requests.exceptions.RequestException as e:
+        print(f"HTTP request failed: {e}")
+        return None
+
+    if response.status_code == 304 and cached_entry:
+        cached_entry["fetched_at"] = time.time()
+        return cached_entry
+
+    if response.status_code != 200:
+        print(f"Failed to fetch {url}, status code: {response.status_code}")
+        return None
+
+    return {
+        "release": release,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "fetched_at": time.time(),
+        "catalog": parse_mpm_input_file(response.text),
+    }
@@ -0,0 +1,309 @@
+# Copyright 2025 The MathWorks, Inc.
+## This module hosts functions related to the cgroup v2 resource limits of MATLAB sessions.
+
+# Each matlab-proxy server can be placed in its own cgroup, <base cgroup>/mwhelpers/session-<port>,
+# with limits on its CPU weight, memory & number of processes. matlab-proxy-app is moved into the
+# cgroup right after it is spawned, so that MATLAB & all other descendants inherit it.
+# The base cgroup is the cgroup of this process, read from /proc/self/cgroup, rather than the root
+# of the hierarchy: in a container, the root is not writable. cgroup v2 only delegates controllers
+# from cgroups without processes of their own. Moving the processes of the base cgroup, which
+# include the Spark driver & the other services of the node, into the leaf cgroup
+# <base cgroup>/mwhelpers-init is only done if MWHELPERS_CGROUP_MOVE_PROCESSES is set to 1.
+# Otherwise, sessions are started without limits.
+# The live usage counters of the cgroup are reported in the session listing.
+# When cgroup v2 is not mounted, or not writable (Example: in an unprivileged container),
+# sessions are started without limits, and the reason is returned to the caller.
+# Empty session cgroups, left by sessions which exited on their own, are removed on the next create.
+
+SESSIONS_CGROUP = "mwhelpers"
+LEAF_CGROUP = "mwhelpers-init"
+
+# Opt-in to move the processes of the base cgroup into LEAF_CGROUP.
+MOVE_PROCESSES_VARIABLE = "MWHELPERS_CGROUP_MOVE_PROCESSES"
+
+# Seconds during which an empty session cgroup is kept, as its session may still be launching.
+EMPTY_CGROUP_GRACE_PERIOD = 60
+
+# Limits which can be set, and the cgroup file each one is written to.
+_LIMIT_FILES = {
+    # Relative CPU share, 1-10000. The default weight of a cgroup is 100.
+    "cpu_weight": "cpu.weight",
+    # Maximum memory in MB, the processes of the session are OOM killed beyond it.
+    "memory_max_mb": "memory.max",
+    # Maximum number of processes & threads.
+    "pids_max": "pids.max",
+}
+
+
+def create_session_cgroup(port, resource_limits):
+    """Create the cgroup for the session on the port, and apply the resource limits.
+
+    Args:
+        port (int): Port of the matlab-proxy server.
+        resource_limits (dict): Any of "cpu_weight", "memory_max_mb" & "pids_max".
+
+    Returns:
+        str: Path to the cgroup, or None if cgroups are not available.
+        list: Why limits could not be applied, empty if all limits were applied.
+    """
+    import os
+
+    sessions_cgroup, error = _prepare_sessions_cgroup()
+    if sessions_cgroup is None:
+        return None, [error]
+    _remove_empty_session_cgroups(sessions_cgroup)
+
+    cgroup = os.path.join(sessions_cgroup, f"session-{port}")
+    try:
+        # Remove the cgroup of a previous session on the same port.
+        if os.path.isdir(cgroup):
+            os.rmdir(cgroup)
+        os.mkdir(cgroup)
+    except OSError as e:
+        return None, [f"Unable to create the cgroup of port {port}: {e}"]
+
+    errors = []
+    for limit, value in (resource_limits or {}).items():
+        if limit not in _LIMIT_FILES:
+            errors.append(f"Unknown resource limit: {limit}")
+            continue
+        if limit == "memory_max_mb":
+            value = int(value) * 1024 * 1024
+        try:
+            _write(os.path.join(cgroup, _LIMIT_FILES[limit]), str(value))
+        except OSError as e:
+            errors.append(f"Unable to set {limit} for port {port}: {e}")
+    return cgroup, errors
+
+
+def move_to_cgroup(cgroup, pid=0):
+    """Move the process into the cgroup, the calling process if pid is 0."""
+    import os
+
+    _write(os.path.join(cgroup, "cgroup.procs"), str(pid or os.getpid()))
+
+
+def get_session_usage(port):
+    """Get the live usage counters of the cgroup of the session on the port.
+
+    Returns:
+        dict: "memory_mb", "memory_peak_mb", "cpu_seconds", "pids" & the configured limits,
+              or None if the session has no cgroup.
+    """
+    import os
+
+    sessions_cgroup = _get_sessions_cgroup()
+    if sessions_cgroup is None:
+        return None
+    cgroup = os.path.join(sessions_cgroup, f"session-{port}")
+    if not os.path.isdir(cgroup):
+        return None
+
+    usage = {
+        "memory_mb": _read_int(cgroup, "memory.current", scale=1024 * 1024),
+        "memory_peak_mb": _read_int(cgroup, "memory.peak", scale=1024 * 1024),
+        "cpu_seconds": None,
+        "pids": _read_int(cgroup, "pids.current"),
+        "cpu_weight": _read_int(cgroup, "cpu.weight"),
+        "memory_max_mb": _read_int(cgroup, "memory.max", scale=1024 * 1024),
+        "pids_max": _read_int(cgroup, "pids.max"),
+    }
+    try:
+        with open(os.path.join(cgroup, "cpu.stat")) as f:
+            for line in f:
+                key, _, value = line.partition(" ")
+                if key == "usage_usec":
+                    usage["cpu_seconds"] = int(value) / 1e6
+                    break
+    except OSError:
+        pass
+    return usage
+
+
+def get_base_cgroup():
+    """Get the path to the cgroup of this process, under which the session cgroups are created.
+
+    Returns:
+        str: Path to the cgroup, or None if cgroup v2 is not mounted.
+    """
+    import os
+
+    mount = _find_cgroup2_mount()
+    if mount is None:
+        return None
+    mount_point, mount_root = mount
+
+    try:
+        with open("/proc/self/cgroup") as f:
+            # The cgroup v2 hierarchy is listed as "0::<path>".
+            paths = [line.rstrip("\n")[3:] for line in f if line.startswith("0::")]
+    except OSError:
+        return None
+    if not paths:
+        return None
+
+    relative_path = os.path.relpath(paths[0], mount_root)
+    if relative_path.startswith(".."):
+        # The cgroup of this process is outside of the mounted subtree.
+        return None
+    cgroup = os.path.normpath(os.path.join(mount_point, relative_path))
+    if os.path.basename(cgroup) == LEAF_CGROUP:
+        # This process was moved into the leaf by a previous create.
+        cgroup = os.path.dirname(cgroup)
+    return cgroup
+
+
+def remove_session_cgroup(port):
+    """Remove the cgroup of the session on the port, once all of its processes have exited."""
+    import os
+
+    sessions_cgroup = _get_sessions_cgroup()
+    if sessions_cgroup is None:
+        return
+    try:
+        os.rmdir(os.path.join(sessions_cgroup, f"session-{port}"))
+    except OSError:
+        pass
+
+
+################################################
+## Helper Functions
+################################################
+
+
+def _get_sessions_cgroup():
+    """Returns the path to the parent cgroup of all sessions, or None without cgroup v2."""
+    import os
+
+    base_cgroup = get_base_cgroup()
+    if base_cgroup is None:
+        return None
+    return os.path.join(base_cgroup, SESSIONS_CGROUP)
+
+
+def _prepare_sessions_cgroup():
+    """Create the parent cgroup of all sessions, and delegate the controllers to it."""
+    """Returns the path to the cgroup, or None & the reason why cgroups are not usable."""
+    import errno
+    import os
+
+    base_cgroup = get_base_cgroup()
+    if base_cgroup is None:
+        return None, "cgroup v2 is not available"
+
+    try:
+        with open(os.path.join(base_cgroup, "cgroup.controllers")) as f:
+            available_controllers = set(f.read().split())
+    except OSError as e:
+        return None, f"Unable to read the controllers of {base_cgroup}: {e}"
+    controllers = [
+        controller
+        for controller in ("cpu", "memory", "pids")
+        if controller in available_controllers
+    ]
+    if not controllers:
+        return None, f"No cpu, memory or pids controller is available in {base_cgroup}"
+
+    sessions_cgroup = os.path.join(base_cgroup, SESSIONS_CGROUP)
+    try:
+        try:
+            _enable_controllers(base_cgroup, controllers)
+        except OSError as e:
+            if e.errno != errno.EBUSY:
+                raise
+            # The base cgroup has processes of its own, which prevents delegating controllers.
+            if os.environ.get(MOVE_PROCESSES_VARIABLE) != "1":
+                return None, (
+                    f"cgroup controllers cannot be delegated below {base_cgroup}, which has "
+                    f"processes of its own. Set {MOVE_PROCESSES_VARIABLE}=1 to move them "
+                    f"into {LEAF_CGROUP}"
+                )
+            _move_processes_to_leaf(base_cgroup)
+            _enable_controllers(base_cgroup, controllers)
+        os.makedirs(sessions_cgroup, exist_ok=True)
+        _enable_controllers(sessions_cgroup, controllers)
+    except OSError as e:
+        return None, f"Unable to delegate cgroup controllers below {base_cgroup}: {e}"
+    return sessions_cgroup, None
+
+
+def _enable_controllers(cgroup, controllers):
+    """Enable the controllers in the children of the cgroup, unless they are already enabled."""
+    import os
+
+    subtree_control = os.path.join(cgroup, "cgroup.subtree_control")
+    with open(subtree_control) as f:
+        enabled_controllers = set(f.read().split())
+    missing_controllers = [c for c in controllers if c not in enabled_controllers]
+    if missing_controllers:
+        _write(subtree_control, " ".join(f"+{c}" for c in missing_controllers))
+
+
+def _move_processes_to_leaf(cgroup):
+    """Move the processes of the cgroup into its leaf cgroup, see LEAF_CGROUP."""
+    import os
+
+    leaf_cgroup = os.path.join(cgroup, LEAF_CGROUP)
+    os.makedirs(leaf_cgroup, exist_ok=True)
+    with open(os.path.join(cgroup, "cgroup.procs")) as f:
+        pids = f.read().split()
+    for pid in pids:
+        try:
+            move_to_cgroup(leaf_cgroup, pid=int(pid))
+        except ProcessLookupError:
+            # The process exited.
+            pass
+
+
+def _remove_empty_session_cgroups(sessions_cgroup):
+    """Remove the session cgroups without processes, past their grace period."""
+    import os
+    import time
+
+    deadline = time.time() - EMPTY_CGROUP_GRACE_PERIOD
+    try:
+        names = os.listdir(sessions_cgroup)
+    except OSError:
+        return
+    for name in names:
+        cgroup = os.path.join(sessions_cgroup, name)
+        try:
+            if name.startswith("session-") and os.stat(cgroup).st_mtime < deadline:
+                # Fails with EBUSY if the cgroup still has processes.
+                os.rmdir(cgroup)
+        except OSError:
+            pass
+
+
+def _find_cgroup2_mount():
+    """Returns the mount point of cgroup v2 & the root of the mounted subtree, or None."""
+    """Sample line of /proc/self/mountinfo: 36 25 0:30 / /sys/fs/cgroup rw,nosuid - cgroup2 cgroup2 rw"""
+    try:
+        with open("/proc/self/mountinfo") as f:
+            for line in f:
+                fields = line.split()
+                separator = fields.index("-")
+                if fields[separator + 1] == "cgroup2":
+                    return fields[4], fields[3]
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _write(path, value):
+    with open(path, "w") as f:
+        f.write(value)
+
+
+def _read_int(cgroup, file_name, scale=1):
+    """Read an integer from a cgroup file. Returns None if missing, or if the value is "max"."""
+    import os
+
+    try:
+        with open(os.path.join(cgroup, file_name)) as f:
+            value = f.read().strip()
+    except OSError:
+        return None
+    if not value.isdigit():
+        return None
+    return int(value) // scale
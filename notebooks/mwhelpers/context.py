@@ -0,0 +1,167 @@
+# Copyright 2025 The MathWorks, Inc.
+## This module hosts the cached Databricks context & cluster metadata.
+
+# The Databricks context is read from dbruntime once per kernel, and the metadata of the cluster
+# is fetched once per cluster with a single WorkspaceClient, which is reused for all REST calls.
+# Cached values are kept until the cluster ID changes. The cluster ID is checked against
+# DB_CLUSTER_ID, which is set by Databricks in the environment of the driver.
+
+# A fake context can be injected with set_context(), so that the APIs can be used without a
+# Databricks runtime. It can be any object with the attributes of the Databricks context, or
+# a dictionary in the shape returned by mwi_test.get_databricks_context(). The user & the name of
+# the cluster missing from the dictionary are those of mwi_test.
+
+import threading
+
+_lock = threading.RLock()
+_context = None
+_injected_context = None
+_client = None
+_client_key = None
+# cluster ID -> cluster metadata
+_cluster_info = {}
+
+
+def get_context(refresh=False):
+    """Get the Databricks context of this kernel, or the injected fake context.
+
+    Args:
+        refresh (bool): Read the context from dbruntime again.
+    """
+    import os
+
+    global _context
+
+    with _lock:
+        if _injected_context is not None:
+            return _injected_context
+        cluster_id = os.environ.get("DB_CLUSTER_ID")
+        if (
+            _context is None
+            or refresh
+            or (cluster_id and cluster_id != _context.clusterId)
+        ):
+            from dbruntime.databricks_repl_context import get_context as read_context
+
+            _context = read_context()
+        return _context
+
+
+def set_context(context, cluster_info=None):
+    """Inject a fake Databricks context, Example: for testing. Pass None to remove it.
+
+    Args:
+        context: An object with the attributes of the Databricks context, or a dictionary
+                 such as {"cluster_id": "1234", "notebook_id": "5678", "workspace_url": "https://..."}
+        cluster_info (dict): Metadata of the fake cluster, Example: {"cluster_name": "Test Cluster"}
+                             The cluster of mwi_test if None & the context is a dictionary.
+    """
+    from . import mwi_test
+
+    global _injected_context
+
+    if isinstance(context, dict) and cluster_info is None:
+        cluster_info = {"cluster_name": mwi_test.get_cluster_name()}
+
+    with _lock:
+        clear_cache()
+        _injected_context = (
+            _FakeContext(context) if isinstance(context, dict) else context
+        )
+        if context is not None and cluster_info is not None:
+            _cluster_info[_injected_context.clusterId] = dict(
+                {"cluster_id": _injected_context.clusterId}, **cluster_info
+            )
+
+
+def get_workspace_client(context=None):
+    """Get the WorkspaceClient of the workspace, which is created once and reused."""
+    from databricks.sdk import WorkspaceClient
+
+    global _client, _client_key
+
+    context = context or get_context()
+    client_key = (context.browserHostName, context.apiToken)
+    with _lock:
+        if _client is None or _client_key != client_key:
+            _client = WorkspaceClient(
+                host=context.browserHostName, token=context.apiToken
+            )
+            _client_key = client_key
+        return _client
+
+
+def get_cluster_info(refresh=False):
+    """Get the metadata of the cluster running this kernel, fetched once per cluster.
+
+    Returns:
+        dict: The "cluster_id", "cluster_name", "spark_version", "node_type_id" & "num_workers"
+              of the cluster. Only the "cluster_name" is available for job clusters.
+    """
+    context = get_context()
+    if context.isInJob:
+        return {"cluster_id": context.clusterId, "cluster_name": "Job Cluster"}
+
+    with _lock:
+        if refresh or context.clusterId not in _cluster_info:
+            cluster = get_workspace_client(context).clusters.get(context.clusterId)
+            _cluster_info[context.clusterId] = {
+                "cluster_id": context.clusterId,
+                "cluster_name": cluster.cluster_name,
+                "spark_version": cluster.spark_version,
+                "node_type_id": cluster.node_type_id,
+                "num_workers": cluster.num_workers,
+            }
+        return _cluster_info[context.clusterId]
+
+
+def clear_cache():
+    """Forget the cached context, client & cluster metadata."""
+    global _context, _client, _client_key
+
+    with _lock:
+        _context = None
+        _client = None
+        _client_key = None
+        _cluster_info.clear()
+
+
+################################################
+## Helper Functions
+################################################
+
+
+class _FakeContext:
+    """Attribute access to a fake context given as a dictionary, with snake_case keys mapped to
+    the camelCase attributes of the Databricks context."""
+
+    _ALIASES = {"workspace_url": "browserHostName"}
+    _DEFAULTS = {
+        "isInJob": False,
+        "user": None,
+        "apiToken": None,
+        "browserHostName": None,
+        "workspaceId": None,
+        "clusterId": None,
+        "notebookId": None,
+    }
+
+    def __init__(self, context):
+        from urllib.parse import urlsplit
+
+        from . import mwi_test
+
+        attributes = dict(self._DEFAULTS, user=mwi_test.get_user_name())
+        for key, value in context.items():
+            key = self._ALIASES.get(key, key)
+            name, *rest = key.split("_")
+            attributes[name + "".join(part.title() for part in rest)] = value
+        if attributes["browserHostName"] and "//" in attributes["browserHostName"]:
+            # The browser host name does not include the scheme.
+            attributes["browserHostName"] = urlsplit(
+                attributes["browserHostName"]
+            ).hostname
+        self.__dict__.update(attributes)
+
+    def __repr__(self):
+        return f"_FakeContext({self.__dict__!r})"
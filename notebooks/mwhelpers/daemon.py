@@ -0,0 +1,500 @@
+# Copyright 2025 The MathWorks, Inc.
+## This module hosts the optional node daemon, which supervises the MATLAB sessions of this node.
+
+# Without the daemon, each API call from the notebook kernel rebuilds its state from scratch, and
+# the matlab-proxy servers are children of a kernel which can restart at any time.
+# The daemon is a long-lived process, started with start_daemon() or `python -m mwhelpers.daemon`,
+# which owns the matlab-proxy processes & keeps the session registry, the installed products
+# & the other caches warm. It serves the APIs over a Unix socket, which only root can connect to.
+# When the daemon is running, the session APIs in mwi are thin clients: a call is a single round
+# trip on a persistent connection. The daemon runs in its own session, so that it and the MATLAB
+# sessions it started survive kernel restarts.
+
+# The daemon can also listen on a TCP address, so that it acts as the node agent of this node for
+# the placement of sessions from the driver, see placement.py. Calls over TCP must carry the shared
+# token in MWHELPERS_AGENT_TOKEN, since they are not protected by the permissions of the socket.
+# On the driver, the daemon also hosts the tunnels to the sessions on the workers.
+
+# Protocol: one JSON object per line.
+#   Request:  {"method": "list_sessions", "params": {"username": "jane"}, "token": "<over TCP>"}
+#   Response: {"result": ..., "output": "<printed by the call>"} or {"error": "...", "output": "..."}
+
+import threading
+
+# Seconds to wait for a started daemon to accept connections.
+DEFAULT_START_TIMEOUT = 10
+
+# Seconds between two sweeps of exited matlab-proxy servers.
+CHILD_REAP_INTERVAL = 5
+
+# Seconds to wait for the answer to a call, unless a longer timeout is given for the call.
+DEFAULT_CALL_TIMEOUT = 30
+
+# True in the daemon process, where the APIs in mwi run locally instead of calling the daemon.
+serving = False
+
+_client = None
+_client_lock = threading.Lock()
+
+# matlab-proxy servers launched by the daemon, which are reaped once they exit
+_launched_processes = []
+_launched_processes_lock = threading.Lock()
+
+
+def get_socket_path():
+    """Returns the path of the Unix socket, from MWHELPERS_DAEMON_SOCKET or in the cache folder."""
+    import os
+
+    from . import cache
+
+    return os.environ.get("MWHELPERS_DAEMON_SOCKET") or os.path.join(
+        cache.get_cache_folder(), "daemon.sock"
+    )
+
+
+class DaemonError(Exception):
+    """Raised by DaemonClient.call() when the daemon reports an error."""
+
+
+class DaemonClient:
+    """Client of the node daemon, which keeps its connection open between calls."""
+
+    def __init__(self, address=None, timeout=DEFAULT_CALL_TIMEOUT, token=None):
+        """Args:
+            address (str): Path of the Unix socket, or "tcp://host:port" of a node agent.
+            timeout (float): Seconds to wait for the answer to a call, forever if None.
+        token (str): Shared token of the node agents, MWHELPERS_AGENT_TOKEN if None.
+        """
+        import os
+
+        self.address = address or get_socket_path()
+        self.timeout = timeout
+        self.token = token or os.environ.get("MWHELPERS_AGENT_TOKEN")
+        self._lock = threading.Lock()
+        self._socket = None
+        self._reader = None
+
+    def call(self, method, timeout=None, **params):
+        """Call a method of the daemon, and print what the call printed in the daemon.
+
+        Args:
+            method (str): Name of the method.
+            timeout (float): Seconds to wait for the answer, the timeout of the client if None.
+            params: Keyword arguments of the method.
+
+        Raises:
+            TimeoutError: If the daemon did not answer in time. The call is not retried, as it
+                          may still be running in the daemon.
+            OSError: If the daemon is not reachable.
+            DaemonError: If the call failed in the daemon.
+        """
+        import json
+
+        request = {"method": method, "params": params}
+        if self.token and self.address.startswith("tcp://"):
+            request["token"] = self.token
+        request = json.dumps(request) + "\n"
+        with self._lock:
+            # A connection closed by the daemon is detected on write or read, and opened again once.
+            for attempt in range(2):
+                try:
+                    if self._socket is None:
+                        self._connect()
+                    self._socket.settimeout(timeout or self.timeout)
+                    self._socket.sendall(request.encode())
+                    line = self._reader.readline()
+                    if not line:
+                        raise ConnectionResetError("The daemon closed the connection")
+                    break
+                except TimeoutError:
+                    # The answer of the call would be read by the next call on this connection.
+                    self.close()
+                    raise
+                except OSError:
+                    self.close()
+                    if attempt:
+                        raise
+
+        response = json.loads(line)
+        if response.get("output"):
+            print(response["output"], end="")
+        if "error" in response:
+            raise DaemonError(response["error"])
+        return response.get("result")
+
+    def close(self):
+        if self._socket is not None:
+            try:
+                self._reader.close()
+                self._socket.close()
+            except OSError:
+                pass
+        self._socket = None
+        self._reader = None
+
+    def _connect(self):
+        import socket
+
+        if self.address.startswith("tcp://"):
+            host, port = _parse_tcp_address(self.address)
+            self._socket = socket.create_connection((host, port), timeout=self.timeout)
+        else:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(self.timeout)
+            try:
+                self._socket.connect(self.address)
+            except OSError:
+                self._socket.close()
+                self._socket = None
+                raise
+        self._reader = self._socket.makefile("r", encoding="utf-8")
+
+
+def get_client():
+    """Get the shared client of the daemon, or None if the daemon is not running."""
+    """Returns None in the daemon itself."""
+    import os
+
+    global _client
+
+    if serving:
+        return None
+    socket_path = get_socket_path()
+    if not os.path.exists(socket_path):
+        return None
+    with _client_lock:
+        if _client is None or _client.address != socket_path:
+            _client = DaemonClient(socket_path)
+        return _client
+
+
+def track_process(process):
+    """Reap the matlab-proxy server once it exits, if it was launched by the daemon."""
+    if serving:
+        with _launched_processes_lock:
+            _launched_processes.append(process)
+
+
+def is_daemon_running():
+    """Returns True if the daemon accepts calls."""
+    client = get_client()
+    if client is None:
+        return False
+    try:
+        return client.call("ping") == "pong"
+    except (OSError, DaemonError):
+        return False
+
+
+def start_daemon(timeout=DEFAULT_START_TIMEOUT, log_file=None, listen=None):
+    """Start the daemon in its own session, unless it is already running.
+
+    Args:
+        listen (str): "host:port" on which the daemon also serves as the node agent, see serve().
+
+    Returns:
+        bool: True if the daemon is running.
+    """
+    import os
+    import subprocess
+    import sys
+    import time
+
+    from . import cache
+
+    if is_daemon_running():
+        return True
+
+    package_parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        path for path in (package_parent, env.get("PYTHONPATH")) if path
+    )
+    log_file = log_file or os.path.join(cache.get_cache_folder(), "daemon.log")
+    with open(log_file, "a") as log:
+        subprocess.Popen(
+            [sys.executable, "-m", f"{__package__}.daemon"]
+            + (["--listen", listen] if listen else []),
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if is_daemon_running():
+            return True
+        time.sleep(0.1)
+    print(f"The daemon did not start, see {log_file}")
+    return False
+
+
+def stop_daemon():
+    """Stop the daemon. The MATLAB sessions it started keep running."""
+    client = get_client()
+    if client is None:
+        return
+    try:
+        client.call("shutdown")
+    except (OSError, DaemonError):
+        pass
+    client.close()
+
+
+def serve(socket_path=None, listen=None):
+    """Serve the APIs over the Unix socket until the shutdown method is called.
+
+    Args:
+        socket_path (str): Path of the Unix socket, see get_socket_path().
+        listen (str): "host:port" on which the APIs are also served to the driver, as the node
+                      agent of this node, on the given private interface, never on all
+                      interfaces. Requires MWHELPERS_AGENT_TOKEN.
+    """
+    import os
+    import socketserver
+    import sys
+
+    from . import mwi, registry
+
+    global serving
+    serving = True
+
+    socket_path = socket_path or get_socket_path()
+    token = os.environ.get("MWHELPERS_AGENT_TOKEN")
+    if listen and not token:
+        print("Set MWHELPERS_AGENT_TOKEN to serve as the node agent, aborting...")
+        return
+    if listen:
+        try:
+            _parse_tcp_address(listen)
+        except ValueError as e:
+            print(f"{e}, aborting...")
+            return
+    if os.path.exists(socket_path):
+        try:
+            if DaemonClient(socket_path, timeout=2).call("ping") == "pong":
+                print(f"A daemon is already serving {socket_path}")
+                return
+        except (OSError, DaemonError):
+            # A stale socket, left behind by a daemon which did not exit cleanly.
+            pass
+    _remove_socket(socket_path)
+
+    # Output printed by a call is returned to the client, instead of being written to the log.
+    sys.stdout = _ThreadLocalOutput(sys.stdout)
+
+    class Handler(socketserver.StreamRequestHandler):
+        # Calls over TCP are authenticated with the token.
+        required_token = None
+
+        def handle(self):
+            for line in self.rfile:
+                response = _handle_request(line, server, self.required_token)
+                self.wfile.write(response.encode() + b"\n")
+                self.wfile.flush()
+
+    class TCPHandler(Handler):
+        required_token = token
+
+    server = socketserver.ThreadingUnixStreamServer(socket_path, Handler)
+    server.daemon_threads = True
+    os.chmod(socket_path, 0o600)
+
+    tcp_server = None
+    if listen:
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        tcp_server = socketserver.ThreadingTCPServer(
+            _parse_tcp_address(listen), TCPHandler
+        )
+        tcp_server.daemon_threads = True
+        threading.Thread(
+            target=tcp_server.serve_forever, name="mwi-daemon-agent", daemon=True
+        ).start()
+        print(f"Serving as the node agent on {listen}")
+
+    # Keep the caches warm.
+    registry.get_registry().start_watching()
+    mwi.get_matlab_installation()
+    threading.Thread(
+        target=_reap_children, name="mwi-daemon-reaper", daemon=True
+    ).start()
+
+    print(f"Serving on {socket_path}, pid: {os.getpid()}")
+    try:
+        server.serve_forever()
+    finally:
+        if tcp_server is not None:
+            tcp_server.shutdown()
+            tcp_server.server_close()
+        server.server_close()
+        _remove_socket(socket_path)
+        registry.get_registry().stop_watching()
+
+
+################################################
+## Helper Functions
+################################################
+
+
+def _get_methods():
+    """Returns the methods served by the daemon: name -> function."""
+    import os
+    import time
+
+    from . import installs, metrics, mwi, placement, pool
+
+    start_time = time.time()
+
+    def status():
+        return {
+            "pid": os.getpid(),
+            "start_time": start_time,
+            "uptime_seconds": time.time() - start_time,
+            "pool": pool.get_pool().get_stats(),
+        }
+
+    return {
+        "ping": lambda: "pong",
+        "status": status,
+        "list_sessions": mwi.get_running_matlab_proxy_servers,
+        "get_sessions": mwi.get_matlab_sessions,
+        "start_session": mwi.start_matlab_session,
+        "stop_sessions": mwi.stop_matlab_sessions,
+        "start_sessions": mwi.start_matlab_sessions,
+        "configure_pool": mwi.configure_matlab_pool,
+        "get_pool_stats": mwi.get_matlab_pool_stats,
+        "get_metrics": metrics.collect_session_metrics,
+        "get_load": placement.get_node_load,
+        "get_install_jobs": lambda active_only=False: [
+            job.to_dict() for job in installs.get_install_jobs(active_only=active_only)
+        ],
+        "open_tunnel": placement.open_tunnel,
+        "close_tunnel": placement.close_tunnel,
+        "get_tunnels": placement.get_tunnels,
+    }
+
+
+_methods = None
+
+
+def _handle_request(line, server, required_token=None):
+    import hmac
+    import json
+
+    global _methods
+
+    if _methods is None:
+        _methods = _get_methods()
+
+    response = {}
+    _ThreadLocalOutput.start_capture()
+    try:
+        request = json.loads(line)
+        method = request.get("method")
+        if required_token and not hmac.compare_digest(
+            str(request.get("token", "")), required_token
+        ):
+            response["error"] = "Invalid token"
+        elif method == "shutdown":
+            # shutdown() waits for serve_forever() to return, so it is called from another thread.
+            threading.Thread(target=server.shutdown, daemon=True).start()
+            response["result"] = True
+        elif method in _methods:
+            response["result"] = _methods[method](**request.get("params", {}))
+        else:
+            response["error"] = f"Unknown method: {method}"
+    except Exception as e:
+        response["error"] = f"{type(e).__name__}: {e}"
+    response["output"] = _ThreadLocalOutput.stop_capture()
+
+    try:
+        return json.dumps(response, default=str)
+    except (TypeError, ValueError) as e:
+        return json.dumps({"error": f"Unable to encode the result: {e}"})
+
+
+def _reap_children():
+    """Reap the matlab-proxy servers launched by the daemon, once they exit."""
+    """Other children, Example: mpm, are waited for by the code which started them. Reaping them
+    here would take their exit status from Popen.wait()."""
+    import time
+
+    while True:
+        time.sleep(CHILD_REAP_INTERVAL)
+        with _launched_processes_lock:
+            _launched_processes[:] = [
+                process for process in _launched_processes if process.poll() is None
+            ]
+
+
+def _parse_tcp_address(address):
+    """Returns (host, port) of "tcp://host:port" or "host:port"."""
+    """The host is required, so that the node agent is only served on the private interface
+    it is given, Example: the address of the node in the network of the cluster."""
+    host, _, port = address.replace("tcp://", "", 1).rpartition(":")
+    if not host or host in ("0.0.0.0", "::", "[::]"):
+        raise ValueError(
+            f"Give the address of a private interface in {address}, instead of all interfaces"
+        )
+    return host, int(port)
+
+
+def _remove_socket(socket_path):
+    import os
+
+    try:
+        os.remove(socket_path)
+    except FileNotFoundError:
+        pass
+
+
+class _ThreadLocalOutput:
+    """Replacement of sys.stdout, which captures the output of the threads serving calls."""
+
+    _local = threading.local()
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    @classmethod
+    def start_capture(cls):
+        import io
+
+        cls._local.buffer = io.StringIO()
+
+    @classmethod
+    def stop_capture(cls):
+        buffer = getattr(cls._local, "buffer", None)
+        cls._local.buffer = None
+        return buffer.getvalue() if buffer is not None else ""
+
+    def write(self, text):
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is not None:
+            return buffer.write(text)
+        return self._stream.write(text)
+
+    def flush(self):
+        self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+if __name__ == "__main__":
+    import argparse
+    import importlib
+
+    parser = argparse.ArgumentParser(description="Node daemon of the MATLAB sessions.")
+    parser.add_argument("--socket", help="Path of the Unix socket.")
+    parser.add_argument(
+        "--listen", help="host:port on which to also serve as the node agent."
+    )
+    args = parser.parse_args()
+
+    # Serve from the module imported by mwi, rather than from __main__, so that they share "serving".
+    importlib.import_module(f"{__package__}.daemon").serve(
+        socket_path=args.socket, listen=args.listen
+    )
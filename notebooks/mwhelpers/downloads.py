@@ -0,0 +1,423 @@
+# Copyright 2025 The MathWorks, Inc.
+## This module hosts the download cache of MATLAB Package Manager (mpm) and product archives.
+
+# Downloads are cached at two levels:
+# - A local cache on each node, in the cache folder, see cache.py
+# - An optional shared cache, on a path visible to all nodes of the cluster, Example: a DBFS
+#   or Unity Catalog volume mount. It is configured with MWHELPERS_DOWNLOAD_CACHE_DIR.
+# A download is looked up in the local cache, then in the shared cache, from which it is copied,
+# and is only fetched from the network when neither has it. Fetched files are published to the
+# shared cache, so that the other nodes installing the same product copy it instead.
+
+# The cache is content-addressed:
+# - mpm is stored as mpm/<sha256>/mpm, and mpm/current.json points to the latest version.
+#   The latest version is revalidated with a conditional request every MPM_MAX_AGE seconds.
+# - Product archives downloaded by `mpm download` are stored in products/<release>/<key>/,
+#   where the key is derived from the release & the product. A folder is only used once it
+#   contains the COMPLETE_FILE, which is written after the download succeeded.
+# Entries are written to a temporary name and renamed into place, so that nodes filling the
+# cache at the same moment never see partial downloads.
+
+import threading
+
+MPM_URL = "https://www.mathworks.com/mpm/glnxa64/mpm"
+
+# Seconds after which the latest mpm is revalidated, to pick up updates.
+MPM_MAX_AGE = 7 * 24 * 60 * 60
+
+COMPLETE_FILE = ".complete.json"
+
+_mpm_lock = threading.Lock()
+# (release, product) -> lock held while the product is fetched by this process
+_product_locks = {}
+_product_locks_lock = threading.Lock()
+
+
+def get_shared_cache_folder():
+    """Returns the shared download cache from MWHELPERS_DOWNLOAD_CACHE_DIR, or None if not configured."""
+    import os
+
+    shared_folder = os.environ.get("MWHELPERS_DOWNLOAD_CACHE_DIR")
+    if not shared_folder:
+        return None
+    try:
+        os.makedirs(shared_folder, exist_ok=True)
+    except OSError as e:
+        print(f"Shared download cache {shared_folder} is not usable: {e}")
+        return None
+    return shared_folder
+
+
+def get_mpm(refresh=False, log=print):
+    """Get the path to the latest MATLAB Package Manager, from the download cache.
+
+    Args:
+        refresh (bool): Revalidate mpm now, instead of every MPM_MAX_AGE seconds.
+        log (function): Called with progress messages.
+
+    Returns:
+        str: Path to mpm.
+
+    Raises:
+        requests.exceptions.RequestException: If mpm is not cached and could not be downloaded.
+    """
+    import os
+    import time
+
+    import requests
+
+    from . import cache
+
+    local_folder = cache.get_cache_folder("downloads", "mpm")
+    shared_root = get_shared_cache_folder()
+    shared_folder = os.path.join(shared_root, "mpm") if shared_root else None
+
+    with _mpm_lock:
+        local_manifest = _read_mpm_manifest(local_folder)
+        if (
+            local_manifest
+            and not refresh
+            and time.time() - local_manifest["checked_at"] < MPM_MAX_AGE
+        ):
+            return _get_mpm_path(local_folder, local_manifest["sha256"])
+
+        # Another node may have revalidated mpm recently.
+        shared_manifest = _read_mpm_manifest(shared_folder) if shared_folder else None
+        if (
+            shared_manifest
+            and not refresh
+            and time.time() - shared_manifest["checked_at"] < MPM_MAX_AGE
+        ):
+            log("Copying mpm from the shared download cache...")
+            _copy_mpm(shared_folder, local_folder, shared_manifest)
+            return _get_mpm_path(local_folder, shared_manifest["sha256"])
+
+        known_manifest = max(
+            (m for m in (local_manifest, shared_manifest) if m),
+            key=lambda m: m["checked_at"],
+            default=None,
+        )
+        try:
+            manifest = _fetch_mpm(local_folder, known_manifest, log)
+        except requests.exceptions.RequestException as e:
+            if known_manifest is None:
+                raise
+            log(f"Using cached mpm, as it could not be revalidated: {e}")
+            manifest = known_manifest
+
+        if manifest is not local_manifest:
+            if not os.path.exists(_get_mpm_path(local_folder, manifest["sha256"])):
+                _copy_mpm(shared_folder, local_folder, manifest)
+            _write_mpm_manifest(local_folder, manifest)
+        if shared_folder:
+            try:
+                if not os.path.exists(_get_mpm_path(shared_folder, manifest["sha256"])):
+                    _copy_mpm(local_folder, shared_folder, manifest)
+                _write_mpm_manifest(shared_folder, manifest)
+            except OSError as e:
+                log(f"Unable to publish mpm to the shared download cache: {e}")
+        return _get_mpm_path(local_folder, manifest["sha256"])
+
+
+def get_product_source(mpm, release, product, log=print):
+    """Get a local folder containing the archives of the product, to install it with `mpm install --source`.
+
+    The archives are copied from the shared download cache, or downloaded with `mpm download`.
+
+    Args:
+        mpm (str): Path to mpm.
+        release (str): The MATLAB release, Example: R2025a
+        product (str): Name of the product, Example: "Signal Processing Toolbox"
+        log (function): Called with each line of progress.
+
+    Returns:
+        str: The folder, or None if the product could not be downloaded.
+    """
+    import os
+    import time
+
+    from . import cache
+
+    key = cache.get_cache_key(release, product)
+    local_folder = os.path.join(
+        cache.get_cache_folder("downloads", "products", release), key
+    )
+    shared_root = get_shared_cache_folder()
+    shared_folder = (
+        os.path.join(shared_root, "products", release, key) if shared_root else None
+    )
+
+    with _get_product_lock(release, product):
+        if _is_complete(local_folder):
+            log(f"Using {product} from the local download cache.")
+            return local_folder
+
+        if shared_folder and _is_complete(shared_folder):
+            log(f"Copying {product} from the shared download cache...")
+            try:
+                _publish_folder(shared_folder, local_folder)
+                return local_folder
+            except OSError as e:
+                log(f"Unable to copy {product} from the shared download cache: {e}")
+
+        log(f"Downloading {product}...")
+        staging_folder = _get_staging_path(local_folder)
+        start_time = time.monotonic()
+        returncode = run_mpm(
+            [
+                mpm,
+                "download",
+                "--release",
+                release,
+                "--destination",
+                staging_folder,
+                "--products",
+                # mpm expects spaces in product names to be replaced with underscores.
+                product.replace(" ", "_"),
+            ],
+            log,
+        )
+        if returncode != 0:
+            _remove_folder(staging_folder)
+            log(f"Failed to download {product}, mpm exited with {returncode}")
+            return None
+
+        _write_complete_file(
+            staging_folder, release, product, time.monotonic() - start_time
+        )
+        _rename_folder(staging_folder, local_folder)
+
+        if shared_folder:
+            try:
+                _publish_folder(local_folder, shared_folder)
+            except OSError as e:
+                log(f"Unable to publish {product} to the shared download cache: {e}")
+        return local_folder
+
+
+def run_mpm(command, log):
+    """Run an mpm command, and call log with each line of its output."""
+    """Returns the exit code of mpm."""
+    import subprocess
+
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+    )
+    for line in process.stdout:
+        log(line.rstrip("\n"))
+    return process.wait()
+
+
+def clear_download_cache(shared=False):
+    """Remove the local download cache, and the shared download cache if shared is True."""
+    import os
+    import shutil
+
+    from . import cache
+
+    shutil.rmtree(cache.get_cache_folder("downloads"), ignore_errors=True)
+    shared_root = get_shared_cache_folder() if shared else None
+    if shared_root:
+        for subfolder in ("mpm", "products"):
+            shutil.rmtree(os.path.join(shared_root, subfolder), ignore_errors=True)
+
+
+################################################
+## Helper Functions
+################################################
+
+
+def _get_product_lock(release, product):
+    with _product_locks_lock:
+        return _product_locks.setdefault((release, product), threading.Lock())
+
+
+def _get_mpm_path(folder, sha256):
+    import os
+
+    return os.path.join(folder, sha256, "mpm")
+
+
+def _read_mpm_manifest(folder):
+    """Returns the manifest of the latest mpm in the folder, if that mpm exists."""
+    import os
+
+    from . import cache
+
+    manifest = cache.read_json(os.path.join(folder, "current.json"))
+    if not manifest or not os.path.exists(_get_mpm_path(folder, manifest["sha256"])):
+        return None
+    return manifest
+
+
+def _write_mpm_manifest(folder, manifest):
+    import os
+
+    from . import cache
+
+    cache.write_json(os.path.join(folder, "current.json"), manifest)
+
+
+def _fetch_mpm(local_folder, known_manifest, log):
+    """Download mpm into the local folder, unless it has not changed since the known manifest."""
+    """Returns the manifest of the latest mpm."""
+    import hashlib
+    import os
+    import time
+
+    from . import http_client
+
+    headers = {}
+    if known_manifest:
+        if known_manifest.get("etag"):
+            headers["If-None-Match"] = known_manifest["etag"]
+        if known_manifest.get("last_modified"):
+            headers["If-Modified-Since"] = known_manifest["last_modified"]
+
+    response = http_client.request(
+        "GET", MPM_URL, headers=headers, stream=True, timeout=(10, 60)
+    )
+    try:
+        if response.status_code == 304 and known_manifest:
+            return dict(known_manifest, checked_at=time.time())
+        response.raise_for_status()
+
+        log("Downloading mpm...")
+        digest = hashlib.sha256()
+        tmp_path = _get_staging_path(os.path.join(local_folder, "mpm"))
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    digest.update(chunk)
+                    f.write(chunk)
+            os.chmod(tmp_path, 0o755)
+            sha256 = digest.hexdigest()
+            mpm_path = _get_mpm_path(local_folder, sha256)
+            os.makedirs(os.path.dirname(mpm_path), exist_ok=True)
+            os.replace(tmp_path, mpm_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    finally:
+        response.close()
+
+    if known_manifest and known_manifest["sha256"] != sha256:
+        log(f"mpm has been updated, sha256: {sha256}")
+    return {
+        "sha256": sha256,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "checked_at": time.time(),
+    }
+
+
+def _copy_mpm(source_folder, destination_folder, manifest):
+    """Copy the mpm of the manifest between caches, verifying its sha256."""
+    import hashlib
+    import os
+    import shutil
+
+    source_path = _get_mpm_path(source_folder, manifest["sha256"])
+    destination_path = _get_mpm_path(destination_folder, manifest["sha256"])
+    os.makedirs(os.path.dirname(destination_path), exist_ok=True)
+    tmp_path = _get_staging_path(destination_path)
+    try:
+        shutil.copyfile(source_path, tmp_path)
+        digest = hashlib.sha256()
+        with open(tmp_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        if digest.hexdigest() != manifest["sha256"]:
+            raise OSError(f"Checksum mismatch for {source_path}")
+        os.chmod(tmp_path, 0o755)
+        os.replace(tmp_path, destination_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _is_complete(folder):
+    import os
+
+    return os.path.isfile(os.path.join(folder, COMPLETE_FILE))
+
+
+def _write_complete_file(folder, release, product, download_seconds):
+    import os
+    import time
+
+    from . import cache
+
+    size = 0
+    for root, _, files in os.walk(folder):
+        size += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    cache.write_json(
+        os.path.join(folder, COMPLETE_FILE),
+        {
+            "release": release,
+            "product": product,
+            "size_bytes": size,
+            "download_seconds": download_seconds,
+            "created_at": time.time(),
+        },
+    )
+
+
+def _publish_folder(source_folder, destination_folder):
+    """Copy a complete folder between caches, through a staging folder renamed into place."""
+    import os
+    import shutil
+
+    staging_folder = _get_staging_path(destination_folder)
+    try:
+        # The complete file is copied last, so that an interrupted copy is never used.
+        shutil.copytree(
+            source_folder,
+            staging_folder,
+            ignore=shutil.ignore_patterns(COMPLETE_FILE),
+        )
+        shutil.copy2(
+            os.path.join(source_folder, COMPLETE_FILE),
+            os.path.join(staging_folder, COMPLETE_FILE),
+        )
+    except BaseException:
+        _remove_folder(staging_folder)
+        raise
+    _rename_folder(staging_folder, destination_folder)
+
+
+def _rename_folder(staging_folder, folder):
+    """Rename the staging folder into place. If another node got there first, its folder is kept."""
+    import os
+
+    os.makedirs(os.path.dirname(folder), exist_ok=True)
+    if _is_complete(folder):
+        _remove_folder(staging_folder)
+        return
+    # An incomplete folder is left behind by an interrupted download.
+    _remove_folder(folder)
+    try:
+        os.rename(staging_folder, folder)
+    except OSError:
+        if not _is_complete(folder):
+            raise
+        _remove_folder(staging_folder)
+
+
+def _get_staging_path(path):
+    import os
+    import socket
+
+    return f"{path}.tmp-{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+
+
+def _remove_folder(folder):
+    import shutil
+
+    shutil.rmtree(folder, ignore_errors=True)
@@ -0,0 +1,381 @@
+# Copyright 2025 The MathWorks, Inc.
+## This module hosts the pool of MATLAB Engines, which are reused by the notebook cells of the driver.
+
+# Starting a MATLAB Engine takes as long as starting MATLAB. The pool keeps started engines idle,
+# and hands them out with the borrow() context manager:
+#   with get_engine_pool().borrow() as engine:
+#       engine.sqrt(4.0)
+# A returned engine is reset, see engines.py, so that no borrower sees the workspace of another.
+# Engines which fail the health check, or stay idle longer than idle_timeout, are stopped by a
+# background thread. The pool refills up to the number of engines in demand: engines evicted for
+# being idle are only started again once a borrower misses the pool.
+# The pool can also attach to the engines shared by running MATLAB sessions. They are the live
+# sessions of users, so they are never reset, and are disconnected rather than stopped.
+# Hits, misses & startup times are recorded, see get_stats().
+
+import threading
+
+# Maximum number of engines started in parallel, as MATLAB startup is CPU intensive.
+MAX_PARALLEL_STARTS = 2
+
+# Seconds after which an idle engine is stopped.
+DEFAULT_IDLE_TIMEOUT = 1800
+
+# Maximum seconds between two sweeps of the idle engines.
+MAX_EVICTION_INTERVAL = 60
+
+
+class EnginePool:
+    """Idle MATLAB Engines of this process, started by an engine backend."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.size = 0
+        self.idle_timeout = DEFAULT_IDLE_TIMEOUT
+        self.backend = None
+        # Engines kept by the pool, idle or borrowed, at most size, lowered by idle evictions
+        self._target = 0
+        # Idle engines, least recently returned first
+        self._idle = []
+        self._num_borrowed = 0
+        self._num_starting = 0
+        self._executor = None
+        self._evictor = None
+        self._stop_evicting = threading.Event()
+        self._stats = self._new_stats()
+
+    def configure(self, size, backend=None, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        """Set the number of idle engines kept by the pool, and start filling it.
+
+        Idle engines beyond the new size, or started by another backend, are stopped.
+
+        Args:
+            size (int): Number of idle engines, 0 disables the pool.
+            backend: Backend starting the engines, or its name. See engines.get_backend()
+            idle_timeout (int): Seconds after which an idle engine is stopped.
+        """
+        from . import engines
+
+        backend = engines.get_backend(backend)
+        if backend is None:
+            return
+        with self._lock:
+            self.size = max(0, int(size))
+            self._target = self.size
+            self.idle_timeout = idle_timeout
+            if self.backend is not None and self.backend.get_key() != backend.get_key():
+                surplus_engines, self._idle = self._idle, []
+            else:
+                surplus_engines = self._idle[self.size :]
+                self._idle = self._idle[: self.size]
+            self.backend = backend
+            if self.size and self._evictor is None:
+                self._stop_evicting.clear()
+                self._evictor = threading.Thread(
+                    target=self._evict_periodically,
+                    name="mwi-engines-evictor",
+                    daemon=True,
+                )
+                self._evictor.start()
+
+        for pooled in surplus_engines:
+            self._stop(pooled)
+        self.refill()
+
+    def borrow(self):
+        """Borrow an engine, which is returned to the pool at the end of the with statement.
+
+        An idle engine is handed out if there is one, otherwise an engine is started.
+        Example: `with pool.borrow() as engine: engine.sqrt(4.0)`
+        """
+        import contextlib
+
+        @contextlib.contextmanager
+        def borrowed():
+            pooled = self._take()
+            try:
+                yield pooled["engine"]
+            finally:
+                self._return(pooled)
+
+        return borrowed()
+
+    def attach_shared_engines(self):
+        """Add the engines shared by running MATLAB sessions to the idle engines.
+
+        The pool does not reset the workspace of a shared engine, which is the live session of
+        a user, and disconnects from it instead of stopping it.
+
+        Returns:
+            list: Names of the attached engines.
+        """
+        import time
+
+        with self._lock:
+            backend = self.backend
+            attached_names = {
+                pooled["shared_name"] for pooled in self._idle if pooled["shared_name"]
+            }
+        if backend is None:
+            print("Configure the engine pool before attaching shared engines.")
+            return []
+
+        attached = []
+        for name in backend.find_shared_engines():
+            if name in attached_names:
+                continue
+            try:
+                engine = backend.connect_engine(name)
+            except Exception as e:
+                print(f"Failed to attach to the shared engine {name}: {e}")
+                continue
+            with self._lock:
+                self._idle.append(
+                    {
+                        "engine": engine,
+                        "backend": backend,
+                        "shared_name": name,
+                        "idle_since": time.time(),
+                    }
+                )
+                self._stats["attached"] += 1
+            attached.append(name)
+        return attached
+
+    def refill(self):
+        """Start engines in the background, up to the number of engines in demand."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        with self._lock:
+            num_started_idle = sum(
+                1 for pooled in self._idle if not pooled["shared_name"]
+            )
+            num_missing = (
+                self._target
+                - num_started_idle
+                - self._num_starting
+                - self._num_borrowed
+            )
+            if num_missing <= 0:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=MAX_PARALLEL_STARTS, thread_name_prefix="mwi-engines"
+                )
+            self._num_starting += num_missing
+            for _ in range(num_missing):
+                self._executor.submit(self._start_idle_engine)
+
+    def evict_idle(self):
+        """Stop the engines which have been idle for longer than idle_timeout.
+
+        Evicted engines are not replaced until a borrower misses the pool.
+
+        Returns:
+            int: Number of stopped engines.
+        """
+        import time
+
+        with self._lock:
+            deadline = time.time() - self.idle_timeout
+            expired = [
+                pooled for pooled in self._idle if pooled["idle_since"] < deadline
+            ]
+            self._idle = [pooled for pooled in self._idle if pooled not in expired]
+            self._stats["evicted_idle"] += len(expired)
+            num_started = sum(1 for pooled in expired if not pooled["shared_name"])
+            self._target = max(0, self._target - num_started)
+
+        for pooled in expired:
+            self._stop(pooled)
+        return len(expired)
+
+    def drain(self):
+        """Disable the pool, and stop all idle engines."""
+        with self._lock:
+            self.size = 0
+            self._target = 0
+            idle_engines, self._idle = self._idle, []
+            evictor, self._evictor = self._evictor, None
+        self._stop_evicting.set()
+        if evictor is not None:
+            evictor.join()
+        for pooled in idle_engines:
+            self._stop(pooled)
+
+    def get_stats(self):
+        """Get the metrics of the pool.
+
+        Returns:
+            dict: The "size", number of "idle", "borrowed" & "starting" engines, "hits", "misses",
+                  "hit_rate", "engines_started", "start_failures", "attached", "evicted_idle",
+                  "evicted_unhealthy", "last_startup_seconds" & "average_startup_seconds".
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = self.size
+            stats["idle"] = len(self._idle)
+            stats["borrowed"] = self._num_borrowed
+            stats["starting"] = self._num_starting
+
+        requests = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / requests if requests else None
+        stats["average_startup_seconds"] = (
+            stats["total_startup_seconds"] / stats["engines_started"]
+            if stats["engines_started"]
+            else None
+        )
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = self._new_stats()
+
+    ################################################
+    ## Helper Functions
+    ################################################
+
+    @staticmethod
+    def _new_stats():
+        return {
+            "hits": 0,
+            "misses": 0,
+            "engines_started": 0,
+            "start_failures": 0,
+            "attached": 0,
+            "evicted_idle": 0,
+            "evicted_unhealthy": 0,
+            "last_startup_seconds": None,
+            "total_startup_seconds": 0.0,
+        }
+
+    def _take(self):
+        """Returns a healthy idle engine, or a started engine on a miss."""
+        from . import engines
+
+        while True:
+            with self._lock:
+                if self.backend is None:
+                    self.backend = engines.get_backend()
+                backend = self.backend
+                if backend is None:
+                    raise RuntimeError(
+                        "No MATLAB Engine backend is available, see configure()"
+                    )
+                pooled = self._idle.pop() if self._idle else None
+                if pooled is None:
+                    self._stats["misses"] += 1
+                    # One more engine is in demand.
+                    self._target = min(self.size, self._target + 1)
+                self._num_borrowed += 1
+            if pooled is None:
+                break
+            if pooled["backend"].is_healthy(pooled["engine"]):
+                with self._lock:
+                    self._stats["hits"] += 1
+                break
+            with self._lock:
+                self._num_borrowed -= 1
+                self._stats["evicted_unhealthy"] += 1
+            self._stop(pooled)
+
+        if pooled is None:
+            try:
+                pooled = self._start_engine(backend)
+            except Exception:
+                with self._lock:
+                    self._num_borrowed -= 1
+                raise
+        self.refill()
+        return pooled
+
+    def _return(self, pooled):
+        """Reset the engine & keep it idle, or stop it if it is unhealthy or the pool is full."""
+        """Shared engines are not reset, as they are the live sessions of users."""
+        import time
+
+        backend = pooled["backend"]
+        is_healthy = False
+        try:
+            if not pooled["shared_name"]:
+                backend.reset_engine(pooled["engine"])
+            is_healthy = backend.is_healthy(pooled["engine"])
+        except Exception:
+            pass
+
+        with self._lock:
+            self._num_borrowed -= 1
+            if not is_healthy:
+                self._stats["evicted_unhealthy"] += 1
+            elif pooled["shared_name"] or len(self._idle) < self.size:
+                pooled["idle_since"] = time.time()
+                self._idle.append(pooled)
+                return
+        self._stop(pooled)
+        self.refill()
+
+    def _start_engine(self, backend):
+        import time
+
+        start_time = time.perf_counter()
+        try:
+            engine = backend.start_engine()
+        except Exception:
+            with self._lock:
+                self._stats["start_failures"] += 1
+            raise
+        startup_seconds = time.perf_counter() - start_time
+        with self._lock:
+            self._stats["engines_started"] += 1
+            self._stats["total_startup_seconds"] += startup_seconds
+            self._stats["last_startup_seconds"] = startup_seconds
+        return {
+            "engine": engine,
+            "backend": backend,
+            "shared_name": None,
+            "idle_since": time.time(),
+        }
+
+    def _start_idle_engine(self):
+        """Start an engine & add it to the idle engines."""
+        pooled = None
+        try:
+            pooled = self._start_engine(self.backend)
+        except Exception as e:
+            print(f"Failed to start a MATLAB Engine: {e}")
+
+        with self._lock:
+            self._num_starting -= 1
+            if pooled is not None and len(self._idle) < self.size:
+                self._idle.append(pooled)
+                pooled = None
+        if pooled is not None:
+            # The pool was resized while the engine was starting.
+            self._stop(pooled)
+
+    def _evict_periodically(self):
+        while not self._stop_evicting.wait(
+            max(1, min(MAX_EVICTION_INTERVAL, self.idle_timeout / 4))
+        ):
+            try:
+                self.evict_idle()
+            except Exception as e:
+                print(f"Failed to evict idle MATLAB Engines: {e}")
+
+    def _stop(self, pooled):
+        """Stop an engine started by the pool, or disconnect from a shared engine."""
+        try:
+            if pooled["shared_name"]:
+                pooled["backend"].disconnect_engine(pooled["engine"])
+            else:
+                pooled["backend"].stop_engine(pooled["engine"])
+        except Exception:
+            pass
+
+
+def get_engine_pool():
+    """Get the engine pool shared by all APIs in this process."""
+    return _engine_pool
+
+
+_engine_pool = EnginePool()
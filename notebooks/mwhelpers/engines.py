@@ -0,0 +1,267 @@
+# Copyright 2025 The MathWorks, Inc.
+## This module hosts the backends which start MATLAB Engines, and a fake engine for testing.
+
+# A backend starts engines, and converts data between Python & MATLAB. The "matlab" backend uses
+# MATLAB Engine for Python, which is installed in the image by the Dockerfile. The "fake" backend
+# calls Python functions in place of MATLAB functions, so that the code using engines can be
+# tested without MATLAB. Other backends are registered with register_backend().
+# Backends are pickled to run on the Spark executors, so they only hold their options.
+
+# Engines borrowed from the engine pool are reset between borrowers, checked for health, and may
+# be attached to the engines shared by running MATLAB sessions with matlab.engine.shareEngine.
+# See engine_pool.py
+
+# Columns are exchanged as 1-D NumPy arrays. call_function() passes numeric & logical columns
+# through shared memory, see exchange.py, and converts other columns to cell arrays.
+
+
+class MatlabBackend:
+    """Starts engines with MATLAB Engine for Python."""
+
+    name = "matlab"
+
+    def __init__(self, startup_options="-nodesktop -nosplash"):
+        self.startup_options = startup_options
+
+    def start_engine(self):
+        import matlab.engine
+
+        return matlab.engine.start_matlab(self.startup_options)
+
+    def reset_engine(self, engine):
+        """Clear the workspace, figures & open files left by the previous borrower."""
+        engine.eval("clear all; close all force; fclose('all');", nargout=0)
+
+    def is_healthy(self, engine):
+        """Calls a function, which, unlike eval, leaves no "ans" in the workspace."""
+        try:
+            engine.version(nargout=1)
+            return True
+        except Exception:
+            return False
+
+    def find_shared_engines(self):
+        """Returns the names of the engines shared by running MATLAB sessions."""
+        import matlab.engine
+
+        return list(matlab.engine.find_matlab())
+
+    def connect_engine(self, name):
+        import matlab.engine
+
+        return matlab.engine.connect_matlab(name)
+
+    def stop_engine(self, engine):
+        """Stop an engine started by start_engine()."""
+        try:
+            engine.quit()
+        except Exception:
+            pass
+
+    def disconnect_engine(self, engine):
+        """Disconnect from a shared engine, whose MATLAB session keeps running."""
+        # quit() on an engine returned by connect_matlab() only closes the connection.
+        try:
+            engine.quit()
+        except Exception:
+            pass
+
+    def call_function(self, engine, function, columns, nargout=1):
+        """Call a MATLAB function with a column vector for each column.
+
+        Returns:
+            list: A 1-D NumPy array for each of the nargout columns returned by the function.
+        """
+        return _call_function(self, engine, function, columns, nargout)
+
+    def to_matlab(self, values):
+        """Convert a 1-D NumPy array to a MATLAB column vector, or to a cell array."""
+        import matlab
+
+        matlab_types = {
+            "b": matlab.logical,
+            "i": matlab.int64,
+            "u": matlab.uint64,
+            "f": matlab.double,
+        }
+        matlab_type = matlab_types.get(values.dtype.kind)
+        if matlab_type is None:
+            return values.tolist()
+        return matlab_type(values.tolist(), size=(len(values), 1))
+
+    def from_matlab(self, value):
+        """Convert a MATLAB array, or a cell array, to a 1-D NumPy array."""
+        import numpy
+
+        return numpy.asarray(value).reshape(-1)
+
+    def get_key(self):
+        """Returns a key which identifies the engines started by equal backends."""
+        return (self.name, self.startup_options)
+
+
+class FakeBackend:
+    """Starts FakeEngines, which call Python functions in place of MATLAB functions."""
+
+    name = "fake"
+
+    def __init__(self, functions=None, startup_delay=0, shared_engines=()):
+        """Args:
+        functions (dict): Maps the name of each MATLAB function to a Python function.
+        startup_delay (float): Seconds taken to start an engine.
+        shared_engines (list): Names of the engines shared by fake MATLAB sessions.
+        """
+        self.functions = dict(functions or {})
+        self.startup_delay = startup_delay
+        self.shared_engines = list(shared_engines)
+
+    def start_engine(self):
+        import time
+
+        time.sleep(self.startup_delay)
+        return FakeEngine(self.functions)
+
+    def reset_engine(self, engine):
+        engine.eval("clear all", nargout=0)
+
+    def is_healthy(self, engine):
+        return engine._is_running
+
+    def find_shared_engines(self):
+        return list(self.shared_engines)
+
+    def connect_engine(self, name):
+        if name not in self.shared_engines:
+            raise RuntimeError(f"No shared engine named {name}")
+        return FakeEngine(self.functions)
+
+    def stop_engine(self, engine):
+        engine.quit()
+
+    def disconnect_engine(self, engine):
+        engine.quit()
+
+    def call_function(self, engine, function, columns, nargout=1):
+        return _call_function(self, engine, function, columns, nargout)
+
+    def to_matlab(self, values):
+        return values
+
+    def from_matlab(self, value):
+        import numpy
+
+        return numpy.asarray(value).reshape(-1)
+
+    def get_key(self):
+        return (self.name, tuple(sorted(self.functions)), self.startup_delay)
+
+
+class FakeEngine:
+    """Stand-in for a MATLAB Engine, with a workspace & functions implemented in Python."""
+
+    def __init__(self, functions=None):
+        self.workspace = {}
+        self.num_calls = 0
+        self._functions = dict(functions or {})
+        self._is_running = True
+
+    def eval(self, statement, nargout=0):
+        """Only supports "clear" & "clear all", raises a ValueError for other statements."""
+        self._check_running()
+        if statement.strip().rstrip(";") in ("clear", "clear all"):
+            self.workspace.clear()
+            return None
+        raise ValueError(f"Error evaluating '{statement}': unsupported by FakeEngine")
+
+    def addpath(self, *folders, nargout=0):
+        self._check_running()
+
+    def quit(self):
+        self._is_running = False
+
+    def __getattr__(self, name):
+        import functools
+
+        from . import exchange
+
+        if name == "mwhelpersCallWithColumns":
+            function = functools.partial(
+                exchange._fake_call_with_columns, self._functions
+            )
+        elif name.startswith("_") or name not in self._functions:
+            raise AttributeError(f"Undefined function '{name}'")
+        else:
+            function = self._functions[name]
+
+        def call(*args, nargout=1):
+            self._check_running()
+            self.num_calls += 1
+            result = function(*args)
+            if nargout != 1 and not isinstance(result, tuple):
+                raise ValueError(f"{name} returned 1 output instead of {nargout}")
+            return result
+
+        return call
+
+    def _check_running(self):
+        if not self._is_running:
+            raise RuntimeError("The engine has exited")
+
+
+def _call_function(backend, engine, function, columns, nargout):
+    """Pass the columns through shared memory if they are all numeric or logical."""
+    from . import exchange
+
+    if all(exchange.is_exchangeable(values) for values in columns):
+        return exchange.call_with_columns(
+            engine,
+            function,
+            {f"input{index + 1}": values for index, values in enumerate(columns)},
+            nargout=nargout,
+        )
+
+    args = [backend.to_matlab(values) for values in columns]
+    outputs = getattr(engine, function)(*args, nargout=nargout)
+    if nargout == 1:
+        outputs = (outputs,)
+    return [backend.from_matlab(output) for output in outputs]
+
+
+_backends = {
+    MatlabBackend.name: MatlabBackend,
+    FakeBackend.name: FakeBackend,
+}
+
+
+def register_backend(name, backend_class):
+    """Register a backend, Example: a backend which starts engines with other options.
+
+    Args:
+        name (str): Name of the backend, used by get_backend().
+        backend_class: Class with the methods of MatlabBackend, which is constructed with the
+                       options passed to get_backend().
+    """
+    _backends[name] = backend_class
+
+
+def get_backend(backend=None, **options):
+    """Get a backend.
+
+    Args:
+        backend: A backend, or the name of a registered backend, MWHELPERS_ENGINE_BACKEND or
+                 "matlab" if None.
+        options: Keyword arguments of the class of the backend, Example: functions of "fake".
+
+    Returns:
+        The backend, or None if the name is not registered.
+    """
+    import os
+
+    if backend is None:
+        backend = os.environ.get("MWHELPERS_ENGINE_BACKEND", MatlabBackend.name)
+    if not isinstance(backend, str):
+        return backend
+    if backend not in _backends:
+        print(f"Unknown engine backend: {backend}, choose from {list(_backends)}")
+        return None
+    return _backends[backend](**options)
@@ -0,0 +1,366 @@
+# Copyright 2025 The MathWorks, Inc.
+## This module hosts the exchange of columnar data between Arrow or NumPy & MATLAB Engines.
+
+# Passing an array through MATLAB Engine for Python, Example: matlab.double(values.tolist()),
+# converts each element in Python, which takes seconds for millions of rows.
+# Instead, the columns are written as contiguous typed buffers to a file in shared memory
+# (/dev/shm), and scripts/mwhelpersCallWithColumns.m maps the file with memmapfile, calls the
+# MATLAB function & writes the columns it returns the same way. Only the path & the layout of the
+# file go through the engine. The returned columns are memory-mapped by NumPy without a copy.
+# Arrow columns of primitive types without nulls are written straight from their Arrow buffers.
+
+# Layout of a file: the buffer of each column starts at a multiple of 64 bytes. A descriptor, a
+# dictionary passed to MATLAB as a struct, lists the "name", MATLAB "type", "offset", "length",
+# "logical" & "complex" flags of each column. Complex columns interleave real & imaginary parts.
+# MATLAB outputs of other classes, Example: char, are described without data, and read_columns()
+# raises a TypeError naming their class.
+
+# The engine may run as another user than this process, Example: an engine shared by the MATLAB
+# session of a user. The exchange folder of each user can be traversed but not listed by others,
+# the input files are readable, and the output file is created by this process, writable by the
+# engine. The names of the files are random.
+
+# Rows of the columns compared by benchmark().
+DEFAULT_BENCHMARK_SIZES = (10**3, 10**4, 10**5, 10**6)
+
+# Buffers start at a multiple of the size of a cache line.
+_ALIGNMENT = 64
+
+# NumPy dtype -> MATLAB class. Logical columns are exchanged as uint8.
+_MATLAB_TYPES = {
+    "float64": "double",
+    "float32": "single",
+    "complex128": "double",
+    "complex64": "single",
+    "int8": "int8",
+    "int16": "int16",
+    "int32": "int32",
+    "int64": "int64",
+    "uint8": "uint8",
+    "uint16": "uint16",
+    "uint32": "uint32",
+    "uint64": "uint64",
+    "bool": "uint8",
+}
+
+
+def is_exchangeable(values):
+    """Returns True if the 1-D array can be exchanged as a typed buffer."""
+    return values.ndim == 1 and values.dtype.newbyteorder("=").name in _MATLAB_TYPES
+
+
+def write_columns(columns, path=None):
+    """Write the columns to a file in shared memory, as contiguous typed buffers.
+
+    Args:
+        columns: A dictionary of 1-D NumPy arrays, a pandas DataFrame, or an Arrow RecordBatch
+                 or Table, whose columns are numeric or boolean.
+        path (str): The file to write, a new file in the exchange folder if None.
+
+    Returns:
+        dict: The descriptor of the file, with its "path", "num_rows" & "columns".
+
+    Raises:
+        TypeError: If a column is not numeric or boolean.
+    """
+    import os
+
+    import numpy
+
+    arrays = list(_iter_numpy_columns(columns))
+    for name, values in arrays:
+        if not is_exchangeable(values):
+            raise TypeError(
+                f"Column {name} of type {values.dtype} cannot be exchanged as a buffer"
+            )
+
+    path = path or _new_path()
+    descriptor = {"path": path, "num_rows": 0, "columns": []}
+    offset = 0
+    with os.fdopen(_create_file(path, 0o644), "wb") as f:
+        for name, values in arrays:
+            values = numpy.ascontiguousarray(
+                values, dtype=values.dtype.newbyteorder("<")
+            )
+            padding = -offset % _ALIGNMENT
+            f.write(b"\0" * padding)
+            offset += padding
+            f.write(memoryview(values).cast("B"))
+            descriptor["columns"].append(
+                {
+                    "name": str(name),
+                    "type": _MATLAB_TYPES[values.dtype.name],
+                    "offset": offset,
+                    "length": len(values),
+                    "logical": bool(values.dtype == bool),
+                    "complex": values.dtype.kind == "c",
+                }
+            )
+            descriptor["num_rows"] = max(descriptor["num_rows"], len(values))
+            offset += values.nbytes
+    return descriptor
+
+
+def read_columns(descriptor):
+    """Memory-map the columns of a file written by write_columns() or by MATLAB.
+
+    The file can be removed once it is mapped, the arrays remain valid.
+
+    Returns:
+        dict: Maps the name of each column to a read-only 1-D NumPy array.
+
+    Raises:
+        TypeError: If a column returned by MATLAB is not numeric or logical, Example: char.
+    """
+    import numpy
+
+    numpy_types = {
+        matlab_type: numpy_type
+        for numpy_type, matlab_type in _MATLAB_TYPES.items()
+        if numpy.dtype(numpy_type).kind not in "bc"
+    }
+    complex_types = {"double": "complex128", "single": "complex64"}
+
+    columns = {}
+    for column in _as_list(descriptor["columns"]):
+        if column["complex"]:
+            numpy_type = complex_types.get(column["type"])
+        else:
+            numpy_type = numpy_types.get(column["type"])
+        if numpy_type is None:
+            kind = "complex " if column["complex"] else ""
+            raise TypeError(
+                f"Column {column['name']} of MATLAB class {kind}{column['type']} cannot be "
+                "exchanged as a buffer, return numeric or logical columns"
+            )
+        dtype = numpy.dtype(numpy_type).newbyteorder("<")
+        length = int(column["length"])
+        if length == 0:
+            values = numpy.empty(0, dtype=dtype)
+        else:
+            values = numpy.memmap(
+                descriptor["path"],
+                dtype=dtype,
+                mode="r",
+                offset=int(column["offset"]),
+                shape=(length,),
+            )
+        if column["logical"]:
+            values = values.view(bool)
+        columns[column["name"]] = values
+    return columns
+
+
+def call_with_columns(engine, function, columns, nargout=1):
+    """Call a MATLAB function with the columns, exchanged through a file in shared memory.
+
+    Args:
+        engine: A MATLAB Engine, or a FakeEngine. See engines.py
+        function (str): Name of the MATLAB function, called with a column vector per column.
+        columns: The columns, see write_columns().
+        nargout (int): Number of columns returned by the function.
+
+    Returns:
+        list: A read-only 1-D NumPy array for each column returned by the function.
+    """
+    import os
+
+    input_descriptor = write_columns(columns)
+    output_path = _new_path()
+    try:
+        # The engine may not be allowed to create files in the exchange folder.
+        os.close(_create_file(output_path, 0o666))
+        _add_helper_to_path(engine)
+        output_descriptor = engine.mwhelpersCallWithColumns(
+            function, input_descriptor, output_path, nargout, nargout=1
+        )
+        return list(read_columns(output_descriptor).values())
+    finally:
+        for path in (input_descriptor["path"], output_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def benchmark(backend=None, sizes=DEFAULT_BENCHMARK_SIZES, repeats=3):
+    """Compare the exchange of columns against the conversion of lists, across column sizes.
+
+    A column of random doubles is passed to the MATLAB function uplus, which returns it, and is
+    converted back to a NumPy array. The lists are converted with matlab.double(values.tolist()),
+    or only with values.tolist() for the "fake" backend, which has no MATLAB types.
+
+    Args:
+        backend: Backend starting the engine, or its name. See engines.get_backend()
+                 The "fake" backend measures the Python side of the exchange only.
+        sizes (list): Rows of the columns.
+        repeats (int): Measurements of each size, the fastest is kept.
+
+    Returns:
+        list: A dictionary for each size, with its "rows", "naive_seconds", "exchange_seconds"
+              & "speedup".
+    """
+    import time
+
+    import numpy
+
+    from . import engines
+
+    if backend == engines.FakeBackend.name:
+        backend = engines.FakeBackend(functions={"uplus": lambda values: values})
+    backend = engines.get_backend(backend)
+    engine = backend.start_engine()
+
+    def naive(values):
+        if isinstance(backend, engines.FakeBackend):
+            matlab_values = values.tolist()
+        else:
+            import matlab
+
+            matlab_values = matlab.double(values.tolist(), size=(len(values), 1))
+        return numpy.asarray(engine.uplus(matlab_values, nargout=1)).reshape(-1)
+
+    def exchange(values):
+        return call_with_columns(engine, "uplus", {"values": values})[0]
+
+    results = []
+    try:
+        for size in sizes:
+            values = numpy.random.default_rng(0).random(size)
+            timings = {}
+            for name, method in (("naive", naive), ("exchange", exchange)):
+                seconds = []
+                for _ in range(repeats):
+                    start_time = time.perf_counter()
+                    returned = method(values)
+                    seconds.append(time.perf_counter() - start_time)
+                if not numpy.array_equal(returned, values):
+                    raise ValueError(f"The {name} exchange changed the values")
+                timings[name] = min(seconds)
+            results.append(
+                {
+                    "rows": size,
+                    "naive_seconds": timings["naive"],
+                    "exchange_seconds": timings["exchange"],
+                    "speedup": timings["naive"] / timings["exchange"],
+                }
+            )
+            print(
+                f"{size:>10} rows: naive {timings['naive']:.4f}s, "
+                f"exchange {timings['exchange']:.4f}s, "
+                f"speedup {results[-1]['speedup']:.1f}x"
+            )
+    finally:
+        backend.stop_engine(engine)
+    return results
+
+
+################################################
+## Helper Functions
+################################################
+
+
+def get_exchange_folder():
+    """Returns the folder of the exchanged files of this user, in shared memory if /dev/shm is available."""
+    """Other users can open the files in the folder, but cannot list them."""
+    import os
+
+    from . import cache
+
+    if os.access("/dev/shm", os.W_OK):
+        folder = os.path.join("/dev/shm", f"mwhelpers-exchange-{os.getuid()}")
+        os.makedirs(folder, mode=0o711, exist_ok=True)
+        # A folder created by another user could be read by that user.
+        if os.stat(folder).st_uid == os.getuid():
+            os.chmod(folder, 0o711)
+            return folder
+    return cache.get_cache_folder("exchange")
+
+
+def _new_path():
+    import os
+    import uuid
+
+    return os.path.join(get_exchange_folder(), f"{uuid.uuid4().hex}.bin")
+
+
+def _create_file(path, mode):
+    """Create or truncate the file with the permissions, regardless of the umask."""
+    """Returns the file descriptor."""
+    import os
+
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    os.fchmod(fd, mode)
+    return fd
+
+
+def _iter_numpy_columns(columns):
+    """Yields the name & a 1-D NumPy array of each column, without a copy where possible."""
+    import numpy
+
+    if hasattr(columns, "column_names"):
+        # An Arrow RecordBatch or Table. Primitive columns without nulls are not copied.
+        for index, name in enumerate(columns.column_names):
+            values = columns.column(index)
+            if hasattr(values, "combine_chunks"):
+                values = values.combine_chunks()
+            yield name, values.to_numpy(zero_copy_only=False)
+    else:
+        for name, values in columns.items():
+            yield name, numpy.asarray(values)
+
+
+def _as_list(value):
+    """Returns a list of structs returned by MATLAB, which returns a single struct as a dict."""
+    return [value] if isinstance(value, dict) else list(value)
+
+
+def _add_helper_to_path(engine):
+    """Add the folder of mwhelpersCallWithColumns.m to the path of the engine."""
+    """The helper is copied out of the package, which is a zip file on the Spark executors."""
+    import os
+    import pkgutil
+
+    folder = os.path.join(get_exchange_folder(), "matlab")
+    helper = os.path.join(folder, "mwhelpersCallWithColumns.m")
+    if not os.path.exists(helper):
+        os.makedirs(folder, mode=0o755, exist_ok=True)
+        os.chmod(folder, 0o755)
+        staging = f"{helper}.{os.getpid()}"
+        with os.fdopen(_create_file(staging, 0o644), "wb") as f:
+            f.write(pkgutil.get_data(__package__, "scripts/mwhelpersCallWithColumns.m"))
+        os.replace(staging, helper)
+    engine.addpath(folder, nargout=0)
+
+
+def _fake_call_with_columns(
+    functions, function, input_descriptor, output_path, nargout
+):
+    """Python implementation of scripts/mwhelpersCallWithColumns.m, used by FakeEngine."""
+    columns = read_columns(input_descriptor)
+    outputs = functions[function](*columns.values())
+    if nargout == 1:
+        outputs = (outputs,)
+    return write_columns(
+        {f"output{index + 1}": output for index, output in enumerate(outputs)},
+        path=output_path,
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+    import importlib
+
+    parser = argparse.ArgumentParser(
+        description="Compare the exchange of columns against the conversion of lists."
+    )
+    parser.add_argument("--backend", default="fake", help='"matlab" or "fake"')
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=list(DEFAULT_BENCHMARK_SIZES)
+    )
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    importlib.import_module(f"{__package__}.exchange").benchmark(
+        backend=args.backend, sizes=args.sizes, repeats=args.repeats
+    )
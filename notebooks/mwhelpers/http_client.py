@@ -0,0 +1,111 @@
+# Copyright 2025 The MathWorks, Inc.
+## This module hosts the pooled HTTP client used to call the matlab-proxy servers.
+
+# A single requests.Session is shared by all calls, so that connections to the matlab-proxy
+# servers are kept alive and reused. Every call has a timeout, idempotent calls are retried a
+# bounded number of times, and the number of calls in flight is limited.
+# The async variants run the calls in worker threads, so that many servers can be queried
+# in parallel from an event loop.
+
+import threading
+
+# (connect, read) timeouts in seconds.
+DEFAULT_TIMEOUT = (3, 10)
+
+# Number of retries for idempotent calls which fail to connect or return a 502/503/504.
+DEFAULT_RETRIES = 2
+
+# Maximum number of calls in flight, which is also the size of the connection pool.
+MAX_CONCURRENT_REQUESTS = 16
+
+_session = None
+_session_lock = threading.Lock()
+_concurrency_limit = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+
+
+def get_session():
+    """Get the shared requests.Session, which is created on first use."""
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            _session = _create_session()
+        return _session
+
+
+def request(method, url, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """Send an HTTP request using the shared session.
+
+    Args:
+        method (str): HTTP method, Example: "GET"
+        url (str): URL to send the request to.
+        timeout: Timeout in seconds, or a (connect, read) tuple.
+        **kwargs: Passed to requests.Session.request()
+
+    Returns:
+        requests.Response: The response.
+
+    Raises:
+        requests.exceptions.RequestException: If the request failed after the retries.
+    """
+    with _concurrency_limit:
+        return get_session().request(method, url, timeout=timeout, **kwargs)
+
+
+async def request_async(method, url, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """Asynchronous variant of request()."""
+    import asyncio
+
+    return await asyncio.to_thread(request, method, url, timeout=timeout, **kwargs)
+
+
+async def request_all_async(method, urls, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """Send the same request to each of the URLs in parallel.
+
+    Returns:
+        list: The response, or the exception raised, for each of the URLs.
+    """
+    import asyncio
+
+    return await asyncio.gather(
+        *(request_async(method, url, timeout=timeout, **kwargs) for url in urls),
+        return_exceptions=True,
+    )
+
+
+def close():
+    """Close the shared session and its connections. A new session is created on next use."""
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+################################################
+## Helper Functions
+################################################
+
+
+def _create_session():
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retries = Retry(
+        total=DEFAULT_RETRIES,
+        backoff_factor=0.2,
+        status_forcelist=(502, 503, 504),
+        # Retry.DEFAULT_ALLOWED_METHODS, which excludes POST.
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=MAX_CONCURRENT_REQUESTS,
+        pool_maxsize=MAX_CONCURRENT_REQUESTS,
+        max_retries=retries,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
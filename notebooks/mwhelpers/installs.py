@@ -0,0 +1,226 @@
+# Copyright 2025 The MathWorks, Inc.
+## This module hosts the background installation of MATLAB products.
+
+# Products are installed by an InstallJob, which runs MATLAB Package Manager (mpm) in a background
+# thread, so that starting a MATLAB session is not blocked by an installation.
+# - mpm & the archives of the products are taken from the download cache, see downloads.py
+# - Products are installed one at a time, and the output of mpm is streamed line by line.
+# - Products already in the installed products index are skipped, so that retrying a failed
+#   job resumes where it stopped instead of starting over.
+# Jobs installing into the same MATLAB root run one after the other, as mpm cannot install
+# into a MATLAB root concurrently.
+
+import itertools
+import threading
+
+_jobs = {}
+_job_ids = itertools.count(1)
+_jobs_lock = threading.Lock()
+# MATLAB root -> lock held while a job installs into it
+_destination_locks = {}
+
+
+class InstallJob:
+    """Installation of products into a MATLAB root, running in a background thread."""
+
+    def __init__(self, products, destination, release):
+        self.job_id = next(_job_ids)
+        self.destination = destination
+        self.release = release
+        # Product -> "pending", "installing", "installed", "skipped" or "failed"
+        self.products = {product: "pending" for product in products}
+        # "queued", "running", "succeeded" or "failed"
+        self.state = "queued"
+        self.error = None
+        self.output = []
+        self.start_time = None
+        self.end_time = None
+        self._condition = threading.Condition()
+        self._callbacks = []
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name=f"mwi-install-{self.job_id}", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def done(self):
+        return self.state in ("succeeded", "failed")
+
+    def wait(self, timeout=None):
+        """Wait until the job is done. Returns True if the job succeeded."""
+        with self._condition:
+            self._condition.wait_for(lambda: self.done, timeout=timeout)
+        return self.state == "succeeded"
+
+    def iter_output(self, start=0):
+        """Yield the lines of output as they are written, until the job is done."""
+        index = start
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: len(self.output) > index or self.done)
+                lines = self.output[index:]
+                is_done = self.done
+            yield from lines
+            index += len(lines)
+            if is_done and index >= len(self.output):
+                return
+
+    def add_done_callback(self, callback):
+        """Call callback(job) when the job is done, immediately if it is already done."""
+        with self._condition:
+            if not self.done:
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def to_dict(self):
+        with self._condition:
+            return {
+                "job_id": self.job_id,
+                "state": self.state,
+                "destination": self.destination,
+                "release": self.release,
+                "products": dict(self.products),
+                "error": self.error,
+                "start_time": self.start_time,
+                "end_time": self.end_time,
+                "num_output_lines": len(self.output),
+            }
+
+    ################################################
+    ## Helper Functions
+    ################################################
+
+    def _run(self):
+        import time
+
+        from . import downloads, mwi
+
+        with _get_destination_lock(self.destination):
+            self._set(state="running", start_time=time.time())
+            try:
+                mpm = downloads.get_mpm(log=self._write)
+                # Products are skipped against a single scan of the MATLAB root, taken once.
+                installation = mwi.get_matlab_installation(refresh=True)
+                for product in self.products:
+                    self._install_product(mpm, product, installation)
+            except Exception as e:
+                self._set(error=str(e))
+            try:
+                # Update the installed products shared by the APIs in mwi, once per job.
+                mwi.get_matlab_installation(refresh=True)
+            except Exception as e:
+                self._write(f"Failed to refresh the installed products: {e}")
+            failed = self.error or "failed" in self.products.values()
+            self._set(
+                state="failed" if failed else "succeeded",
+                end_time=time.time(),
+            )
+
+        with self._condition:
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"Install job callback failed: {e}")
+
+    def _install_product(self, mpm, product, installation):
+        """Install the product, unless it is in the installation scanned at the start of the job."""
+        from . import downloads
+
+        if product in installation:
+            self._set_product(product, "skipped")
+            self._write(f"{product} is already installed, skipping.")
+            return
+
+        self._set_product(product, "installing")
+        command = [
+            mpm,
+            "install",
+            "--destination",
+            self.destination,
+            "--products",
+            # mpm expects spaces in product names to be replaced with underscores.
+            product.replace(" ", "_"),
+        ]
+        source = downloads.get_product_source(
+            mpm, self.release, product, log=self._write
+        )
+        if source:
+            command += ["--source", source]
+        else:
+            # Install directly from the network.
+            command += ["--release", self.release]
+
+        self._write(f"Installing {product}...")
+        returncode = downloads.run_mpm(command, self._write)
+        if returncode == 0:
+            self._set_product(product, "installed")
+        else:
+            self._set_product(product, "failed")
+            self._write(f"Failed to install {product}, mpm exited with {returncode}")
+
+    def _write(self, line):
+        with self._condition:
+            self.output.append(line)
+            self._condition.notify_all()
+
+    def _set(self, **attributes):
+        with self._condition:
+            for name, value in attributes.items():
+                setattr(self, name, value)
+            self._condition.notify_all()
+
+    def _set_product(self, product, state):
+        with self._condition:
+            self.products[product] = state
+            self._condition.notify_all()
+
+
+def start_install_job(products, destination, release):
+    """Install the products into the MATLAB root in a background thread.
+
+    Args:
+        products (list): Names of the products to install, Example: ["Simulink"]
+        destination (str): The MATLAB root.
+        release (str): The release of MATLAB, Example: R2025a
+
+    Returns:
+        InstallJob: The job, which is queued behind other jobs installing into the same MATLAB root.
+    """
+    job = InstallJob(list(dict.fromkeys(products)), destination, release)
+    with _jobs_lock:
+        _jobs[job.job_id] = job
+    job.start()
+    return job
+
+
+def get_install_job(job_id):
+    """Returns the job with the ID, or None."""
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def get_install_jobs(active_only=False):
+    """Returns the jobs started by this process, oldest first."""
+    with _jobs_lock:
+        jobs = list(_jobs.values())
+    return [job for job in jobs if not (active_only and job.done)]
+
+
+################################################
+## Helper Functions
+################################################
+
+
+def _get_destination_lock(destination):
+    import os
+
+    with _jobs_lock:
+        return _destination_locks.setdefault(
+            os.path.realpath(destination), threading.Lock()
+        )
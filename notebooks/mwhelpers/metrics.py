@@ -0,0 +1,167 @@
+# Copyright 2025 The MathWorks, Inc.
+## This module hosts the metrics of the MATLAB sessions running on this node.
+
+# Each port listed by get_running_matlab_proxy_servers() is mapped to the process tree of its
+# matlab-proxy server, which includes MATLAB & Xvfb. The RSS, CPU time & threads of the tree are
+# summed from a single sweep of /proc per collection, see procfs.py
+# The metrics are available as a Python API, and in the Prometheus text exposition format from
+# an HTTP server listening on a local port.
+
+import threading
+
+# Port of the metrics server, in the range proxied by Databricks.
+DEFAULT_METRICS_PORT = 9464
+
+# (name, type, help) of each metric of a session.
+_SESSION_METRICS = (
+    ("rss_bytes", "gauge", "Resident memory of the process tree of the session."),
+    ("cpu_seconds", "counter", "CPU time used by the process tree of the session."),
+    ("num_threads", "gauge", "Threads in the process tree of the session."),
+    ("num_processes", "gauge", "Processes in the process tree of the session."),
+    ("uptime_seconds", "gauge", "Seconds since the matlab-proxy server started."),
+)
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def collect_session_metrics(usernames=None):
+    """Collect the metrics of the MATLAB sessions of the users, from a single sweep of /proc.
+
+    Args:
+        usernames (list): Users whose sessions are measured, the users with a ports folder
+                          on this node if None, see registry.discover_usernames()
+
+    Returns:
+        list: A dictionary for each session, with its "username", "port", "pid", "rss_bytes",
+              "cpu_seconds", "num_threads", "num_processes" & "uptime_seconds".
+    """
+    from . import mwi, procfs, registry
+
+    if usernames is None:
+        usernames = registry.get_registry().discover_usernames()
+
+    process_table = procfs.read_process_table()
+    uptime = procfs.get_uptime()
+
+    metrics = []
+    for username in usernames:
+        sessions = mwi.get_matlab_sessions(username)
+        for port in mwi.get_running_matlab_proxy_servers(username):
+            session = sessions.get(port)
+            if session is None:
+                continue
+            pids = procfs.get_process_tree(process_table, session["pid"])
+            processes = [process_table[pid] for pid in pids]
+            metrics.append(
+                {
+                    "username": username,
+                    "port": port,
+                    "pid": session["pid"],
+                    "rss_bytes": sum(process["rss_bytes"] for process in processes),
+                    "cpu_seconds": sum(process["cpu_seconds"] for process in processes),
+                    "num_threads": sum(process["num_threads"] for process in processes),
+                    "num_processes": len(processes),
+                    "uptime_seconds": (
+                        uptime - processes[0]["start_time"] if processes else None
+                    ),
+                }
+            )
+    return metrics
+
+
+def format_prometheus(metrics, pool_stats=None):
+    """Format the session metrics, and the warm pool statistics, in the Prometheus text format."""
+    lines = []
+    for name, metric_type, help_text in _SESSION_METRICS:
+        metric_name = f"mwi_session_{name}"
+        if metric_type == "counter":
+            metric_name += "_total"
+        lines.append(f"# HELP {metric_name} {help_text}")
+        lines.append(f"# TYPE {metric_name} {metric_type}")
+        for session in metrics:
+            if session[name] is None:
+                continue
+            labels = (
+                f'username="{_escape_label(session["username"])}",'
+                f'port="{session["port"]}"'
+            )
+            lines.append(f"{metric_name}{{{labels}}} {session[name]}")
+
+    lines.append("# HELP mwi_sessions Running MATLAB sessions.")
+    lines.append("# TYPE mwi_sessions gauge")
+    lines.append(f"mwi_sessions {len(metrics)}")
+
+    if pool_stats is not None:
+        for name in ("hits", "misses", "refills", "refill_failures"):
+            lines.append(f"# TYPE mwi_pool_{name}_total counter")
+            lines.append(f"mwi_pool_{name}_total {pool_stats[name]}")
+        lines.append("# TYPE mwi_pool_standby_sessions gauge")
+        lines.append(f"mwi_pool_standby_sessions {pool_stats['standby']}")
+    return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(port=DEFAULT_METRICS_PORT, host="127.0.0.1", usernames=None):
+    """Serve the metrics in the Prometheus text format at http://<host>:<port>/metrics
+
+    Metrics are collected on each scrape. The server runs in a background thread.
+
+    Returns:
+        int: The port of the server, or None if it could not be started.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    from . import pool
+
+    global _server
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = format_prometheus(
+                collect_session_metrics(usernames), pool.get_pool().get_stats()
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    with _server_lock:
+        if _server is not None:
+            return _server.server_address[1]
+        try:
+            _server = ThreadingHTTPServer((host, port), MetricsHandler)
+        except OSError as e:
+            print(f"Unable to start the metrics server on port {port}: {e}")
+            return None
+        _server.daemon_threads = True
+        threading.Thread(
+            target=_server.serve_forever, name="mwi-metrics", daemon=True
+        ).start()
+        return _server.server_address[1]
+
+
+def stop_metrics_server():
+    """Stop the server started by start_metrics_server()."""
+    global _server
+
+    with _server_lock:
+        server, _server = _server, None
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+
+
+################################################
+## Helper Functions
+################################################
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
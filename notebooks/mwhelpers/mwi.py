@@ -7,42 +7,76 @@
 # get_cluster_name()
 # get_databricks_context()
 # get_user_name(),
+# set_databricks_context(context, cluster_info)
 
 ## MATLAB Installation Related
 # get_installed_toolboxes()
+# get_matlab_installation(),
 # get_matlab_root(),
 # get_matlab_version(),
 # get_toolboxes_available_for_install(),
+# install_toolboxes(toolboxes)
+# get_install_jobs(active_only)
+# wait_for_install_jobs()
 
 ## MATLAB Proxy Related
+# get_matlab_sessions(username)
 # get_running_matlab_proxy_servers(username=get_username())
 # get_url_to_matlab(session_id, context)
 # start_matlab_session(configure_psp, toolboxes_to_install, username=get_username())
+# wait_for_matlab_session(port)
+# start_matlab_sessions(usernames, max_parallel, memory_per_session_mb)
 # stop_matlab_session(session, context)
+# stop_matlab_sessions(username, ports, context)
+# configure_matlab_pool(size, usernames)
+# get_matlab_pool_stats()
+# reap_idle_matlab_sessions(idle_timeout, dry_run)
+# start_idle_reaper(idle_timeout, interval)
+# stop_idle_reaper()
+# get_matlab_session_metrics(usernames)
+# start_metrics_server(port)
+# stop_metrics_server()
+# start_node_daemon()
+# stop_node_daemon()
+# get_node_daemon_status()
+# get_cluster_node_loads(agents)
+# start_matlab_session_on_cluster(username, agents, context)
+# stop_matlab_session_on_cluster(session, context)
+
+## MATLAB Engine Related
+# map_matlab(df, function, columns, output_schema, batch_rows)
+# configure_matlab_engine_pool(size, backend, idle_timeout)
+# matlab_engine()
+# attach_shared_matlab_engines()
+# get_matlab_engine_pool_stats()
+# call_matlab_function(function, columns, nargout)
+
+import threading
 
 
 ################################################
 ## Databricks Related APIs
 ################################################
 def get_cluster_name():
-    from databricks.sdk import WorkspaceClient
+    """The cluster metadata is fetched once per cluster, see context.py"""
+    from . import context
 
-    context = get_databricks_context()
-    if context.isInJob:
-        return "Job Cluster"
-    else:
-        cluster_name = (
-            WorkspaceClient(host=context.browserHostName, token=context.apiToken)
-            .clusters.get(context.clusterId)
-            .cluster_name
-        )
-        return cluster_name
+    return context.get_cluster_info()["cluster_name"]
 
 
 def get_databricks_context():
-    from dbruntime.databricks_repl_context import get_context
+    """The context is read once per kernel, or is the fake context set by set_databricks_context()."""
+    from . import context
+
+    return context.get_context()
+
+
+def set_databricks_context(context, cluster_info=None):
+    """Inject a fake Databricks context, Example: for testing outside of Databricks."""
+    """See set_context() in context.py. Pass None to use the Databricks context again."""
+    from . import context as databricks_context
 
-    return get_context()
+    databricks_context.set_context(context, cluster_info=cluster_info)
 
 
 def get_user_name():
@@ -67,8 +101,43 @@ def get_installed_toolboxes(refresh):
         list: List of installed toolboxes.
     """
 
-    installed_products = _call_ListInstalledProducts_script_cached(refresh)
-    return installed_products.splitlines()[4:]
+    return list(get_matlab_installation(refresh=refresh).products)
+
+
+def get_matlab_installation(refresh=False):
+    """Get the MATLAB root, MATLAB version & installed products of MATLAB.
+
+    Listing all products can be time consuming, so the result is cached in memory,
+    and in an on-disk index which survives kernel restarts.
+
+    Args:
+        refresh (bool): Revalidate the on-disk index against the toolbox folders,
+                        and list the products again if they have changed.
+
+    Returns:
+        products.MatlabInstallation: The MATLAB installation.
+    """
+    from . import products
+
+    # Concurrent callers, Example: the lookups of the control panel, share a single scan.
+    with _installation_lock:
+        if not hasattr(get_matlab_installation, "_cached_installation") or refresh:
+            matlab_root = get_matlab_root()
+            installation = products.load_installed_products_index(matlab_root)
+            if installation is None:
+                installation = products.scan_installed_products(matlab_root)
+                if installation is None:
+                    installation = products.MatlabInstallation(
+                        matlab_root, "Unknown", []
+                    )
+                else:
+                    products.save_installed_products_index(installation)
+            get_matlab_installation._cached_installation = installation
+
+        return get_matlab_installation._cached_installation
+
+
+_installation_lock = threading.Lock()
 
 
 def get_matlab_root():
@@ -77,14 +146,15 @@ def get_matlab_root():
     Returns:
         str: The root directory of MATLAB.
     """
-    import subprocess
+    import os
+    import shutil
 
-    result = subprocess.run(["which", "matlab"], capture_output=True, text=True)
-    matlab_path = result.stdout.strip()
+    # Equivalent to `readlink -f $(which matlab)`, without forking.
+    matlab_path = shutil.which("matlab")
+    if not matlab_path:
+        return ""
 
-    resolved_path = subprocess.run(
-        ["readlink", "-f", matlab_path], capture_output=True, text=True
-    ).stdout.strip()
+    resolved_path = os.path.realpath(matlab_path)
     if resolved_path.endswith("/bin/matlab"):
         resolved_path = resolved_path.replace("/bin/matlab", "")
 
@@ -97,66 +167,122 @@ def get_matlab_version():
     Returns:
         str: The version of MATLAB.
     """
-    return (
-        _call_ListInstalledProducts_script_cached(refresh=False)
-        .splitlines()[2]
-        .split(":")[1]
-        .strip()
-    )
+    return get_matlab_installation(refresh=False).matlab_version
 
 
-def get_toolboxes_available_for_install():
-    import requests
+def get_toolboxes_available_for_install(catalog_folder=None):
+    """Get the list of toolboxes available for installation in MATLAB.
 
-    # Extract the version part, e.g., "R2025a"
-    matlab_version = get_matlab_version().split(" ")[0]
-    installed_toolboxes = get_installed_toolboxes(refresh=True)
-    # Lowercased MATLAB Version
-    # Example: R2023a -> r2023a
-    matlab_version_lc = matlab_version[0].lower() + matlab_version[1:]
+    The catalog of products is cached per release, see catalog.get_product_catalog().
 
-    # URL of the file to download
-    url = f"https://raw.githubusercontent.com/mathworks-ref-arch/matlab-dockerfile/refs/heads/main/mpm-input-files/{matlab_version}/mpm_input_{matlab_version_lc}.txt"
+    Args:
+        catalog_folder (str): Pre-seeded folder of mpm input files, for air-gapped clusters.
+
+    Returns:
+        list: List of toolboxes available for installation.
+    """
+    from . import catalog
 
-    response = requests.get(url)
-    if response.status_code != 200:
+    installation = get_matlab_installation(refresh=True)
+    product_catalog = catalog.get_product_catalog(
+        installation.release, catalog_folder=catalog_folder
+    )
+    if product_catalog is None:
         return ["Error: Failed to fetch the file content."]
 
-    file_content = response.text
-
-    products = []
-    support_packages = []
-    optional_features = []
-
-    current_section = None
-
-    for line in file_content.splitlines():
-        line = line.strip()
-        if line == "## PRODUCTS":
-            current_section = "products"
-        elif line == "## SUPPORT PACKAGES":
-            current_section = "support_packages"
-        elif line == "## OPTIONAL FEATURES":
-            current_section = "optional_features"
-        elif line.startswith("#product."):
-            if current_section == "products":
-                products.append(line.replace("#product.", "").replace("_", " "))
-            elif current_section == "support_packages":
-                support_packages.append(line.replace("#product.", "").replace("_", " "))
-            elif current_section == "optional_features":
-                optional_features.append(
-                    line.replace("#product.", "").replace("_", " ")
-                )
-
-    # Filter out already installed toolboxes
+    products = product_catalog["products"]
+
+    # Filter out already installed toolboxes, membership is tested against a frozenset.
     toolboxes_available_for_install = [
-        toolbox for toolbox in products if toolbox not in installed_toolboxes
+        toolbox for toolbox in products if toolbox not in installation
     ]
 
     toolboxes_available_for_install.sort()
     return toolboxes_available_for_install
 
 
+def install_toolboxes(toolboxes, destination=None, wait=False):
+    """Install the toolboxes into MATLAB in a background job. (SupportPackages are not yet supported.)
+
+    Toolboxes which are already installed are skipped, so retrying a failed installation resumes it.
+    Toolboxes become available in MATLAB sessions started after they are installed.
+
+    Args:
+        toolboxes (list): Names of the toolboxes to install.
+        destination (str): The MATLAB root, defaults to the MATLAB on the PATH.
+        wait (bool): Whether to wait for the installation, printing its progress.
+
+    Returns:
+        installs.InstallJob: The installation job, see installs.py
+    """
+    from . import installs
+
+    if not toolboxes:
+        print("No toolboxes to install.")
+        return None
+
+    if destination is None:
+        destination = get_matlab_root()
+    print(f"Installing toolboxes: {list(toolboxes)}")
+    job = installs.start_install_job(
+        toolboxes, destination, get_matlab_installation().release
+    )
+    if wait:
+        for line in job.iter_output():
+            print(line)
+        if job.wait():
+            print("Installation completed successfully.")
+        else:
+            print(f"Error installing toolboxes: {job.error or job.products}")
+    return job
+
+
+def get_install_jobs(active_only=False):
+    """Get the toolbox installation jobs started by this process, oldest first."""
+    from . import installs
+
+    return installs.get_install_jobs(active_only=active_only)
+
+
+def wait_for_install_jobs(timeout=None, poll_interval=5):
+    """Wait until the toolbox installation jobs running on this node are done.
+
+    The jobs of the node daemon are polled when it is running, as it installs the toolboxes of
+    the sessions it starts, otherwise the jobs of this process.
+
+    Args:
+        timeout (int): Maximum seconds to wait, no limit if None.
+        poll_interval (int): Seconds between two polls of the jobs.
+
+    Returns:
+        list: The state of each job running when called, see InstallJob.to_dict() in installs.py
+    """
+    import time
+
+    from . import installs
+
+    def get_job_states():
+        handled, result = _call_node_daemon("get_install_jobs")
+        if handled and result is not None:
+            return result
+        return [job.to_dict() for job in installs.get_install_jobs()]
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    job_ids = {
+        job["job_id"]
+        for job in get_job_states()
+        if job["state"] in ("queued", "running")
+    }
+    while True:
+        jobs = [job for job in get_job_states() if job["job_id"] in job_ids]
+        if all(job["state"] in ("succeeded", "failed") for job in jobs):
+            return jobs
+        if deadline is not None and time.monotonic() >= deadline:
+            print("Toolbox installations are still running.")
+            return jobs
+        time.sleep(poll_interval)
+
+
 ################################################
 ## MATLAB Proxy Related
 ################################################
@@ -164,33 +290,24 @@ def get_toolboxes_available_for_install():
 
 def get_running_matlab_proxy_servers(username, debug=False, only_ports=True):
     """This function looks at the file system & not the process tree to find the running matlab-proxy servers."""
+    """The mwi_server.info files are indexed incrementally by the session registry, see registry.py."""
     printd = _dPrint if debug else lambda x: None
 
-    import glob
-    import os
-    import socket
-
     if username is None:
         return []
 
-    home_folder = _get_home_folder(username)
-    if not home_folder:
-        #  User does not exist, this function does not create the user.
-        return []
-
-    hostname = socket.gethostname()
-    ports_folder = home_folder + "/.matlab/MWI/hosts/" + hostname + "/ports"
-
-    # Look for files in port folders
-    search_string = str(ports_folder) + "/**/mwi_server.info"
+    handled, result = _call_node_daemon(
+        "list_sessions", username=username, debug=debug, only_ports=only_ports
+    )
+    if handled:
+        return result
 
-    search_results = sorted(glob.glob(search_string), key=os.path.getmtime)
-    running_servers = []
-    for server in search_results:
-        with open(server) as f:
-            server_info = f.read()
-            printd(str(server_info))
-            running_servers.append(str(server_info).rstrip())
+    # Standby sessions are not listed until they are handed out, see pool.py
+    sessions = get_matlab_sessions(username)
+    running_servers = [
+        session["url"] for session in sessions.values() if not session["standby"]
+    ]
+    printd(str(running_servers))
 
     # return running_servers
     if running_servers:
@@ -200,6 +317,31 @@ def get_running_matlab_proxy_servers(username, debug=False, only_ports=True):
         return []
 
 
+def get_matlab_sessions(username):
+    """Get the matlab-proxy servers running for the user on this node, ordered by start time.
+
+    Returns:
+        dict: Maps each port (str) to a dictionary with its "port", "url", "pid", "username", "start_time",
+              the live "resources" usage of its cgroup, which is None if the session has no limits,
+              & whether it is a "standby" session waiting in the warm pool.
+    """
+    from . import cgroups, pool, registry
+
+    handled, result = _call_node_daemon("get_sessions", username=username)
+    if handled:
+        return result
+
+    warm_pool = pool.get_pool()
+    sessions = {}
+    for port, session in registry.get_registry().get_sessions(username).items():
+        sessions[port] = dict(
+            session,
+            resources=cgroups.get_session_usage(port),
+            standby=warm_pool.is_standby(port),
+        )
+    return sessions
+
+
 def get_url_to_matlab(session_id, context):
     """Get the Driver Proxy URL to the MATLAB session."""
     if context.isInJob:
@@ -225,101 +367,773 @@ def start_matlab_session(
     username=None,
     configure_psp=False,
     toolboxes_to_install=None,
+    wait_until_ready=False,
+    ready_timeout=300,
+    resource_limits=None,
 ):
     """Start a MATLAB session.
 
     Args:
         configure_psp (bool): Whether to configure the MATLAB Proxy Server.
-        toolboxes_to_install (list): List of toolboxes to install.
-        debug (bool): Whether to enable debug mode.
+        toolboxes_to_install (list): List of toolboxes to install in the background, see install_toolboxes().
+        wait_until_ready (bool): Whether to wait until MATLAB is usable, see wait_for_matlab_session().
+        ready_timeout (int): Maximum seconds to wait for MATLAB to be usable.
+        resource_limits (dict): cgroup v2 limits of the session, any of "cpu_weight", "memory_max_mb"
+                                & "pids_max". See cgroups.py
+
+    A standby session of the user is handed out from the warm pool, if any, see configure_matlab_pool().
 
     Returns:
         str: The ID of the started MATLAB session.
+        dict: When wait_until_ready is True, the result of wait_for_matlab_session(), with the
+              "resource_limit_errors" explaining the limits which could not be applied.
     """
-    import os
+    from . import daemon, pool
 
     if username is None:
         print("No username provided, aborting...")
         return ""
 
+    # The session is started by the node daemon, if it is running, so that it survives kernel restarts.
+    handled, result = _call_node_daemon(
+        "start_session",
+        call_timeout=(ready_timeout if wait_until_ready else 0)
+        + daemon.DEFAULT_CALL_TIMEOUT,
+        username=username,
+        configure_psp=configure_psp,
+        toolboxes_to_install=list(toolboxes_to_install or []),
+        wait_until_ready=wait_until_ready,
+        ready_timeout=ready_timeout,
+        resource_limits=resource_limits,
+    )
+    if handled:
+        return result if result is not None else ""
+
     if configure_psp:
         print("Configuring PSP...")
         # This is a mock implementation.
     if toolboxes_to_install:
-        print(f"Installing toolboxes: {toolboxes_to_install}")
-        _call_InstallToolboxes_script(username=None, toolboxes=toolboxes_to_install)
+        # The installation runs in the background, and does not delay the session.
+        install_toolboxes(toolboxes_to_install)
 
-    home_folder = _get_home_folder(username)
-    if not home_folder:
-        print(f"User {username} does not exist, creating user...")
-        # Create the user if it does not exist
-        uid = _create_user(username)
-        print(f"User {username} created with UID: {uid}")
-        home_folder = _get_home_folder(username)
+    session = pool.get_pool().take(username, resource_limits=resource_limits)
+    if session is not None:
+        print(f"Using standby MATLAB session on port: {session['port']}")
+    else:
+        session = _launch_matlab_session(username, resource_limits=resource_limits)
+    if not wait_until_ready:
+        return str(session["port"]) if session["port"] else ""
+
+    if not session["port"]:
+        return {"port": "", "pid": None, "state": "error", "ready": False}
+    result = wait_for_matlab_session(
+        session["port"], process=session["process"], timeout=ready_timeout
+    )
+    result["resource_limit_errors"] = session["resource_limit_errors"]
+    return result
 
-    if not home_folder:
-        print("Unable to find the home folder, aborting...")
-        return ""
 
-    uid = _get_uid(username)
-    if not uid:
-        print(f"Failed to create user {username}, aborting...")
-        return ""
+def wait_for_matlab_session(
+    port, process=None, timeout=300, base_url=None, host="localhost"
+):
+    """Wait until MATLAB is usable in the matlab-proxy server running on the port.
 
-    port = _find_next_open_port()
-    if port is None:
-        print("No ports available, aborting...")
-        return ""
+    Polls the status endpoint of matlab-proxy with exponential backoff, using the pooled
+    HTTP client in http_client.py. Waiting stops early if MATLAB needs to be licensed in the browser, or
+    if the matlab-proxy server reports an error or exits.
 
-    env_vars = os.environ
-    env_vars["HOME"] = home_folder
-    env_vars["USER"] = username
-    env_vars["MWI_APP_PORT"] = str(port)
-    print(f"Starting MATLAB session as user: {username} & uid: {uid}")
-    # Run the command as the specified user
-    run_as_user(command=["matlab-proxy-app"], uid=uid, env=env_vars)
-    print(f"Started matlab-proxy-app on port: {port}")
+    Args:
+        port (int): Port of the matlab-proxy server.
+        process (subprocess.Popen): The matlab-proxy-app process, if known.
+        timeout (int): Maximum seconds to wait.
+        base_url (str): MWI_BASE_URL of the server, defaults to MWI_BASE_URL of this process.
+        host (str): Host running the matlab-proxy server.
 
-    return str(port)
+    Returns:
+        dict: "port", "pid", "ready", "time_to_ready" in seconds & the final "state", which is one of
+              "up", "starting", "down", "unlicensed", "error", "exited" or "unreachable".
+    """
+    import os
+    import time
+
+    if base_url is None:
+        base_url = os.environ.get("MWI_BASE_URL", "")
+    status_url = f"http://{host}:{port}{base_url.rstrip('/')}/get_status"
+
+    result = {
+        "port": str(port),
+        "pid": process.pid if process is not None else None,
+        "ready": False,
+        "time_to_ready": None,
+        "state": "unreachable",
+    }
+    start_time = time.monotonic()
+    delay = 0.5
+    while True:
+        if process is not None and process.poll() is not None:
+            result["state"] = "exited"
+            break
+
+        result["state"] = _get_matlab_status(status_url)
+        if result["state"] == "up":
+            result["ready"] = True
+            result["time_to_ready"] = time.monotonic() - start_time
+            break
+        if result["state"] in ("unlicensed", "error"):
+            break
+
+        remaining_time = timeout - (time.monotonic() - start_time)
+        if remaining_time <= 0:
+            break
+        time.sleep(min(delay, remaining_time))
+        delay = min(delay * 1.5, 5)
+
+    if result["ready"]:
+        print(f"MATLAB is ready on port {port} after {result['time_to_ready']:.1f}s")
+    else:
+        print(f"MATLAB is not ready on port {port}, state: {result['state']}")
+    return result
+
+
+async def wait_for_matlab_session_async(
+    port, process=None, timeout=300, base_url=None, host="localhost"
+):
+    """Asynchronous variant of wait_for_matlab_session(), which does not block the event loop."""
+    import asyncio
+
+    return await asyncio.to_thread(
+        wait_for_matlab_session,
+        port,
+        process=process,
+        timeout=timeout,
+        base_url=base_url,
+        host=host,
+    )
+
+
+def start_matlab_sessions(
+    usernames,
+    max_parallel=8,
+    memory_per_session_mb=4096,
+    configure_psp=False,
+    toolboxes_to_install=None,
+    resource_limits=None,
+):
+    """Start a MATLAB session for each of the users, Example: for a training class.
+
+    Users are created, ports are reserved and matlab-proxy-app is launched using a
+    bounded pool of worker threads. Launches are throttled so that the sessions fit in
+    the memory available on the node, users beyond that are not started.
+
+    Args:
+        usernames (list): List of usernames, a session is started for each unique user.
+        max_parallel (int): Maximum number of sessions launched in parallel.
+        memory_per_session_mb (int): Memory headroom required by each MATLAB session.
+        configure_psp (bool): Whether to configure the MATLAB Proxy Server.
+        toolboxes_to_install (list): List of toolboxes to install once, in the background.
+        resource_limits (dict): cgroup v2 limits of each session, see start_matlab_session().
+
+    Returns:
+        dict: Maps each username to a dictionary with its "port", "uid", "error", "timings" &
+              "resource_limit_errors".
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    import time
+
+    from . import daemon, pool, users
+
+    usernames = list(dict.fromkeys(username for username in usernames if username))
+    if not usernames:
+        print("No usernames provided, aborting...")
+        return {}
+
+    # The sessions are started by the node daemon, if it is running, from its warm pool.
+    handled, result = _call_node_daemon(
+        "start_sessions",
+        call_timeout=daemon.DEFAULT_CALL_TIMEOUT + 10 * len(usernames),
+        usernames=usernames,
+        max_parallel=max_parallel,
+        memory_per_session_mb=memory_per_session_mb,
+        configure_psp=configure_psp,
+        toolboxes_to_install=list(toolboxes_to_install or []),
+        resource_limits=resource_limits,
+    )
+    if handled:
+        return result if result is not None else {}
+
+    if configure_psp:
+        print("Configuring PSP...")
+        # This is a mock implementation.
+    if toolboxes_to_install:
+        # The installation runs in the background, and does not delay the session.
+        install_toolboxes(toolboxes_to_install)
+
+    # Create the missing users in one batch, instead of one at a time in the workers.
+    users.create_users(
+        [username for username in usernames if not _query_system_for_user(username)]
+    )
+
+    # Sessions take a while to allocate their memory, so the headroom is measured once
+    # and each admitted session is deducted from it.
+    memory_lock = threading.Lock()
+    memory_headroom = {"available_mb": _get_available_memory_mb()}
+
+    def admit():
+        with memory_lock:
+            if memory_headroom["available_mb"] is None:
+                return True
+            if memory_headroom["available_mb"] < memory_per_session_mb:
+                return False
+            memory_headroom["available_mb"] -= memory_per_session_mb
+            return True
+
+    def launch(username):
+        def log(msg):
+            print(f"[{username}] {msg}")
+
+        start_time = time.perf_counter()
+        standby_session = pool.get_pool().take(
+            username, resource_limits=resource_limits
+        )
+        if standby_session is not None:
+            log(f"Using standby MATLAB session on port: {standby_session['port']}")
+            return {
+                "username": username,
+                "port": standby_session["port"],
+                "uid": standby_session["uid"],
+                "process": standby_session["process"],
+                "error": None,
+                "timings": {"total": time.perf_counter() - start_time},
+                "resource_limit_errors": standby_session["resource_limit_errors"],
+            }
+        return _launch_matlab_session(
+            username, admit=admit, log=log, resource_limits=resource_limits
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, max_parallel)) as executor:
+        sessions = list(executor.map(launch, usernames))
+
+    results = {}
+    for session in sessions:
+        session.pop("process", None)
+        results[session.pop("username")] = session
+
+    num_started = sum(1 for session in sessions if session["port"])
+    print(f"Started {num_started} of {len(usernames)} MATLAB sessions.")
+    return results
 
 
 def stop_matlab_session(username, port, context=None):
     """Stop a MATLAB session running for the specified user and port."""
-    if context and context.isInJob:
-        print("Running inside a job, aborting...")
-        return False
+    """See stop_matlab_sessions(). Returns True if the session has stopped."""
     if port is None:
         print("No port provided, aborting...")
         return False
+
+    results = stop_matlab_sessions(username, ports=[port], context=context)
+    return bool(results) and results[str(port)]["stopped"]
+
+
+def stop_matlab_sessions(
+    username, ports=None, context=None, grace_period=30, kill_timeout=10
+):
+    """Stop MATLAB sessions running for the specified user, in parallel.
+
+    A shutdown request is sent to all the sessions concurrently, and their processes are
+    given grace_period seconds to exit. Process groups which are still running are then sent
+    SIGTERM, followed by SIGKILL after kill_timeout seconds.
+
+    Args:
+        username (str): The user running the sessions.
+        ports (list): Ports of the sessions to stop, all sessions of the user if None.
+        context: The Databricks context.
+        grace_period (int): Seconds to wait for the sessions to shut down gracefully.
+        kill_timeout (int): Seconds to wait after SIGTERM before sending SIGKILL.
+
+    Returns:
+        dict: Maps each port to a dictionary with "stopped", the "method" which stopped it
+              ("shutdown", "SIGTERM" or "SIGKILL"), "memory_reclaimed_mb" & "error".
+    """
+    import os
+    import signal
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    from . import cgroups, daemon, http_client, procfs
+
+    if context and context.isInJob:
+        print("Running inside a job, aborting...")
+        return {}
     if username is None:
         print("No username provided, aborting...")
-        return False
+        return {}
+
+    handled, result = _call_node_daemon(
+        "stop_sessions",
+        call_timeout=grace_period + kill_timeout + daemon.DEFAULT_CALL_TIMEOUT,
+        username=username,
+        ports=None if ports is None else [str(port) for port in ports],
+        grace_period=grace_period,
+        kill_timeout=kill_timeout,
+    )
+    if handled:
+        return result if result is not None else {}
 
-    server = get_running_matlab_proxy_servers(username=username, only_ports=False)
-    # Get the server URL for the given port
-    if server is None:
-        print(f"No servers found for {username}, aborting...")
-        return False
-    server_url = server[str(port)]
+    sessions = get_matlab_sessions(username)
+    if ports is None:
+        # Standby sessions are stopped by the warm pool, see configure_matlab_pool().
+        ports = [port for port, session in sessions.items() if not session["standby"]]
+    else:
+        ports = [str(port) for port in ports]
+    process_table = procfs.read_process_table()
+
+    results = {}
+    sessions_to_stop = {}
+    for port in ports:
+        results[port] = {
+            "stopped": False,
+            "method": None,
+            "memory_reclaimed_mb": 0,
+            "error": None,
+        }
+        session = sessions.get(port)
+        if session is None:
+            results[port]["error"] = "No server found for the given port"
+            print(f"No server found for port {port}, skipping...")
+            continue
+        pids = procfs.get_process_tree(process_table, session["pid"])
+        sessions_to_stop[port] = {
+            "url": session["url"],
+            "info_file": session["info_file"],
+            "pids": pids,
+            "rss_bytes": sum(process_table[pid]["rss_bytes"] for pid in pids),
+        }
+
+    def shutdown(port):
+        # Send a DELETE request to the SHUTDOWN_INTEGRATION endpoint
+        shutdown_url = sessions_to_stop[port]["url"] + "/shutdown_integration"
+        print(f"Stopping MATLAB session with ID: {port}")
+        send_http_request(shutdown_url, method="DELETE")
+
+    with ThreadPoolExecutor(
+        max_workers=http_client.MAX_CONCURRENT_REQUESTS
+    ) as executor:
+        list(executor.map(shutdown, sessions_to_stop))
+
+    def is_stopped(port):
+        pids = sessions_to_stop[port]["pids"]
+        if pids:
+            return not any(procfs.is_running(pid) for pid in pids)
+        # The PID is unknown, the server removes its port folder when it exits.
+        return port not in get_matlab_sessions(username)
+
+    def wait_for_exit(pending_ports, method, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            for port in list(pending_ports):
+                if is_stopped(port):
+                    pending_ports.remove(port)
+                    results[port]["stopped"] = True
+                    results[port]["method"] = method
+            if not pending_ports or time.monotonic() >= deadline:
+                return pending_ports
+            time.sleep(0.5)
+
+    pending_ports = wait_for_exit(list(sessions_to_stop), "shutdown", grace_period)
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        if not pending_ports:
+            break
+        for port in pending_ports:
+            print(f"MATLAB session {port} did not exit, sending {sig.name}...")
+            _signal_process_tree(sessions_to_stop[port]["pids"], sig)
+        pending_ports = wait_for_exit(
+            [port for port in pending_ports if sessions_to_stop[port]["pids"]],
+            sig.name,
+            kill_timeout,
+        )
 
-    # Find the URL to the session
-    if server_url is None:
-        print("No server found for the given port, aborting...")
-        return False
+    for port, session in sessions_to_stop.items():
+        if results[port]["stopped"]:
+            cgroups.remove_session_cgroup(port)
+        if results[port]["method"] == "SIGKILL":
+            # The server could not clean up after itself, remove its stale server info.
+            try:
+                os.remove(session["info_file"])
+            except OSError:
+                pass
+        if results[port]["stopped"]:
+            results[port]["memory_reclaimed_mb"] = session["rss_bytes"] // (1024 * 1024)
+            print(
+                f"Stopped MATLAB session {port}, reclaimed {results[port]['memory_reclaimed_mb']} MB"
+            )
+        else:
+            results[port]["error"] = "The session did not exit"
+            print(f"Failed to stop MATLAB session {port}")
+
+    return results
+
+
+def configure_matlab_pool(size, usernames, resource_limits=None, ready_timeout=300):
+    """Keep size standby MATLAB sessions running for each of the users, to be handed out immediately.
+
+    The pool refills itself in the background after each handout. A size of 0 disables the pool
+    and stops the standby sessions. See pool.py
+
+    Args:
+        size (int): Number of standby sessions for each user.
+        usernames (list): Users expected to start sessions, Example: the students of a class.
+        resource_limits (dict): cgroup v2 limits of the standby sessions, see start_matlab_session().
+        ready_timeout (int): Maximum seconds to wait for a standby session to be ready.
+    """
+    from . import daemon, pool, users
+
+    usernames = list(dict.fromkeys(username for username in usernames if username))
+
+    # The pool of the node daemon, if it is running, hands out the sessions it starts.
+    handled, _ = _call_node_daemon(
+        "configure_pool",
+        call_timeout=daemon.DEFAULT_CALL_TIMEOUT + 10 * len(usernames),
+        size=size,
+        usernames=usernames,
+        resource_limits=resource_limits,
+        ready_timeout=ready_timeout,
+    )
+    if handled:
+        return
+
+    if size and usernames:
+        # Create the missing users in one batch, instead of one at a time in the refills.
+        users.create_users(
+            [username for username in usernames if not _query_system_for_user(username)]
+        )
+    pool.get_pool().configure(
+        size, usernames, resource_limits=resource_limits, ready_timeout=ready_timeout
+    )
+
+
+def get_matlab_pool_stats():
+    """Get the hit rate & refill times of the warm pool, see WarmPool.get_stats() in pool.py"""
+    """The pool of the node daemon is used if the daemon is running."""
+    from . import pool
+
+    handled, result = _call_node_daemon("get_pool_stats")
+    if handled:
+        return result
+    return pool.get_pool().get_stats()
+
+
+def reap_idle_matlab_sessions(idle_timeout=3600, dry_run=True, usernames=None):
+    """Stop the MATLAB sessions which have been idle for longer than idle_timeout seconds.
+
+    Activity is measured between scans, so sessions seen for the first time are considered
+    active. See reaper.py
+
+    Args:
+        idle_timeout (int): Seconds after which an idle session is stopped.
+        dry_run (bool): Whether to only report what would be stopped & reclaimed.
+        usernames (list): Users whose sessions are scanned, the users with a ports folder on this
+                          node if None.
+
+    Returns:
+        dict: The report of the scan, see IdleReaper.scan() in reaper.py
+    """
+    from . import reaper
+
+    idle_reaper = reaper.get_reaper()
+    idle_reaper.idle_timeout = idle_timeout
+    report = idle_reaper.scan(usernames=usernames, dry_run=dry_run)
+    if dry_run:
+        print(
+            f"{report['memory_reclaimable_mb']} MB can be reclaimed from idle sessions."
+        )
+    else:
+        print(f"Reclaimed {report['memory_reclaimed_mb']} MB from idle sessions.")
+    return report
+
+
+def start_idle_reaper(idle_timeout=3600, interval=300, usernames=None):
+    """Stop MATLAB sessions idle for longer than idle_timeout seconds, checking every interval seconds."""
+    from . import reaper
+
+    idle_reaper = reaper.get_reaper()
+    idle_reaper.idle_timeout = idle_timeout
+    idle_reaper.start(interval=interval, usernames=usernames)
+
+
+def stop_idle_reaper():
+    """Stop the background reaper started by start_idle_reaper()."""
+    from . import reaper
+
+    reaper.get_reaper().stop()
+
+
+def get_matlab_session_metrics(usernames=None):
+    """Get the RSS, CPU seconds, threads & uptime of the process tree of each MATLAB session."""
+    """See collect_session_metrics() in metrics.py"""
+    from . import metrics
 
-    # Send a DELETE request to the SHUTDOWN_INTEGRATION endpoint
-    shutdown_url = server_url + "/shutdown_integration"
-    print(f"Stopping MATLAB session with ID: {port}")
-    print(f"Sending shutdown request to URL: {shutdown_url}")
+    return metrics.collect_session_metrics(usernames)
 
-    send_http_request(shutdown_url, method="DELETE")
 
-    # Send the shutdown request using OS.KILL (Not a good idea, as clean up is not guaranteed.)
+def start_metrics_server(port=9464, host="127.0.0.1", usernames=None):
+    """Serve the metrics of the MATLAB sessions to Prometheus at http://<host>:<port>/metrics"""
+    from . import metrics
+
+    server_port = metrics.start_metrics_server(
+        port=port, host=host, usernames=usernames
+    )
+    if server_port:
+        print(f"Serving MATLAB session metrics at http://{host}:{server_port}/metrics")
+    return server_port
+
+
+def stop_metrics_server():
+    """Stop the server started by start_metrics_server()."""
+    from . import metrics
+
+    metrics.stop_metrics_server()
+
+
+def start_node_daemon():
+    """Start the node daemon, which owns the MATLAB sessions & serves the session APIs.
+
+    Once it is running, the session APIs are served by the daemon, and the sessions it starts
+    survive kernel restarts. See daemon.py
+
+    Returns:
+        bool: True if the daemon is running.
+    """
+    from . import daemon
+
+    is_running = daemon.start_daemon()
+    if is_running:
+        print(f"Node daemon is running on {daemon.get_socket_path()}")
+    return is_running
+
+
+def stop_node_daemon():
+    """Stop the node daemon. The MATLAB sessions it started keep running."""
+    from . import daemon
+
+    daemon.stop_daemon()
+
+
+def get_node_daemon_status():
+    """Get the "pid", "uptime_seconds" & warm "pool" statistics of the node daemon, or None if it is not running."""
+    handled, result = _call_node_daemon("status")
+    return result if handled else None
+
+
+def get_cluster_node_loads(agents=None):
+    """Get the load of each node of the cluster, reported by its node agent. See placement.py
+
+    Returns:
+        list: A dictionary for each node, with its "agent", "reachable", "hostname", "cpu_count",
+              "load_average", "memory_available_mb" & "num_sessions".
+    """
+    from . import placement
+
+    return placement.collect_node_loads(agents)
+
+
+def start_matlab_session_on_cluster(
+    username=None,
+    agents=None,
+    context=None,
+    memory_per_session_mb=4096,
+    **session_options,
+):
+    """Start a MATLAB session on the least loaded node of the cluster.
+
+    Sessions on the workers are reached through a tunnel from the driver. See placement.py
+
+    Args:
+        username (str): The user running the session.
+        agents (list): Addresses of the node agents, MWHELPERS_NODE_AGENTS & this node if None.
+        context: The Databricks context, used to build the URL of the session.
+        memory_per_session_mb (int): Memory headroom required by the MATLAB session.
+        session_options: Keyword arguments of start_matlab_session().
+
+    Returns:
+        dict: The "session_id" to connect to, the "url" of the session, the "hostname" & "agent"
+              of the node, the "port" of the session on the node & the port of its "tunnel" on
+              this node, if any. None if it did not start.
+    """
+    from . import placement
+
+    if username is None:
+        print("No username provided, aborting...")
+        return None
+
+    session = placement.start_session(
+        username,
+        agents=agents,
+        memory_per_session_mb=memory_per_session_mb,
+        **session_options,
+    )
+    if session is None:
+        return None
+    session["username"] = username
+    session["url"] = (
+        get_url_to_matlab(session["session_id"], context) if context else None
+    )
+    print(f"Started MATLAB session {session['port']} on {session['hostname']}")
+    return session
+
+
+def stop_matlab_session_on_cluster(session, context=None):
+    """Stop a MATLAB session started by start_matlab_session_on_cluster(), and close its tunnel."""
+    from . import placement
+
+    if context and context.isInJob:
+        print("Running inside a job, aborting...")
+        return {}
+    return placement.stop_session(session, username=session["username"])
+
+
+################################################
+## MATLAB Engine Related APIs
+################################################
+def map_matlab(
+    df,
+    function,
+    columns=None,
+    output_schema="result double",
+    batch_rows=10000,
+    backend=None,
+):
+    """Run a MATLAB function over the rows of a Spark DataFrame, in batches, on the executors.
+
+    Each executor reuses one MATLAB Engine. See spark.py
+
+    Args:
+        df (pyspark.sql.DataFrame): The input rows.
+        function (str): Name of the MATLAB function, called with a column vector per column.
+        columns (list): Columns passed to the function, all columns if None.
+        output_schema: Schema of the output rows, as a DDL string or a StructType.
+        batch_rows (int): Rows passed to the function in each call.
+        backend: Backend starting the engines, or its name, Example: "fake". See engines.py
+
+    Returns:
+        pyspark.sql.DataFrame: The rows returned by the function, computed lazily.
+    """
+    from . import spark
+
+    return spark.map_matlab(
+        df,
+        function,
+        columns=columns,
+        output_schema=output_schema,
+        batch_rows=batch_rows,
+        backend=backend,
+    )
+
+
+def configure_matlab_engine_pool(size, backend=None, idle_timeout=1800):
+    """Keep size started MATLAB Engines idle, which are handed out by matlab_engine().
+
+    Args:
+        size (int): Number of idle engines, 0 disables the pool.
+        backend: Backend starting the engines, or its name, Example: "fake". See engines.py
+        idle_timeout (int): Seconds after which an idle engine is stopped.
+    """
+    from . import engine_pool
+
+    engine_pool.get_engine_pool().configure(
+        size, backend=backend, idle_timeout=idle_timeout
+    )
+
+
+def matlab_engine():
+    """Borrow a MATLAB Engine from the engine pool, for the duration of a with statement.
+
+    The workspace of the engine is cleared when it is returned. See engine_pool.py
+    Example: `with mwi.matlab_engine() as engine: engine.sqrt(4.0)`
+    """
+    from . import engine_pool
+
+    return engine_pool.get_engine_pool().borrow()
+
+
+def attach_shared_matlab_engines():
+    """Add the engines shared by running MATLAB sessions, with matlab.engine.shareEngine, to the engine pool.
+
+    Shared engines are the live sessions of users: their workspace is not cleared between
+    borrowers, and the pool only disconnects from them.
+
+    Returns:
+        list: Names of the attached engines.
+    """
+    from . import engine_pool
+
+    return engine_pool.get_engine_pool().attach_shared_engines()
+
+
+def get_matlab_engine_pool_stats():
+    """Get the hits, misses & startup times of the engine pool. See engine_pool.py"""
+    from . import engine_pool
+
+    return engine_pool.get_engine_pool().get_stats()
+
+
+def call_matlab_function(function, columns, nargout=1):
+    """Call a MATLAB function with a column vector for each column, on an engine of the engine pool.
+
+    Numeric & logical columns are passed through shared memory, instead of being converted
+    element by element. See exchange.py
+
+    Args:
+        function (str): Name of the MATLAB function.
+        columns (list): 1-D NumPy arrays, Example: the columns of a pandas DataFrame.
+        nargout (int): Number of columns returned by the function.
+
+    Returns:
+        list: A 1-D NumPy array for each column returned by the function.
+    """
+    from . import engine_pool
+
+    pool = engine_pool.get_engine_pool()
+    with pool.borrow() as engine:
+        return pool.backend.call_function(engine, function, columns, nargout=nargout)
 
 
 ################################################
 ## Helper Functions
 ################################################
+
+
+def _call_node_daemon(method, call_timeout=None, **params):
+    """Call the method in the node daemon, if it is running."""
+    """Returns (True, result), or (False, None) if the call should run in this process instead.
+    When the daemon does not answer in time, a lookup runs in this process instead, while a call
+    which may still be running in the daemon, Example: start_session, returns (True, None)."""
+    from . import daemon
+
+    client = daemon.get_client()
+    if client is None:
+        return False, None
+    try:
+        return True, client.call(method, timeout=call_timeout, **params)
+    except TimeoutError:
+        print(f"Node daemon did not answer the call to {method} in time")
+        if method in (
+            "list_sessions",
+            "get_sessions",
+            "status",
+            "get_install_jobs",
+            "get_pool_stats",
+        ):
+            return False, None
+        return True, None
+    except OSError:
+        # The daemon is not running, Example: a stale socket after a crash.
+        return False, None
+    except daemon.DaemonError as e:
+        print(f"Node daemon failed to {method.replace('_', ' ')}: {e}")
+        return False, None
+
+
 def _dPrint(msg: str):
     import inspect
 
@@ -329,54 +1143,194 @@ def _dPrint(msg: str):
 
 def _query_system_for_user(username):
     """Query the system for the user in the Name Service Switch Library PASSWD."""
-    "Returns empty string if the user is not found."
-    import subprocess
-
-    if username is None:
-        return ""
-
-    getent_result = subprocess.run(
-        ["getent", "passwd", username], capture_output=True, text=True
-    )
-    if getent_result.returncode != 0:
-        return ""
+    """Returns None if the user is not found. Lookups are cached, see users.py."""
+    from . import users
 
-    return getent_result
+    return users.get_user_info(username)
 
 
 def _get_home_folder(username):
     """Get the home folder for the provided username, if user exists."""
-    getent_result = _query_system_for_user(username)
-    if getent_result:
-        home_folder = getent_result.stdout.strip().split(":")[5]
-        return home_folder
+    user_info = _query_system_for_user(username)
+    if user_info:
+        return user_info["home_folder"]
     return ""
 
 
 def _get_uid(username):
     """Get the UID of the user."""
-    getent_result = _query_system_for_user(username)
-    if getent_result:
-        uid = int(getent_result.stdout.strip().split(":")[2])
-        return uid
+    user_info = _query_system_for_user(username)
+    if user_info:
+        return user_info["uid"]
     return None
 
 
 def _create_user(username):
     """Create a user with the given username."""
     """ If the user already exists, it returns the UID of the user."""
+    from . import users
+
     if username is None:
         return ""
 
-    create_user_result = _call_CreateUser_script(username)
-    if create_user_result:
+    create_user_result = users.create_users([username])[username]
+    if create_user_result["uid"] is not None and not create_user_result["error"]:
         # Return the UID
-        return create_user_result.splitlines()[1].split(":")[1].strip()
+        return create_user_result["uid"]
     else:
-        print(f"Failed to create user: {username}")
+        print(f"Failed to create user: {username}, {create_user_result['error']}")
         return ""
 
 
+def _launch_matlab_session(username, admit=None, log=print, resource_limits=None):
+    """Create the user if required, reserve a port & launch matlab-proxy-app as the user."""
+    """Returns a dictionary with the "username", "port", "uid", "process", "error", "timings" &
+    "resource_limit_errors" of the session. The port is None if the session could not be started. The optional
+    admit function is called before launching, and the launch is skipped if it returns False.
+    The session is placed in a cgroup with the resource limits, if any are provided.
+    """
+    import os
+    import time
+
+    from . import cgroups, daemon, registry
+
+    session = {
+        "username": username,
+        "port": None,
+        "uid": None,
+        "process": None,
+        "error": None,
+        "timings": {},
+        "resource_limit_errors": [],
+    }
+    start_time = time.perf_counter()
+
+    def fail(error):
+        log(error)
+        session["error"] = error
+        session["timings"]["total"] = time.perf_counter() - start_time
+        return session
+
+    user_info = _query_system_for_user(username)
+    if not user_info:
+        log(f"User {username} does not exist, creating user...")
+        # Create the user if it does not exist
+        uid = _create_user(username)
+        log(f"User {username} created with UID: {uid}")
+        user_info = _query_system_for_user(username)
+    session["timings"]["user"] = time.perf_counter() - start_time
+
+    if not user_info or not user_info["home_folder"]:
+        return fail("Unable to find the home folder, aborting...")
+    home_folder = user_info["home_folder"]
+
+    uid = user_info["uid"]
+    if not uid:
+        return fail(f"Failed to create user {username}, aborting...")
+    session["uid"] = uid
+
+    if admit is not None and not admit():
+        return fail("Not enough memory available for another session, aborting...")
+
+    port_start_time = time.perf_counter()
+    port = _find_next_open_port()
+    session["timings"]["port"] = time.perf_counter() - port_start_time
+    if port is None:
+        return fail("No ports available, aborting...")
+
+    # Copy the environment, as it is different for each user.
+    env_vars = dict(os.environ)
+    env_vars["HOME"] = home_folder
+    env_vars["USER"] = username
+    env_vars["MWI_APP_PORT"] = str(port)
+    cgroup = None
+    if resource_limits:
+        cgroup, session["resource_limit_errors"] = cgroups.create_session_cgroup(
+            port, resource_limits
+        )
+        for error in session["resource_limit_errors"]:
+            log(f"Resource limits are not fully applied: {error}")
+
+    log(f"Starting MATLAB session as user: {username} & uid: {uid}")
+    launch_start_time = time.perf_counter()
+    try:
+        # Run the command as the specified user
+        session["process"] = run_as_user(
+            command=["matlab-proxy-app"], uid=uid, env=env_vars, cgroup=cgroup
+        )
+    except OSError as e:
+        return fail(f"Failed to start matlab-proxy-app: {e}")
+    registry.get_registry().record_launch(
+        port, session["process"].pid, username=username
+    )
+    daemon.track_process(session["process"])
+    session["timings"]["launch"] = time.perf_counter() - launch_start_time
+    log(f"Started matlab-proxy-app on port: {port}")
+
+    session["port"] = port
+    session["timings"]["total"] = time.perf_counter() - start_time
+    return session
+
+
+def _get_matlab_status(status_url):
+    """Returns the state of MATLAB reported by the status endpoint of matlab-proxy."""
+    """Sample Response: {"matlab": {"status": "up", "version": "R2025a"}, "licensing": {...}, "error": null}"""
+    response = send_http_request(status_url, method="GET", timeout=(2, 5), quiet=True)
+    try:
+        status = response.json() if response and response.status_code == 200 else None
+    except ValueError:
+        status = None
+    if not isinstance(status, dict):
+        return "unreachable"
+
+    matlab_status = (status.get("matlab") or {}).get("status", "down")
+    if matlab_status == "up":
+        return "up"
+    if status.get("error"):
+        return "error"
+    if matlab_status == "down" and not status.get("licensing"):
+        # MATLAB is only started by matlab-proxy once licensing is configured in the browser.
+        return "unlicensed"
+    return matlab_status
+
+
+def _signal_process_tree(pids, sig):
+    """Send the signal to the process group of the session, or to each of its processes."""
+    """The first pid is the matlab-proxy-app process, which leads its own process group."""
+    import os
+
+    if not pids:
+        return
+    try:
+        pgid = os.getpgid(pids[0])
+        if pgid == pids[0] and pgid != os.getpgid(0):
+            os.killpg(pgid, sig)
+            return
+    except ProcessLookupError:
+        pass
+    except PermissionError as e:
+        print(f"Failed to send {sig.name}: {e}")
+        return
+
+    for pid in pids:
+        try:
+            os.kill(pid, sig)
+        except (ProcessLookupError, PermissionError):
+            continue
+
+
+def _get_available_memory_mb():
+    """Returns MemAvailable from /proc/meminfo in MB, or None if it cannot be read."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
 def _parse_matlab_proxy_servers(server_list, debug=False) -> dict:
     """Returns a dictionary of server ports and their URLs."""
     printd = _dPrint if debug else lambda x: None
@@ -396,141 +1350,61 @@ def _parse_matlab_proxy_servers(server_list, debug=False) -> dict:
     return parsed_servers
 
 
-def _call_ListInstalledProducts_script():
-    """Call the ListInstalledProducts.sh script to get the list of installed products."""
-    """This function is used to get the list of installed products in MATLAB, excluding Support Packages."""
-    """ Sample Output:
-        ----------------------
-        MATLAB Root: /opt/matlab/R2025a
-        MATLAB Version: R2025a Update 1 (25.1.0.2973910)
-        ----------------------
-        MATLAB
-        Simulink
-    """
-    import subprocess
-    import os
-
-    script_path = os.path.join(
-        os.path.dirname(__file__), "scripts", "ListInstalledProducts.sh"
-    )
-    result = subprocess.run(
-        [
-            script_path,
-            "-r",
-            get_matlab_root(),
-        ],
-        capture_output=True,
-        text=True,
-    )
-    script_output = result.stdout
-    return script_output
-
-
-def _call_ListInstalledProducts_script_cached(refresh):
-    """Listing all products can be time consuming, so we cache the output."""
-    if not hasattr(_call_ListInstalledProducts_script, "_cached_output") or refresh:
-        _call_ListInstalledProducts_script._cached_output = (
-            _call_ListInstalledProducts_script()
-        )
-
-    return _call_ListInstalledProducts_script._cached_output
-
-
-def send_http_request(url, method="GET", data=None):
+def send_http_request(url, method="GET", data=None, timeout=None, quiet=False):
     """Send an HTTP request to the specified URL."""
+    """Requests use the pooled HTTP client, see http_client.py. Returns None if the request failed."""
     import requests
 
-    try:
-        if method == "GET":
-            response = requests.get(url)
-        elif method == "POST":
-            response = requests.post(url, data=data)
-        elif method == "DELETE":
-            response = requests.delete(url)
-        else:
-            raise ValueError("Unsupported HTTP method: {}".format(method))
-
-        return response
-    except requests.exceptions.RequestException as e:
-        print(f"HTTP request failed: {e}")
-        return None
-
-
-def _call_InstallToolboxes_script(username=None, destination=None, toolboxes=None):
-    """Installs provided toolboxes. (SupportPackages are not yet supported.)"""
-    import subprocess
-    import os
-
-    if username is None:
-        print("Installing as root user")
-
-    if destination is None:
-        destination = get_matlab_root()
+    from . import http_client
 
-    if toolboxes is None:
-        print("No toolboxes to install.")
-        return 0
-    else:
-        print(f"Installing toolboxes: {toolboxes}")
-        # Convert the list of toolboxes to a space separated string, where each toolbox name is _ separated.
-        products = " ".join(product.replace(" ", "_") for product in toolboxes)
+    if method not in ("GET", "POST", "DELETE"):
+        raise ValueError("Unsupported HTTP method: {}".format(method))
 
-    script_path = os.path.join(
-        os.path.dirname(__file__), "scripts", "InstallProducts.sh"
-    )
-    print("Installation has begun...")
-    result = subprocess.run(
-        [
-            script_path,
-            "--destination",
-            destination,
-            "--release",
-            get_matlab_version().split(" ")[0],
-            "--products",
-            products,
-        ],
-        capture_output=True,
-        text=True,
-    )
-    if result.returncode != 0:
-        print(f"Error installing toolboxes: {result.stderr}")
+    try:
+        return http_client.request(
+            method, url, data=data, timeout=timeout or http_client.DEFAULT_TIMEOUT
+        )
+    except requests.exceptions.RequestException as e:
+        if not quiet:
+            print(f"HTTP request failed: {e}")
         return None
-    print("Installation completed successfully.")
-    script_output = result.stdout
-    return script_output
-
 
-def _call_CreateUser_script(username=None):
-    """Creates a user with the given username."""
-    import subprocess
-    import os
 
-    if username is None:
-        return None
+async def send_http_request_async(url, method="GET", data=None, timeout=None):
+    """Asynchronous variant of send_http_request(), to query many servers in parallel."""
+    import asyncio
 
-    script_path = os.path.join(os.path.dirname(__file__), "scripts", "CreateUser.sh")
-    result = subprocess.run(
-        [
-            script_path,
-            "-u",
-            username,
-        ],
-        capture_output=True,
-        text=True,
+    return await asyncio.to_thread(
+        send_http_request, url, method=method, data=data, timeout=timeout
     )
-    script_output = result.stdout
-    return script_output
 
 
-def run_as_user(uid, command=None, env=None):
+def run_as_user(uid, command=None, env=None, cgroup=None):
     """Run a command as a specific user."""
-    import os
+    """The process is moved into the cgroup, if provided, by this process right after it is spawned."""
+    import pwd
     import subprocess
 
-    def demote():
-        os.setuid(uid)
-
-    process = subprocess.Popen(command, env=env, preexec_fn=demote)
+    from . import cgroups
+
+    gid = pwd.getpwuid(uid).pw_gid
+    # Privileges are dropped by Popen itself, as a preexec_fn is unsafe in a threaded process.
+    # Each process leads its own process group, so that it can be signalled as a whole.
+    process = subprocess.Popen(
+        command,
+        env=env,
+        user=uid,
+        group=gid,
+        extra_groups=[],
+        start_new_session=True,
+    )
+    if cgroup:
+        # matlab-proxy-app only starts MATLAB once its server is up, so MATLAB inherits the cgroup.
+        try:
+            cgroups.move_to_cgroup(cgroup, pid=process.pid)
+        except OSError as e:
+            # Run without limits, rather than failing to start.
+            print(f"Unable to move process {process.pid} into {cgroup}: {e}")
     return process
 
 
@@ -559,16 +1433,8 @@ def get_output_of_script_as_user(uid, command=None, env=None):
 def _find_next_open_port(
     *, host="0.0.0.0", start_port: int = 3000, end_port: int = 9999
 ):
-    """Find the next open port in the specified range."""
+    """Find and reserve the next open port in the specified range."""
     """Databricks only proxies ports in the range 3000-9999."""
-    import socket
+    from . import ports
 
-    for port in range(start_port, end_port + 1):
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(1)  # Set a timeout for the connection attempt
-        result = sock.connect_ex((host, port))
-        if result != 0:  # 0 means the port is open
-            sock.close()
-            return port
-
-    return None
+    return ports.reserve_port(host=host, start_port=start_port, end_port=end_port)
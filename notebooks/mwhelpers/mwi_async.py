@@ -0,0 +1,112 @@
+# Copyright 2025 The MathWorks, Inc.
+## This module hosts the asynchronous facade over the APIs in mwi, used by the Control Panel.
+
+# Building the Control Panel requires the MATLAB root, the installed & available toolboxes, the
+# cluster name & the running sessions. Each lookup can take seconds (a scan of the MATLAB root,
+# a fetch of the product catalog, a call to the Databricks REST API...). The facade runs the
+# lookups concurrently in worker threads, and calls back as each one completes, so that the
+# widgets are displayed immediately and filled in as the results arrive.
+# The facade wraps any module implementing the APIs, so it works unchanged against mwi_test.
+
+# Lookups of the Control Panel: name -> (API, keyword arguments)
+CONTROL_PANEL_LOOKUPS = {
+    "cluster_name": ("get_cluster_name", {}),
+    "matlab_root": ("get_matlab_root", {}),
+    "matlab_version": ("get_matlab_version", {}),
+    "installed_toolboxes": ("get_installed_toolboxes", {"refresh": True}),
+    "toolboxes_available_for_install": ("get_toolboxes_available_for_install", {}),
+    "running_sessions": ("get_running_matlab_proxy_servers", {}),
+}
+
+
+class AsyncMWI:
+    """Asynchronous variants of the APIs of mwi, or of mwi_test for offline testing.
+
+    Example: `await AsyncMWI().get_matlab_root()` runs mwi.get_matlab_root() in a worker thread.
+    """
+
+    def __init__(self, mwi_module=None):
+        if mwi_module is None:
+            from . import mwi as mwi_module
+        self.mwi = mwi_module
+
+    def __getattr__(self, name):
+        import asyncio
+
+        function = getattr(self.mwi, name)
+        if not callable(function):
+            return function
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(function, *args, **kwargs)
+
+        call.__name__ = name
+        call.__doc__ = function.__doc__
+        return call
+
+    async def load(self, lookups=None, username=None, callbacks=None, on_error=None):
+        """Run the lookups concurrently, calling back with the result of each as it completes.
+
+        Args:
+            lookups (list): Names of the lookups in CONTROL_PANEL_LOOKUPS, all of them if None.
+            username (str): The user whose running sessions are looked up.
+            callbacks (dict): Maps the name of a lookup to a function called with its result.
+            on_error (function): Called with the name of a lookup & the exception it raised.
+
+        Returns:
+            dict: Maps the name of each lookup to its result, or to the exception it raised.
+        """
+        import asyncio
+
+        callbacks = callbacks or {}
+        on_error = on_error or _print_error
+        names = list(lookups or CONTROL_PANEL_LOOKUPS)
+
+        async def lookup(name):
+            api, kwargs = CONTROL_PANEL_LOOKUPS[name]
+            if name == "running_sessions":
+                kwargs = dict(kwargs, username=username)
+            try:
+                result = await getattr(self, api)(**kwargs)
+            except Exception as e:
+                on_error(name, e)
+                return e
+            if name in callbacks:
+                try:
+                    callbacks[name](result)
+                except Exception as e:
+                    on_error(name, e)
+            return result
+
+        results = await asyncio.gather(*(lookup(name) for name in names))
+        return dict(zip(names, results))
+
+    def start_loading(self, lookups=None, username=None, callbacks=None, on_error=None):
+        """Start load() without waiting for it, Example: from a notebook cell.
+
+        The callbacks are called on the thread running the event loop, which is the kernel
+        thread in a notebook, so they can update widgets. Without a running event loop, the
+        lookups are run to completion before returning.
+
+        Returns:
+            asyncio.Task: The task running the lookups, or their results without an event loop.
+        """
+        import asyncio
+
+        coroutine = self.load(
+            lookups=lookups, username=username, callbacks=callbacks, on_error=on_error
+        )
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        return loop.create_task(coroutine)
+
+
+################################################
+## Helper Functions
+################################################
+
+
+def _print_error(name, exception):
+    print(f"Failed to look up {name}: {exception}")
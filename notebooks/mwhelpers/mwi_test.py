@@ -18,6 +18,8 @@ from time import sleep
 # get_matlab_root(),
 # get_matlab_version(),
 # get_toolboxes_available_for_install(),
+# get_install_jobs(active_only)
+# wait_for_install_jobs()
 
 ## MATLAB Proxy Related
 # get_running_matlab_proxy_servers(username=get_username())
@@ -141,6 +143,26 @@ def get_toolboxes_available_for_install():
     return toolboxes_available_for_install
 
 
+def get_install_jobs(active_only=False):
+    """Get the toolbox installation jobs.
+
+    Returns:
+        list: The installation jobs, toolboxes are installed synchronously by the mock.
+    """
+    # This is a mock implementation.
+    return []
+
+
+def wait_for_install_jobs(timeout=None, poll_interval=5):
+    """Wait until the toolbox installation jobs are done.
+
+    Returns:
+        list: The state of each job, toolboxes are installed synchronously by the mock.
+    """
+    # This is a mock implementation.
+    return []
+
+
 ################################################
 ## MATLAB Proxy Related
 ################################################
@@ -202,6 +224,25 @@ def stop_matlab_session(username, port, context=None):
     print(f"Stopping MATLAB session with ID: {port}")
 
 
+def stop_matlab_sessions(username, ports=None, context=None, **kwargs):
+    """Stop MATLAB sessions.
+
+    Args:
+        ports (list): The port numbers of the sessions to stop.
+    """
+    # This is a mock implementation.
+    results = {}
+    for port in ports or []:
+        print(f"Stopping MATLAB session with ID: {port}")
+        results[str(port)] = {
+            "stopped": True,
+            "method": "shutdown",
+            "memory_reclaimed_mb": 0,
+            "error": None,
+        }
+    return results
+
+
 def _call_InstallToolboxes_script(username=None, destination=None, toolboxes=None):
     """Creates a user with the given username."""
     import subprocess
@@ -0,0 +1,429 @@
+# Copyright 2025 The MathWorks, Inc.
+## This module hosts the placement of MATLAB sessions on the least loaded node of the cluster.
+
+# Each node runs a node agent, which is the node daemon listening on a TCP address, see daemon.py.
+# The driver collects the load of every node from its agent, in parallel, and starts the next
+# session on the eligible node with the most headroom, through its agent.
+# Databricks only proxies ports of the driver, so a session on a worker is reached through a
+# tunnel: a port of the driver which forwards connections to the session on the worker. The
+# URL of the session is the Driver Proxy URL of the tunnel.
+# Tunnels are hosted by the node daemon of the driver, if it is running, so that they survive
+# kernel restarts, and listen on the address of the driver, or MWHELPERS_TUNNEL_HOST, rather than
+# on all interfaces.
+
+# Agents are given as a list of addresses, or in MWHELPERS_NODE_AGENTS separated by commas:
+#   "local"               This node, the APIs of mwi are called in this process.
+#   "/path/to/daemon.sock" A node daemon of this node, Example: for testing with several daemons.
+#   "tcp://10.0.0.5:7070" The node agent of another node.
+
+import threading
+
+# Memory headroom required on a node to start a MATLAB session on it.
+DEFAULT_MEMORY_PER_SESSION_MB = 4096
+
+# Seconds to wait for an agent to report its load.
+DEFAULT_AGENT_TIMEOUT = 2
+
+_lock = threading.Lock()
+# (address, timeout) -> DaemonClient
+_clients = {}
+# local port -> _Tunnel
+_tunnels = {}
+
+
+def get_agents():
+    """Get the addresses of the node agents, from MWHELPERS_NODE_AGENTS, with this node first."""
+    import os
+
+    agents = ["local"]
+    for address in os.environ.get("MWHELPERS_NODE_AGENTS", "").split(","):
+        address = address.strip()
+        if address and address not in agents:
+            agents.append(address)
+    return agents
+
+
+def get_node_load():
+    """Get the load of this node.
+
+    Returns:
+        dict: The "hostname", "cpu_count", "load_average" (over 1 minute), "memory_available_mb",
+              "memory_total_mb" & "num_sessions", the number of MATLAB sessions on this node.
+    """
+    import os
+    import socket
+
+    from . import mwi, registry
+
+    memory = {}
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                name, value = line.split(":", 1)
+                if name in ("MemTotal", "MemAvailable"):
+                    memory[name] = int(value.split()[0]) // 1024
+    except (OSError, ValueError):
+        pass
+
+    num_sessions = 0
+    # Includes the sessions started by the node daemon or by another kernel.
+    for username in registry.get_registry().discover_usernames():
+        num_sessions += len(mwi.get_running_matlab_proxy_servers(username))
+
+    return {
+        "hostname": socket.gethostname(),
+        "cpu_count": os.cpu_count() or 1,
+        "load_average": os.getloadavg()[0],
+        "memory_available_mb": memory.get("MemAvailable"),
+        "memory_total_mb": memory.get("MemTotal"),
+        "num_sessions": num_sessions,
+    }
+
+
+def collect_node_loads(agents=None, timeout=DEFAULT_AGENT_TIMEOUT):
+    """Collect the load of each node from its agent, in parallel.
+
+    Args:
+        agents (list): Addresses of the node agents, see get_agents().
+        timeout (float): Seconds to wait for each agent.
+
+    Returns:
+        list: A dictionary for each agent with its "agent", "reachable", "error" & the load
+              reported by get_node_load().
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    agents = agents or get_agents()
+
+    def collect(agent):
+        try:
+            if agent == "local":
+                load = get_node_load()
+            else:
+                load = _get_client(agent, timeout).call("get_load")
+            return dict(load, agent=agent, reachable=True, error=None)
+        except Exception as e:
+            return {"agent": agent, "reachable": False, "error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=len(agents)) as executor:
+        return list(executor.map(collect, agents))
+
+
+def choose_node(loads, memory_per_session_mb=DEFAULT_MEMORY_PER_SESSION_MB):
+    """Choose the least loaded eligible node.
+
+    A node is eligible if its agent is reachable and it has the memory headroom for a session.
+    Nodes are ranked by their sessions per CPU, then their load average per CPU, then their
+    available memory.
+
+    Args:
+        loads (list): Loads of the nodes, see collect_node_loads().
+        memory_per_session_mb (int): Memory headroom required by a MATLAB session.
+
+    Returns:
+        dict: The load of the chosen node, or None if no node is eligible.
+    """
+    eligible = [
+        load
+        for load in loads
+        if load["reachable"]
+        and (load["memory_available_mb"] or 0) >= memory_per_session_mb
+    ]
+    if not eligible:
+        return None
+    return min(
+        eligible,
+        key=lambda load: (
+            load["num_sessions"] / load["cpu_count"],
+            load["load_average"] / load["cpu_count"],
+            -load["memory_available_mb"],
+        ),
+    )
+
+
+def start_session(
+    username,
+    agents=None,
+    memory_per_session_mb=DEFAULT_MEMORY_PER_SESSION_MB,
+    **session_options,
+):
+    """Start a MATLAB session on the least loaded eligible node.
+
+    If the session fails to start on the chosen node, the next node in the ranking is tried.
+
+    Args:
+        username (str): The user running the session.
+        agents (list): Addresses of the node agents, see get_agents().
+        memory_per_session_mb (int): Memory headroom required by the MATLAB session.
+        session_options: Keyword arguments of mwi.start_matlab_session().
+
+    Returns:
+        dict: The "agent" & "hostname" of the node, the "port" of the session on the node, the
+              "session_id", which is the port of the session or of its tunnel on this node, the
+              port of the "tunnel", None if the session is reached directly, and the "status"
+              returned by mwi.wait_for_matlab_session() if wait_until_ready is True.
+              None if the session could not be started.
+    """
+    from . import mwi
+
+    loads = collect_node_loads(agents)
+    for load in loads:
+        if not load["reachable"]:
+            print(f"Node agent {load['agent']} is not reachable: {load['error']}")
+
+    while True:
+        load = choose_node(loads, memory_per_session_mb=memory_per_session_mb)
+        if load is None:
+            print("No node has the memory headroom for a MATLAB session, aborting...")
+            return None
+        loads.remove(load)
+
+        agent = load["agent"]
+        try:
+            if agent == "local":
+                port = mwi.start_matlab_session(username=username, **session_options)
+            else:
+                port = _get_client(agent).call(
+                    "start_session", username=username, **session_options
+                )
+        except Exception as e:
+            print(f"Failed to start a MATLAB session on {load['hostname']}: {e}")
+            continue
+        status = None
+        if isinstance(port, dict):
+            # The result of wait_for_matlab_session()
+            status, port = port, port.get("port")
+        if not port:
+            continue
+
+        port = str(port)
+        session_id = port
+        tunnel = None
+        if not _is_local_agent(agent):
+            local_port = open_tunnel(_get_agent_host(agent), int(port))
+            if local_port is None:
+                print(
+                    f"Unable to open a tunnel to the MATLAB session {port} on "
+                    f"{load['hostname']}, stopping it..."
+                )
+                try:
+                    _get_client(agent).call(
+                        "stop_sessions", username=username, ports=[port]
+                    )
+                except Exception as e:
+                    print(
+                        f"Failed to stop the MATLAB session {port} on {load['hostname']}: {e}"
+                    )
+                return None
+            session_id = tunnel = str(local_port)
+        return {
+            "agent": agent,
+            "hostname": load["hostname"],
+            "port": port,
+            "session_id": session_id,
+            "tunnel": tunnel,
+            "status": status,
+        }
+
+
+def stop_session(session, **stop_options):
+    """Stop a MATLAB session started by start_session(), and close its tunnel.
+
+    Args:
+        session (dict): The result of start_session().
+        stop_options: Keyword arguments of mwi.stop_matlab_sessions(), including the "username".
+
+    Returns:
+        dict: The result of mwi.stop_matlab_sessions() for the session.
+    """
+    from . import mwi
+
+    agent = session["agent"]
+    if agent == "local":
+        results = mwi.stop_matlab_sessions(ports=[session["port"]], **stop_options)
+    else:
+        stop_options.pop("context", None)
+        results = _get_client(agent).call(
+            "stop_sessions", ports=[session["port"]], **stop_options
+        )
+    if session.get("tunnel"):
+        close_tunnel(session["tunnel"])
+    return results
+
+
+def open_tunnel(host, port):
+    """Forward a free port of this node to the port of the host, in the node daemon if it is running.
+
+    Returns:
+        int: The port of this node, or None if the tunnel could not be opened.
+    """
+    from . import mwi, ports
+
+    handled, result = mwi._call_node_daemon("open_tunnel", host=host, port=port)
+    if handled:
+        return result
+
+    local_port = ports.reserve_port()
+    if local_port is None:
+        print("No ports are available for the tunnel, aborting...")
+        return None
+    try:
+        tunnel = _Tunnel(local_port, host, port, get_tunnel_host())
+    except OSError as e:
+        print(f"Unable to open a tunnel on port {local_port}: {e}")
+        return None
+    finally:
+        ports.release_port(local_port)
+    with _lock:
+        _tunnels[local_port] = tunnel
+    return local_port
+
+
+def close_tunnel(local_port):
+    """Close the tunnel opened by open_tunnel() on the port of this node."""
+    from . import mwi
+
+    handled, _ = mwi._call_node_daemon("close_tunnel", local_port=local_port)
+    if handled:
+        return
+    with _lock:
+        tunnel = _tunnels.pop(int(local_port), None)
+    if tunnel is not None:
+        tunnel.close()
+
+
+def get_tunnels():
+    """Get the open tunnels: local port (str) -> "host:port" of the session."""
+    from . import mwi
+
+    handled, result = mwi._call_node_daemon("get_tunnels")
+    if handled:
+        return result
+    with _lock:
+        return {
+            str(port): f"{tunnel.host}:{tunnel.port}"
+            for port, tunnel in _tunnels.items()
+        }
+
+
+def get_tunnel_host():
+    """Get the address on which tunnels listen, MWHELPERS_TUNNEL_HOST or the address of this node."""
+    """The Driver Proxy connects to the ports of the driver on this address."""
+    import os
+    import socket
+
+    return os.environ.get("MWHELPERS_TUNNEL_HOST") or socket.gethostbyname(
+        socket.gethostname()
+    )
+
+
+################################################
+## Helper Functions
+################################################
+
+
+def _get_client(agent, timeout=None):
+    """Returns the shared client of the agent, which keeps its connection open between calls."""
+    """Probes of the load, which time out quickly, & calls which may take minutes do not share
+    their connection."""
+    from . import daemon
+
+    with _lock:
+        client = _clients.get((agent, timeout))
+        if client is None:
+            client = daemon.DaemonClient(agent, timeout=timeout)
+            _clients[(agent, timeout)] = client
+        return client
+
+
+def _get_agent_host(agent):
+    from . import daemon
+
+    return daemon._parse_tcp_address(agent)[0]
+
+
+def _is_local_agent(agent):
+    """Returns True if the agent runs on this node, so that its sessions are reachable directly."""
+    import ipaddress
+    import socket
+
+    if agent == "local" or not agent.startswith("tcp://"):
+        return True
+    host = _get_agent_host(agent)
+    try:
+        address = socket.gethostbyname(host)
+    except OSError:
+        return False
+    if ipaddress.ip_address(address).is_loopback:
+        return True
+    try:
+        return address in socket.gethostbyname_ex(socket.gethostname())[2]
+    except OSError:
+        return False
+
+
+class _Tunnel:
+    """Forwards the connections accepted on a port of this node to the port of another host."""
+
+    def __init__(self, local_port, host, port, bind_host):
+        import socket
+
+        self.local_port = local_port
+        self.host = host
+        self.port = port
+        self._server = socket.create_server((bind_host, local_port))
+        threading.Thread(
+            target=self._accept, name=f"mwi-tunnel-{local_port}", daemon=True
+        ).start()
+
+    def close(self):
+        self._server.close()
+
+    def _accept(self):
+        import socket
+
+        while True:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                # The tunnel was closed.
+                return
+            try:
+                upstream = socket.create_connection((self.host, self.port), timeout=10)
+                upstream.settimeout(None)
+            except OSError:
+                client.close()
+                continue
+            threading.Thread(
+                target=_forward, args=(client, upstream), daemon=True
+            ).start()
+
+
+def _forward(client, upstream):
+    """Copy the data in both directions, and close both sockets once both directions are done."""
+    """A side which half-closes its connection still receives the rest of the other direction."""
+    reverse = threading.Thread(target=_pump, args=(upstream, client), daemon=True)
+    reverse.start()
+    _pump(client, upstream)
+    reverse.join()
+    client.close()
+    upstream.close()
+
+
+def _pump(source, target):
+    """Copy the data from the source socket to the target socket, until the source is closed."""
+    import socket
+
+    try:
+        while True:
+            data = source.recv(65536)
+            if not data:
+                break
+            target.sendall(data)
+    except OSError:
+        pass
+    finally:
+        try:
+            target.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
@@ -0,0 +1,260 @@
+# Copyright 2025 The MathWorks, Inc.
+## This module hosts the warm standby pool of MATLAB sessions.
+
+# A cold start spawns matlab-proxy-app, which then starts MATLAB under Xvfb, and takes tens of
+# seconds before the user can do anything. The pool keeps idle, fully started sessions on a
+# reserved port, which start_matlab_session() hands out immediately.
+# matlab-proxy runs as the user who owns the session, so standby sessions are started for the
+# users configured in the pool, Example: the students of a class. The pool keeps "size" standby
+# sessions for each of these users, and refills itself in background threads after a handout.
+# Hits, misses & refill times are recorded, see get_stats().
+
+import threading
+
+# Maximum number of standby sessions started in parallel, as MATLAB startup is CPU intensive.
+MAX_PARALLEL_REFILLS = 2
+
+# Maximum seconds to wait for a standby session to be ready.
+DEFAULT_READY_TIMEOUT = 300
+
+# States of a started session which can be handed out. matlab-proxy only starts MATLAB once it is
+# licensed, so unlicensed sessions are handed out & licensed by the user in the browser.
+_READY_STATES = ("up", "unlicensed")
+
+
+class WarmPool:
+    """Standby matlab-proxy servers for each of the pooled users of this node."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.size = 0
+        self.resource_limits = None
+        self.ready_timeout = DEFAULT_READY_TIMEOUT
+        self._usernames = []
+        # username -> list of standby sessions, oldest first
+        self._standby = {}
+        # username -> number of standby sessions being started
+        self._refilling = {}
+        self._executor = None
+        self._stats = self._new_stats()
+
+    def configure(
+        self, size, usernames, resource_limits=None, ready_timeout=DEFAULT_READY_TIMEOUT
+    ):
+        """Set the number of standby sessions kept for each of the users, and start filling the pool.
+
+        Standby sessions beyond the new size, or of users no longer in the pool, are stopped.
+
+        Args:
+            size (int): Number of standby sessions for each user, 0 disables the pool.
+            usernames (list): Users for whom standby sessions are started.
+            resource_limits (dict): cgroup v2 limits of the standby sessions, see cgroups.py
+            ready_timeout (int): Maximum seconds to wait for a standby session to be ready.
+        """
+        with self._lock:
+            self.size = max(0, int(size))
+            self._usernames = list(dict.fromkeys(name for name in usernames if name))
+            self.resource_limits = resource_limits
+            self.ready_timeout = ready_timeout
+
+            surplus_sessions = []
+            for username in list(self._standby):
+                keep = self.size if username in self._usernames else 0
+                surplus_sessions.extend(self._standby[username][keep:])
+                self._standby[username] = self._standby[username][:keep]
+
+        for session in surplus_sessions:
+            _stop_standby_session(session)
+        self.refill()
+
+    def take(self, username, resource_limits=None):
+        """Hand out a standby session of the user, and refill the pool in the background.
+
+        Returns:
+            dict: The "port", "uid", "process", "ready_time" & "resource_limit_errors" of the
+                  session, or None on a miss.
+        """
+        with self._lock:
+            if self.size == 0 or username not in self._usernames:
+                return None
+            if resource_limits and resource_limits != self.resource_limits:
+                # Standby sessions were started with different limits.
+                return None
+
+            session = None
+            standby_sessions = self._standby.get(username, [])
+            while standby_sessions:
+                candidate = standby_sessions.pop(0)
+                if candidate["process"].poll() is None:
+                    session = candidate
+                    break
+            if session is None:
+                self._stats["misses"] += 1
+            else:
+                self._stats["hits"] += 1
+
+        self.refill(username)
+        return session
+
+    def refill(self, username=None):
+        """Start standby sessions for the user, or all pooled users, up to the size of the pool."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        with self._lock:
+            usernames = [username] if username else list(self._usernames)
+            for name in usernames:
+                if name not in self._usernames:
+                    continue
+                num_missing = (
+                    self.size
+                    - len(self._standby.get(name, []))
+                    - self._refilling.get(name, 0)
+                )
+                if num_missing <= 0:
+                    continue
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=MAX_PARALLEL_REFILLS,
+                        thread_name_prefix="mwi-pool",
+                    )
+                self._refilling[name] = self._refilling.get(name, 0) + num_missing
+                for _ in range(num_missing):
+                    self._executor.submit(self._start_standby_session, name)
+
+    def drain(self):
+        """Disable the pool, and stop all standby sessions."""
+        self.configure(0, [])
+
+    def is_standby(self, port):
+        """Returns True if the session on the port is waiting in the pool."""
+        port = str(port)
+        with self._lock:
+            return any(
+                str(session["port"]) == port
+                for sessions in self._standby.values()
+                for session in sessions
+            )
+
+    def get_stats(self):
+        """Get the metrics of the pool.
+
+        Returns:
+            dict: The "size", number of "standby" & "refilling" sessions, "hits", "misses", "hit_rate",
+                  "refills", "refill_failures", "last_refill_seconds" & "average_refill_seconds".
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = self.size
+            stats["standby"] = sum(len(sessions) for sessions in self._standby.values())
+            stats["refilling"] = sum(self._refilling.values())
+
+        requests = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / requests if requests else None
+        stats["average_refill_seconds"] = (
+            stats["total_refill_seconds"] / stats["refills"]
+            if stats["refills"]
+            else None
+        )
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = self._new_stats()
+
+    ################################################
+    ## Helper Functions
+    ################################################
+
+    @staticmethod
+    def _new_stats():
+        return {
+            "hits": 0,
+            "misses": 0,
+            "refills": 0,
+            "refill_failures": 0,
+            "last_refill_seconds": None,
+            "total_refill_seconds": 0.0,
+        }
+
+    def _start_standby_session(self, username):
+        """Start a session for the user, wait until it is ready & add it to the pool."""
+        import time
+
+        from . import mwi
+
+        start_time = time.perf_counter()
+        session = None
+        try:
+            launched = mwi._launch_matlab_session(
+                username,
+                log=lambda msg: None,
+                resource_limits=self.resource_limits,
+            )
+            if launched["port"]:
+                result = mwi.wait_for_matlab_session(
+                    launched["port"],
+                    process=launched["process"],
+                    timeout=self.ready_timeout,
+                )
+                session = {
+                    "port": launched["port"],
+                    "uid": launched["uid"],
+                    "process": launched["process"],
+                    "ready_time": time.time(),
+                    "resource_limit_errors": launched["resource_limit_errors"],
+                }
+                if result["state"] not in _READY_STATES:
+                    _stop_standby_session(session)
+                    session = None
+        except Exception as e:
+            print(f"Failed to start a standby MATLAB session for {username}: {e}")
+        refill_seconds = time.perf_counter() - start_time
+
+        with self._lock:
+            self._refilling[username] -= 1
+            if session is None:
+                self._stats["refill_failures"] += 1
+                return
+            self._stats["refills"] += 1
+            self._stats["total_refill_seconds"] += refill_seconds
+            self._stats["last_refill_seconds"] = refill_seconds
+
+            standby_sessions = self._standby.setdefault(username, [])
+            if username in self._usernames and len(standby_sessions) < self.size:
+                standby_sessions.append(session)
+                session = None
+        if session is not None:
+            # The pool was resized while the session was starting.
+            _stop_standby_session(session)
+
+
+def get_pool():
+    """Get the warm standby pool shared by all APIs in this process."""
+    return _pool
+
+
+_pool = WarmPool()
+
+
+################################################
+## Helper Functions
+################################################
+
+
+def _stop_standby_session(session):
+    """Stop a standby session which was never handed out."""
+    import signal
+    import subprocess
+
+    from . import cgroups, mwi, ports
+
+    process = session["process"]
+    if process.poll() is None:
+        mwi._signal_process_tree([process.pid], signal.SIGTERM)
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            mwi._signal_process_tree([process.pid], signal.SIGKILL)
+            process.wait()
+    ports.release_port(session["port"])
+    cgroups.remove_session_cgroup(session["port"])
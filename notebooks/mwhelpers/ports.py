@@ -0,0 +1,133 @@
+# Copyright 2025 The MathWorks, Inc.
+## This module hosts functions related to allocating ports for matlab-proxy servers.
+
+# Databricks only proxies ports in the range 3000-9999.
+# Ports in use are read in a single pass from /proc/net/tcp & /proc/net/tcp6, and the chosen
+# port is bind-probed to confirm it can be used.
+# Allocated ports are recorded in a reservation table until the matlab-proxy server starts
+# listening on them. The table is protected by a lock file, so that notebooks starting sessions
+# at the same moment, in the same or in different kernels, never receive the same port.
+
+import threading
+
+DEFAULT_START_PORT = 3000
+DEFAULT_END_PORT = 9999
+
+# Seconds for which a reserved port is held, which covers the startup of matlab-proxy-app.
+DEFAULT_RESERVATION_TIMEOUT = 120
+
+# State of a listening socket in /proc/net/tcp
+_TCP_LISTEN_STATE = "0A"
+
+
+def reserve_port(
+    *,
+    host="0.0.0.0",
+    start_port: int = DEFAULT_START_PORT,
+    end_port: int = DEFAULT_END_PORT,
+    timeout: int = DEFAULT_RESERVATION_TIMEOUT,
+):
+    """Reserve a free port in the specified range.
+
+    The search starts after the last reserved port, so consecutive calls do not rescan
+    ports which are already in use.
+
+    Returns:
+        int: The reserved port, or None if no ports are available.
+    """
+    import time
+
+    with _reservation_table() as table:
+        now = time.time()
+        reserved_ports = {
+            port: expiry for port, expiry in table["reserved"].items() if expiry > now
+        }
+        table["reserved"] = reserved_ports
+
+        ports_in_use = _get_listening_ports()
+        num_ports = end_port - start_port + 1
+        next_port = table.get("next_port", start_port)
+        for offset in range(num_ports):
+            port = start_port + (next_port - start_port + offset) % num_ports
+            if port in ports_in_use or str(port) in reserved_ports:
+                continue
+            if not _can_bind(host, port):
+                continue
+            reserved_ports[str(port)] = now + timeout
+            table["next_port"] = port + 1
+            return port
+
+    return None
+
+
+def release_port(port):
+    """Release a port reserved by reserve_port(), Example: once the session has started."""
+    with _reservation_table() as table:
+        table["reserved"].pop(str(port), None)
+
+
+################################################
+## Helper Functions
+################################################
+
+
+# Serializes threads of this process, the lock file serializes processes.
+_thread_lock = threading.Lock()
+
+
+def _reservation_table():
+    """Returns a context manager which yields the reservation table, and saves it on exit."""
+    """The table holds the next port to try & maps reserved ports (as strings) to the
+    time at which their reservation expires."""
+    import contextlib
+    import fcntl
+    import json
+    import os
+
+    from . import cache
+
+    @contextlib.contextmanager
+    def locked_table():
+        table_file = os.path.join(cache.get_cache_folder("ports"), "reservations.json")
+        with _thread_lock, open(table_file + ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                reservations = cache.read_json(table_file) or {}
+                reservations.setdefault("reserved", {})
+                yield reservations
+                with open(table_file, "w") as f:
+                    json.dump(reservations, f)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    return locked_table()
+
+
+def _get_listening_ports():
+    """Returns the set of ports with a listening TCP socket, read from /proc/net/tcp{,6}."""
+    ports_in_use = set()
+    for proc_file in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(proc_file) as f:
+                next(f)  # Skip the header
+                for line in f:
+                    fields = line.split()
+                    if len(fields) > 3 and fields[3] == _TCP_LISTEN_STATE:
+                        ports_in_use.add(int(fields[1].rsplit(":", 1)[1], 16))
+        except (OSError, StopIteration):
+            continue
+    return ports_in_use
+
+
+def _can_bind(host, port):
+    """Returns True if a socket can be bound to the port."""
+    import socket
+
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        # matlab-proxy servers bind with SO_REUSEADDR, so ports in TIME_WAIT are usable.
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind((host, port))
+        except OSError:
+            return False
+    return True
@@ -0,0 +1,104 @@
+# Copyright 2025 The MathWorks, Inc.
+## This module hosts functions which read process information from /proc.
+
+# A single sweep of /proc/<pid>/stat builds a table of all processes, from which the process
+# trees of the matlab-proxy servers are derived. This avoids a call per PID.
+
+
+def read_process_table():
+    """Read /proc/<pid>/stat of every process in a single sweep.
+
+    Returns:
+        dict: Maps each pid to a dictionary with its "pid", "ppid", "pgid", "state", "uid",
+              "cpu_seconds", "num_threads", "start_time" (seconds since boot) & "rss_bytes".
+    """
+    import os
+
+    clock_ticks = os.sysconf("SC_CLK_TCK")
+    page_size = os.sysconf("SC_PAGE_SIZE")
+
+    process_table = {}
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry.name}/stat") as f:
+                stat = f.read()
+            uid = entry.stat().st_uid
+        except OSError:
+            # The process exited during the sweep.
+            continue
+
+        # The command name is in parentheses, and may contain spaces.
+        fields = stat[stat.rindex(")") + 2 :].split()
+        pid = int(entry.name)
+        process_table[pid] = {
+            "pid": pid,
+            "ppid": int(fields[1]),
+            "pgid": int(fields[2]),
+            "state": fields[0],
+            "uid": uid,
+            "cpu_seconds": (int(fields[11]) + int(fields[12])) / clock_ticks,
+            "num_threads": int(fields[17]),
+            "start_time": int(fields[19]) / clock_ticks,
+            "rss_bytes": int(fields[21]) * page_size,
+        }
+    return process_table
+
+
+def get_process_tree(process_table, pid):
+    """Returns the pids of the process and all of its descendants, found in the process table."""
+    children = {}
+    for process in process_table.values():
+        children.setdefault(process["ppid"], []).append(process["pid"])
+
+    if pid not in process_table:
+        return []
+
+    process_tree = []
+    pids_to_visit = [pid]
+    while pids_to_visit:
+        current_pid = pids_to_visit.pop()
+        process_tree.append(current_pid)
+        pids_to_visit.extend(children.get(current_pid, []))
+    return process_tree
+
+
+def is_running(pid):
+    """Returns True if the process exists and is not a zombie."""
+    """Zombie children of this process are reaped."""
+    import os
+
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+    except OSError:
+        return False
+
+    if stat[stat.rindex(")") + 2] != "Z":
+        return True
+    try:
+        os.waitpid(pid, os.WNOHANG)
+    except ChildProcessError:
+        pass
+    return False
+
+
+def get_start_time(pid):
+    """Returns the start time of the process in seconds since boot, or None if it does not exist."""
+    """Together with the pid, the start time identifies a process, as pids are reused."""
+    import os
+
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    fields = stat[stat.rindex(")") + 2 :].split()
+    return int(fields[19]) / os.sysconf("SC_CLK_TCK")
+
+
+def get_uptime():
+    """Returns the seconds since boot, used with the "start_time" of processes."""
+    with open("/proc/uptime") as f:
+        return float(f.read().split()[0])
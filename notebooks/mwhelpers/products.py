@@ -0,0 +1,354 @@
+# Copyright 2025 The MathWorks, Inc.
+## This module hosts functions related to discovering the products installed in MATLAB.
+
+# Listing the installed products requires walking the whole MATLAB root, which can take
+# tens of seconds. The result is stored in an on-disk index, keyed by the MATLAB root and
+# the version found in VersionInfo.xml.
+# The index is validated against the mtimes of the toolbox/ folder and its immediate
+# sub folders, as installing a product creates or modifies these folders. A warm lookup
+# is therefore a stat sweep of the toolbox/ folder instead of a full tree walk.
+
+# When the index is stale, the products are found by scan_installed_products(), which
+# implements the algorithm of scripts/ListInstalledProducts.sh in process.
+
+
+################################################
+## Data Model
+################################################
+
+
+class MatlabInstallation:
+    """The MATLAB root, MATLAB version & products installed in a MATLAB installation.
+
+    Instances are built once and shared by all the APIs in mwi.
+    Membership tests such as `"Simulink" in installation` use a frozenset.
+    """
+
+    __slots__ = ("matlab_root", "matlab_version", "products", "product_set")
+
+    def __init__(self, matlab_root, matlab_version, products):
+        self.matlab_root = matlab_root
+        # Example: R2025a Update 1 (25.1.0.2973910)
+        self.matlab_version = matlab_version
+        # MATLAB is the first product, if installed. The rest are sorted.
+        self.products = tuple(products)
+        self.product_set = frozenset(self.products)
+
+    @property
+    def release(self):
+        """The MATLAB release, Example: R2025a"""
+        return self.matlab_version.split(" ")[0]
+
+    def __contains__(self, product):
+        return product in self.product_set
+
+    def __iter__(self):
+        return iter(self.products)
+
+    def __len__(self):
+        return len(self.products)
+
+    def __repr__(self):
+        return f"MatlabInstallation({self.matlab_root!r}, {self.matlab_version!r}, {len(self.products)} products)"
+
+    def to_dict(self):
+        return {
+            "matlab_root": self.matlab_root,
+            "matlab_version": self.matlab_version,
+            "products": list(self.products),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["matlab_root"], data["matlab_version"], data["products"])
+
+
+################################################
+## Installed Products Scanner
+################################################
+
+
+def scan_installed_products(matlab_root):
+    """Find the products installed in the MATLAB root, similar to the MATLAB command VER.
+
+    Searches for Contents.m files whose second line starts with "% Version", excluding
+    toolbox/local, toolbox/matlab, mcr/ and folders starting with "+" or "@".
+    MATLAB is listed as the first product if it is installed.
+
+    Returns:
+        MatlabInstallation: The MATLAB root, MATLAB version & installed products.
+                            Returns None if the MATLAB root does not exist.
+    """
+    import os
+
+    if not matlab_root or not os.path.isdir(matlab_root):
+        return None
+
+    excluded_folders = {
+        os.path.join(matlab_root, "toolbox", "local"),
+        os.path.join(matlab_root, "toolbox", "matlab"),
+        os.path.join(matlab_root, "mcr"),
+    }
+
+    found_products = set()
+    folders_to_scan = [matlab_root]
+    while folders_to_scan:
+        folder = folders_to_scan.pop()
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name[0] in "+@" or entry.path in excluded_folders:
+                            continue
+                        folders_to_scan.append(entry.path)
+                    elif entry.name == "Contents.m" and entry.is_file(
+                        follow_symlinks=False
+                    ):
+                        product = _read_product_name(entry.path)
+                        if product:
+                            found_products.add(product)
+        except OSError:
+            continue
+
+    installed_products = []
+    if os.path.isfile(
+        os.path.join(matlab_root, "toolbox", "matlab", "general", "Contents.m")
+    ):
+        installed_products.append("MATLAB")
+        found_products.discard("MATLAB")
+    installed_products.extend(sorted(found_products))
+
+    return MatlabInstallation(
+        matlab_root,
+        _format_matlab_version(_read_version_info(matlab_root)),
+        installed_products,
+    )
+
+
+################################################
+## Installed Products Index
+################################################
+
+
+def load_installed_products_index(matlab_root):
+    """Load the installed products index for the MATLAB root, if it is still valid.
+
+    Returns:
+        MatlabInstallation: The indexed installation, or None if the index is missing or stale.
+    """
+    from . import cache
+
+    if not matlab_root:
+        return None
+
+    index = cache.read_json(_get_index_file(matlab_root))
+    if not index:
+        return None
+
+    if index.get("matlab_root") != matlab_root:
+        return None
+    if index.get("version") != _read_version_info(matlab_root).get("version"):
+        return None
+    if index.get("toolbox_mtimes") != _get_toolbox_mtimes(matlab_root):
+        return None
+
+    try:
+        return MatlabInstallation.from_dict(index["installation"])
+    except (KeyError, TypeError):
+        return None
+
+
+def save_installed_products_index(installation):
+    """Save the MatlabInstallation to the installed products index."""
+    from . import cache
+
+    if installation is None or not installation.matlab_root:
+        return False
+
+    matlab_root = installation.matlab_root
+    index = {
+        "matlab_root": matlab_root,
+        "version": _read_version_info(matlab_root).get("version"),
+        "toolbox_mtimes": _get_toolbox_mtimes(matlab_root),
+        "installation": installation.to_dict(),
+    }
+    return cache.write_json(_get_index_file(matlab_root), index)
+
+
+def clear_installed_products_index(matlab_root):
+    """Remove the installed products index for the MATLAB root."""
+    import os
+
+    try:
+        os.remove(_get_index_file(matlab_root))
+    except FileNotFoundError:
+        pass
+
+
+################################################
+## Helper Functions
+################################################
+
+
+def _get_index_file(matlab_root):
+    import os
+
+    from . import cache
+
+    return os.path.join(
+        cache.get_cache_folder("installed_products"),
+        cache.get_cache_key(matlab_root) + ".json",
+    )
+
+
+def _read_product_name(contents_file):
+    """Returns the product name from the first line of a Contents.m file."""
+    """Only the first two lines are read. Returns None if the second line is not a version line."""
+    try:
+        with open(contents_file, encoding="utf-8", errors="replace") as f:
+            first_line = f.readline()
+            second_line = f.readline()
+    except OSError:
+        return None
+
+    if not second_line.startswith("% Version"):
+        return None
+
+    if first_line.startswith("%"):
+        first_line = first_line[1:]
+    return first_line.strip() or None
+
+
+def _format_matlab_version(version_info):
+    """Format the version information the same way as ListInstalledProducts.sh."""
+    """Example: R2025a Update 1 (25.1.0.2973910)"""
+    if not version_info:
+        return "Unknown"
+    return "{release} {description} ({version})".format(**version_info)
+
+
+def _read_version_info(matlab_root):
+    """Returns the version, release & description fields from VersionInfo.xml."""
+    """Returns an empty dictionary if the file is missing."""
+    import os
+    import re
+
+    try:
+        with open(os.path.join(matlab_root, "VersionInfo.xml")) as f:
+            content = f.read()
+    except OSError:
+        return {}
+
+    version_info = {}
+    for field in ("version", "release", "description"):
+        match = re.search(f"<{field}>(.*?)</{field}>", content, re.DOTALL)
+        version_info[field] = match.group(1).strip() if match else ""
+    return version_info
+
+
+def _get_toolbox_mtimes(matlab_root):
+    """Returns the mtimes of the toolbox/ folder and its immediate sub folders."""
+    import os
+
+    toolbox_folder = os.path.join(matlab_root, "toolbox")
+    try:
+        toolbox_mtimes = {".": os.stat(toolbox_folder).st_mtime_ns}
+        with os.scandir(toolbox_folder) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    toolbox_mtimes[entry.name] = entry.stat(
+                        follow_symlinks=False
+                    ).st_mtime_ns
+    except OSError:
+        return {}
+    return toolbox_mtimes
+
+
+################################################
+## Benchmark
+################################################
+
+
+def benchmark_product_scanners(matlab_root=None, num_toolboxes=200, repeat=3):
+    """Compare scan_installed_products() against scripts/ListInstalledProducts.sh.
+
+    Args:
+        matlab_root (str): MATLAB root to scan. A synthetic MATLAB tree is created when None.
+        num_toolboxes (int): Number of toolboxes in the synthetic MATLAB tree.
+        repeat (int): Number of timed runs of each scanner, the best time is reported.
+
+    Returns:
+        dict: Best time in seconds for the "script" & "scanner" runs.
+    """
+    import os
+    import subprocess
+    import tempfile
+    import time
+
+    script_path = os.path.join(
+        os.path.dirname(__file__), "scripts", "ListInstalledProducts.sh"
+    )
+
+    with tempfile.TemporaryDirectory() as synthetic_root:
+        if matlab_root is None:
+            matlab_root = synthetic_root
+            _create_synthetic_matlab_root(matlab_root, num_toolboxes)
+
+        def run_script():
+            subprocess.run(
+                [script_path, "-r", matlab_root], capture_output=True, text=True
+            )
+
+        def run_scanner():
+            scan_installed_products(matlab_root)
+
+        timings = {}
+        for name, scanner in (("script", run_script), ("scanner", run_scanner)):
+            best_time = None
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+                scanner()
+                elapsed_time = time.perf_counter() - start_time
+                best_time = (
+                    elapsed_time if best_time is None else min(best_time, elapsed_time)
+                )
+            timings[name] = best_time
+
+    print(f"ListInstalledProducts.sh: {timings['script']:.3f}s")
+    print(f"scan_installed_products: {timings['scanner']:.3f}s")
+    return timings
+
+
+def _create_synthetic_matlab_root(matlab_root, num_toolboxes):
+    """Create a MATLAB root with the given number of toolboxes, each with nested Contents.m files."""
+    import os
+
+    def write_contents_file(folder, first_line, second_line):
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, "Contents.m"), "w") as f:
+            f.write(f"% {first_line}\n% {second_line}\n%\n% Files\n")
+
+    with open(os.path.join(matlab_root, "VersionInfo.xml"), "w") as f:
+        f.write(
+            "<MathWorks_version_info><version>25.1.0.2973910</version>"
+            "<release>R2025a</release><description>Update 1</description>"
+            "</MathWorks_version_info>"
+        )
+
+    toolbox_folder = os.path.join(matlab_root, "toolbox")
+    write_contents_file(
+        os.path.join(toolbox_folder, "matlab", "general"), "MATLAB", "Version 25.1"
+    )
+    for index in range(num_toolboxes):
+        product_folder = os.path.join(toolbox_folder, f"product{index}")
+        write_contents_file(product_folder, f"Product {index}", "Version 25.1")
+        for sub_index in range(10):
+            # Sub folders have Contents.m files without a version line.
+            write_contents_file(
+                os.path.join(product_folder, f"sub{sub_index}"),
+                f"Product {index} Sub {sub_index}",
+                "Functions",
+            )
+        write_contents_file(
+            os.path.join(product_folder, f"+pkg{index}"), "Package", "Version 1.0"
+        )
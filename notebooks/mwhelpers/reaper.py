@@ -0,0 +1,222 @@
+# Copyright 2025 The MathWorks, Inc.
+## This module hosts the reaper of idle MATLAB sessions.
+
+# Users close the browser tab, and their MATLAB sessions keep running until the cluster
+# terminates. The reaper scans the running matlab-proxy servers, and records the last time
+# each session was active. A session is active when:
+# - the CPU time of its process tree grew by more than IDLE_CPU_SECONDS_PER_MINUTE, or
+# - matlab-proxy reports MATLAB as "starting" or busy.
+# Sessions idle for longer than the idle timeout are shut down gracefully with stop_matlab_sessions().
+# Sessions whose process is unknown cannot be measured, they are reported but never stopped.
+# Each scan returns a report of the idle sessions & the memory they hold, which can be run as
+# a dry run, without stopping anything.
+
+import threading
+
+# Seconds after which an idle session is stopped.
+DEFAULT_IDLE_TIMEOUT = 3600
+
+# CPU time used by an idle MATLAB, below which a session is considered idle.
+IDLE_CPU_SECONDS_PER_MINUTE = 3.0
+
+
+class IdleReaper:
+    """Tracks the activity of the MATLAB sessions of this node, and stops the idle ones."""
+
+    def __init__(self, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        # (username, port) -> {"last_active", & the "cpu_seconds" of the session at that time}
+        self._activity = {}
+        self._thread = None
+        self._stop_reaping = threading.Event()
+
+    def scan(self, usernames=None, dry_run=True):
+        """Update the activity of the sessions, and stop those idle for longer than the idle timeout.
+
+        Args:
+            usernames (list): Users whose sessions are scanned, the users with a ports folder
+                              on this node if None, see registry.discover_usernames()
+            dry_run (bool): Whether to only report the idle sessions, without stopping them.
+
+        Returns:
+            dict: "sessions", a list with the "username", "port", "idle_seconds", "cpu_seconds",
+                  "memory_mb" & "action" ("keep", "stop", "stopped", or "unknown" if the
+                  process of the session is unknown) of each session,
+                  "memory_reclaimable_mb" & "memory_reclaimed_mb".
+        """
+        import time
+
+        from . import mwi, procfs, registry
+
+        if usernames is None:
+            usernames = registry.get_registry().discover_usernames()
+
+        process_table = procfs.read_process_table()
+        now = time.monotonic()
+        report = {"sessions": [], "memory_reclaimable_mb": 0, "memory_reclaimed_mb": 0}
+        sessions_to_stop = {}
+        scanned_keys = set()
+
+        for username in usernames:
+            sessions = mwi.get_matlab_sessions(username)
+            for port in mwi.get_running_matlab_proxy_servers(username):
+                session = sessions.get(port)
+                if session is None:
+                    continue
+                if session["pid"] not in process_table:
+                    # Without its process, a busy session would be measured as idle.
+                    report["sessions"].append(
+                        {
+                            "username": username,
+                            "port": port,
+                            "idle_seconds": None,
+                            "cpu_seconds": None,
+                            "memory_mb": None,
+                            "action": "unknown",
+                        }
+                    )
+                    continue
+                pids = procfs.get_process_tree(process_table, session["pid"])
+                cpu_seconds = sum(process_table[pid]["cpu_seconds"] for pid in pids)
+                memory_mb = sum(process_table[pid]["rss_bytes"] for pid in pids) // (
+                    1024 * 1024
+                )
+
+                key = (username, port)
+                scanned_keys.add(key)
+                idle_seconds = self._update_activity(
+                    key, now, cpu_seconds, _is_matlab_busy(session["url"])
+                )
+                entry = {
+                    "username": username,
+                    "port": port,
+                    "idle_seconds": idle_seconds,
+                    "cpu_seconds": cpu_seconds,
+                    "memory_mb": memory_mb,
+                    "action": "keep",
+                }
+                if idle_seconds >= self.idle_timeout:
+                    entry["action"] = "stop"
+                    report["memory_reclaimable_mb"] += memory_mb
+                    sessions_to_stop.setdefault(username, []).append(port)
+                report["sessions"].append(entry)
+
+        with self._lock:
+            # Forget the sessions which are no longer running.
+            for key in set(self._activity) - scanned_keys:
+                del self._activity[key]
+
+        if dry_run:
+            for entry in report["sessions"]:
+                if entry["action"] == "stop":
+                    print(
+                        f"Would stop idle MATLAB session {entry['port']} of {entry['username']}, "
+                        f"idle for {entry['idle_seconds'] / 60:.0f} minutes, holding {entry['memory_mb']} MB"
+                    )
+            return report
+
+        for username, ports in sessions_to_stop.items():
+            results = mwi.stop_matlab_sessions(username, ports=ports)
+            for entry in report["sessions"]:
+                result = results.get(entry["port"])
+                if entry["username"] != username or not result:
+                    continue
+                if result["stopped"]:
+                    entry["action"] = "stopped"
+                    report["memory_reclaimed_mb"] += result["memory_reclaimed_mb"]
+                    with self._lock:
+                        self._activity.pop((username, entry["port"]), None)
+        return report
+
+    def start(self, interval=300, usernames=None):
+        """Scan and stop idle sessions every interval seconds, in a background thread."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop_reaping.clear()
+            self._thread = threading.Thread(
+                target=self._reap,
+                args=(interval, usernames),
+                name="mwi-reaper",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread started by start()."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop_reaping.set()
+        thread.join()
+
+    ################################################
+    ## Helper Functions
+    ################################################
+
+    def _reap(self, interval, usernames):
+        while not self._stop_reaping.wait(interval):
+            try:
+                self.scan(usernames=usernames, dry_run=False)
+            except Exception as e:
+                print(f"Failed to reap idle MATLAB sessions: {e}")
+
+    def _update_activity(self, key, now, cpu_seconds, is_busy):
+        """Record the activity of the session, and return the seconds since it was last active."""
+        """Sessions seen for the first time are considered active."""
+        with self._lock:
+            activity = self._activity.get(key)
+            if activity is None or is_busy:
+                is_active = True
+            else:
+                # The CPU time is compared to the last time the session was active, so that
+                # frequent scans do not mistake the background activity of MATLAB for use.
+                idle_minutes = (now - activity["last_active"]) / 60
+                cpu_used = cpu_seconds - activity["cpu_seconds"]
+                # The CPU time drops if the process tree changed, Example: MATLAB was restarted.
+                is_active = (
+                    cpu_used < 0
+                    or cpu_used > IDLE_CPU_SECONDS_PER_MINUTE * idle_minutes
+                )
+
+            if is_active:
+                self._activity[key] = {"cpu_seconds": cpu_seconds, "last_active": now}
+                return 0.0
+            return now - activity["last_active"]
+
+
+def get_reaper():
+    """Get the idle session reaper shared by all APIs in this process."""
+    return _reaper
+
+
+_reaper = IdleReaper()
+
+
+################################################
+## Helper Functions
+################################################
+
+
+def _is_matlab_busy(url):
+    """Returns True if matlab-proxy reports MATLAB as starting, or busy running code."""
+    """Sample Response: {"matlab": {"status": "up", "busyStatus": "idle", ...}, ...}"""
+    from . import mwi
+
+    response = mwi.send_http_request(
+        url.rstrip("/") + "/get_status", method="GET", timeout=(2, 5), quiet=True
+    )
+    try:
+        status = response.json() if response and response.status_code == 200 else None
+    except ValueError:
+        status = None
+    if not isinstance(status, dict):
+        return False
+
+    matlab_status = status.get("matlab") or {}
+    return (
+        matlab_status.get("status") == "starting"
+        or matlab_status.get("busyStatus") == "busy"
+    )
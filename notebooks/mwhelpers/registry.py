@@ -0,0 +1,376 @@
+# Copyright 2025 The MathWorks, Inc.
+## This module hosts the registry of matlab-proxy servers running on this node.
+
+# Each matlab-proxy server writes its URL to ~/.matlab/MWI/hosts/<hostname>/ports/<port>/mwi_server.info
+# of the user running it. The registry keeps an in-memory index of these servers for each user.
+# The index is updated incrementally: the ports folder is listed, and only port folders which were
+# added, removed or modified since the previous update are read again.
+# Updates happen lazily when the index is read, or continuously in a background thread which is
+# woken up by inotify events on the ports folders (falling back to polling when inotify is unavailable).
+# In the latter case, reading the index is a dictionary lookup.
+
+import threading
+
+# Minimum seconds between two lazy updates of the index for a user.
+DEFAULT_MIN_REFRESH_INTERVAL = 1.0
+
+
+class SessionRegistry:
+    """In-memory index of port -> matlab-proxy server information, for each user of this node."""
+
+    def __init__(self, min_refresh_interval=DEFAULT_MIN_REFRESH_INTERVAL):
+        self.min_refresh_interval = min_refresh_interval
+        self._lock = threading.RLock()
+        # username -> ports folder of the user
+        self._ports_folders = {}
+        # username -> {port folder name: mtime_ns}
+        self._snapshots = {}
+        # username -> {port: session}
+        self._sessions = {}
+        # username -> time of the last update
+        self._last_refresh = {}
+        # port -> "pid" & "start_time" of the servers launched by this process, still running
+        self._launched_pids = {}
+        self._watcher = None
+        self._stop_watching = threading.Event()
+        self._inotify = None
+
+    def get_sessions(self, username):
+        """Get the matlab-proxy servers running for the user, ordered by their start time.
+
+        Returns:
+            dict: Maps each port (str) to a dictionary with its "port", "url", "pid", "username" & "start_time".
+        """
+        import time
+
+        if username is None:
+            return {}
+
+        with self._lock:
+            # The index of a user is only kept up to date by the watcher once inotify watches
+            # the ports folder of the user, which may not exist yet.
+            is_watched = (
+                self._watcher is not None
+                and self._inotify is not None
+                and self._inotify.is_watching(self._ports_folders.get(username))
+            )
+            last_refresh = self._last_refresh.get(username, 0)
+            if (
+                not is_watched
+                and time.monotonic() - last_refresh >= self.min_refresh_interval
+            ):
+                self.refresh(username)
+            return dict(self._sessions.get(username, {}))
+
+    def refresh(self, username=None):
+        """Update the index for the user, or for all known users if username is None."""
+        import time
+
+        with self._lock:
+            usernames = [username] if username else list(self._ports_folders)
+            for name in usernames:
+                self._refresh_user(name)
+                self._last_refresh[name] = time.monotonic()
+
+    def record_launch(self, port, pid, username=None):
+        """Record the PID of a matlab-proxy server launched by this process, for the user."""
+        from . import procfs
+
+        with self._lock:
+            # Forget the servers which exited without leaving a port folder.
+            for launched_port in list(self._launched_pids):
+                self._get_launched_pid(launched_port)
+            self._launched_pids[str(port)] = {
+                "pid": pid,
+                "start_time": procfs.get_start_time(pid),
+            }
+            if username is not None:
+                self._get_ports_folder(username)
+
+    def get_usernames(self):
+        """Get the users known to the registry, whose sessions were listed or launched by this process."""
+        with self._lock:
+            return list(self._ports_folders)
+
+    def discover_usernames(self):
+        """Find the users with a ports folder of matlab-proxy on this node, & add them to the registry.
+
+        Unlike get_usernames(), this includes the users whose sessions were started by another
+        process, Example: the node daemon.
+        """
+        import os
+        import pwd
+        import socket
+
+        hostname = socket.gethostname()
+        discovered = {}
+        for user in pwd.getpwall():
+            ports_folder = os.path.join(
+                user.pw_dir, ".matlab", "MWI", "hosts", hostname, "ports"
+            )
+            if os.path.isdir(ports_folder):
+                discovered[user.pw_name] = ports_folder
+
+        with self._lock:
+            for username, ports_folder in discovered.items():
+                self._ports_folders.setdefault(username, ports_folder)
+            return list(self._ports_folders)
+
+    def forget_user(self, username):
+        """Remove the user from the index, Example: when the user is deleted."""
+        with self._lock:
+            for index in (
+                self._ports_folders,
+                self._snapshots,
+                self._sessions,
+                self._last_refresh,
+            ):
+                index.pop(username, None)
+
+    def start_watching(self, interval=5.0):
+        """Update the index of all known users in a background thread.
+
+        The thread wakes up on inotify events on the ports folders, or every interval seconds.
+        """
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._stop_watching.clear()
+            self._inotify = _Inotify.create()
+            self._watcher = threading.Thread(
+                target=self._watch, args=(interval,), name="mwi-registry", daemon=True
+            )
+            self._watcher.start()
+
+    def stop_watching(self):
+        """Stop the background thread started by start_watching()."""
+        with self._lock:
+            watcher, self._watcher = self._watcher, None
+        if watcher is None:
+            return
+        self._stop_watching.set()
+        watcher.join()
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    ################################################
+    ## Helper Functions
+    ################################################
+
+    def _watch(self, interval):
+        while not self._stop_watching.is_set():
+            self.refresh()
+            if self._inotify is not None:
+                self._inotify.wait(interval)
+            else:
+                self._stop_watching.wait(interval)
+
+    def _get_ports_folder(self, username):
+        import socket
+
+        from . import mwi
+
+        if username not in self._ports_folders:
+            home_folder = mwi._get_home_folder(username)
+            if not home_folder:
+                #  User does not exist, the registry does not create the user.
+                return None
+            self._ports_folders[username] = (
+                home_folder + "/.matlab/MWI/hosts/" + socket.gethostname() + "/ports"
+            )
+        return self._ports_folders[username]
+
+    def _refresh_user(self, username):
+        """Diff the port folders of the user against the previous snapshot, & read the changes."""
+        import os
+
+        ports_folder = self._get_ports_folder(username)
+        if ports_folder is None:
+            return
+
+        snapshot = {}
+        try:
+            with os.scandir(ports_folder) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        snapshot[entry.name] = entry.stat().st_mtime_ns
+        except OSError:
+            pass
+
+        if self._inotify is not None:
+            self._inotify.add_watch(ports_folder)
+            port_folders = {os.path.join(ports_folder, name) for name in snapshot}
+            self._inotify.forget_watches(ports_folder, keep=port_folders)
+            for port_folder in port_folders:
+                self._inotify.add_watch(port_folder)
+
+        previous_snapshot = self._snapshots.get(username, {})
+        sessions_by_folder = {
+            session["folder"]: session
+            for session in self._sessions.get(username, {}).values()
+        }
+        for name, mtime in snapshot.items():
+            if previous_snapshot.get(name) != mtime or name not in sessions_by_folder:
+                session = self._read_session(username, ports_folder, name)
+                if session is None:
+                    sessions_by_folder.pop(name, None)
+                else:
+                    sessions_by_folder[name] = session
+        for name in set(sessions_by_folder) - set(snapshot):
+            # The server exited, its pid may be reused.
+            self._launched_pids.pop(sessions_by_folder.pop(name)["port"], None)
+
+        self._snapshots[username] = snapshot
+        self._sessions[username] = {
+            session["port"]: session
+            for session in sorted(
+                sessions_by_folder.values(), key=lambda session: session["start_time"]
+            )
+        }
+
+    def _get_launched_pid(self, port):
+        """Returns the pid of the server launched by this process on the port, if it is running."""
+        from . import procfs
+
+        launched = self._launched_pids.get(port)
+        if launched is None:
+            return None
+        start_time = procfs.get_start_time(launched["pid"])
+        if start_time is None or start_time != launched["start_time"]:
+            # The server exited, and its pid may belong to another process.
+            del self._launched_pids[port]
+            return None
+        return launched["pid"]
+
+    def _read_session(self, username, ports_folder, name):
+        """Read the mwi_server.info file in the port folder, returns None if it does not exist."""
+        import os
+        from urllib.parse import urlsplit
+
+        info_file = os.path.join(ports_folder, name, "mwi_server.info")
+        try:
+            with open(info_file) as f:
+                url = f.readline().strip()
+            start_time = os.stat(info_file).st_mtime
+        except OSError:
+            return None
+        if not url:
+            return None
+
+        try:
+            port = str(urlsplit(url).port or name)
+        except ValueError:
+            port = name
+
+        return {
+            "port": port,
+            "url": url,
+            "pid": self._get_launched_pid(port) or _find_pid_of_port(port),
+            "username": username,
+            "start_time": start_time,
+            "folder": name,
+            "info_file": info_file,
+        }
+
+
+def get_registry():
+    """Get the session registry shared by all APIs in this process."""
+    return _registry
+
+
+_registry = SessionRegistry()
+
+
+################################################
+## Helper Functions
+################################################
+
+
+def _find_pid_of_port(port):
+    """Find the matlab-proxy-app process started with MWI_APP_PORT=port, using /proc."""
+    """This is only done once per session, when the session is added to the index, and only
+    the environment of matlab-proxy-app processes is read."""
+    import os
+
+    needle = f"MWI_APP_PORT={port}".encode()
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                if b"matlab-proxy-app" not in f.read():
+                    continue
+            with open(f"/proc/{pid}/environ", "rb") as f:
+                if needle in f.read().split(b"\0"):
+                    return int(pid)
+        except OSError:
+            continue
+    return None
+
+
+class _Inotify:
+    """Minimal inotify wrapper using ctypes, used to wake up the registry watcher."""
+
+    # IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    _EVENT_MASK = 0x002 | 0x008 | 0x040 | 0x080 | 0x100 | 0x200
+
+    def __init__(self, libc, fd):
+        self._libc = libc
+        self._fd = fd
+        self._watched = set()
+
+    @classmethod
+    def create(cls):
+        """Returns an _Inotify instance, or None if inotify is not available."""
+        import ctypes
+        import ctypes.util
+        import os
+
+        try:
+            libc = ctypes.CDLL(
+                ctypes.util.find_library("c") or "libc.so.6", use_errno=True
+            )
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        return cls(libc, fd)
+
+    def add_watch(self, path):
+        if path in self._watched:
+            return
+        if self._libc.inotify_add_watch(self._fd, path.encode(), self._EVENT_MASK) >= 0:
+            self._watched.add(path)
+
+    def is_watching(self, path):
+        return path in self._watched
+
+    def forget_watches(self, parent, keep):
+        """Forget the watches of deleted folders in parent, the kernel removes them on deletion."""
+        import os
+
+        for path in list(self._watched):
+            if os.path.dirname(path) == parent and path not in keep:
+                self._watched.discard(path)
+
+    def wait(self, timeout):
+        """Wait for events for up to timeout seconds, and discard them."""
+        import os
+        import select
+
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if readable:
+            try:
+                while os.read(self._fd, 65536):
+                    pass
+            except BlockingIOError:
+                pass
+            except OSError:
+                pass
+
+    def close(self):
+        import os
+
+        os.close(self._fd)
@@ -0,0 +1,74 @@
+function outputDescriptor = mwhelpersCallWithColumns(functionName, inputDescriptor, outputPath, numOutputs)
+% Copyright 2025 The MathWorks, Inc.
+% Call a function with the columns of the file described by inputDescriptor, and write the
+% columns it returns to outputPath, in the layout written by write_columns() in exchange.py.
+% The input file is mapped with memmapfile, instead of converting each element in Python.
+% Complex columns interleave their real & imaginary parts. Outputs which are not numeric or
+% logical, Example: char, are described without data, and read_columns() raises a TypeError.
+
+alignment = 64;
+
+inputColumns = inputDescriptor.columns;
+if isstruct(inputColumns)
+    inputColumns = num2cell(inputColumns);
+end
+args = cell(1, numel(inputColumns));
+for k = 1:numel(inputColumns)
+    column = inputColumns{k};
+    numValues = double(column.length);
+    if column.complex
+        numValues = 2 * numValues;
+    end
+    if numValues == 0
+        values = zeros(0, 1, column.type);
+    else
+        map = memmapfile(inputDescriptor.path, 'Offset', double(column.offset), ...
+            'Format', {column.type, [numValues 1], 'values'}, 'Repeat', 1);
+        values = map.Data.values;
+    end
+    if column.logical
+        values = logical(values);
+    end
+    if column.complex
+        values = complex(values(1:2:end), values(2:2:end));
+    end
+    args{k} = values;
+end
+
+outputs = cell(1, double(numOutputs));
+[outputs{:}] = feval(functionName, args{:});
+
+fid = fopen(outputPath, 'w');
+if fid < 0
+    error('mwhelpers:exchange', 'Unable to write %s', outputPath);
+end
+closeFile = onCleanup(@() fclose(fid));
+
+outputColumns = cell(1, numel(outputs));
+offset = 0;
+for k = 1:numel(outputs)
+    values = outputs{k}(:);
+    numRows = numel(values);
+    isLogical = islogical(values);
+    isNumeric = isnumeric(values);
+    isComplex = isNumeric && ~isreal(values);
+    if isLogical
+        values = uint8(values);
+    end
+    if isComplex
+        values = reshape([real(values) imag(values)].', [], 1);
+    end
+    padding = mod(-offset, alignment);
+    fwrite(fid, zeros(padding, 1, 'uint8'), 'uint8');
+    offset = offset + padding;
+    outputColumns{k} = struct('name', sprintf('output%d', k), 'type', class(values), ...
+        'offset', offset, 'length', numRows, 'logical', isLogical, 'complex', isComplex);
+    if isLogical || isNumeric
+        fwrite(fid, values, class(values));
+        offset = offset + numel(values) * numel(typecast(zeros(1, 1, class(values)), 'uint8'));
+    end
+end
+
+outputDescriptor = struct('path', outputPath, 'num_rows', numel(outputs{1}), ...
+    'columns', {outputColumns});
+end
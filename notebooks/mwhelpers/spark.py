@@ -0,0 +1,139 @@
+# Copyright 2025 The MathWorks, Inc.
+## This module hosts the execution of MATLAB functions over the partitions of Spark DataFrames.
+
+# map_matlab() runs a MATLAB function over each partition with mapInPandas(), on the executors.
+# The rows of a partition arrive in Arrow record batches, which are gathered into batches of
+# batch_rows rows, and the function is called once per batch with a column vector per column.
+# Numeric & logical columns are passed through shared memory, see exchange.py
+# Each Python worker of an executor starts one engine, on its first batch, and reuses it for
+# the following batches & tasks, as Spark reuses its Python workers.
+# Engines are started by a pluggable backend, see engines.py, so that map_matlab() can be tested
+# with the "fake" backend and a local Spark session.
+
+# Rows given to the MATLAB function in each call.
+DEFAULT_BATCH_ROWS = 10000
+
+# Engines of this Python worker: key of the backend -> engine
+_engines = {}
+
+# Spark contexts to which the package was added, see _add_package_to_executors()
+_spark_context_ids = set()
+
+
+def map_matlab(
+    df,
+    function,
+    columns=None,
+    output_schema="result double",
+    batch_rows=DEFAULT_BATCH_ROWS,
+    backend=None,
+):
+    """Run a MATLAB function over the rows of a Spark DataFrame, in batches, on the executors.
+
+    The function is called with a column vector for each of the columns, and returns a column
+    vector, of the same length, for each field of the output schema.
+    Example: `map_matlab(df, "hypot", columns=["x", "y"], output_schema="h double")`
+
+    Args:
+        df (pyspark.sql.DataFrame): The input rows.
+        function (str): Name of the MATLAB function, which must be on the path of the engines.
+        columns (list): Columns passed to the function, all columns if None.
+        output_schema: Schema of the output rows, as a DDL string or a StructType.
+        batch_rows (int): Rows passed to the function in each call.
+        backend: Backend starting the engines, or its name. See engines.get_backend()
+
+    Returns:
+        pyspark.sql.DataFrame: The rows returned by the function, computed lazily.
+    """
+    from . import engines
+
+    backend = engines.get_backend(backend)
+    if backend is None:
+        return None
+    columns = list(columns or df.columns)
+    _add_package_to_executors(df.sparkSession)
+    # Parses a DDL string without running a job.
+    schema = df.sparkSession.createDataFrame([], output_schema).schema
+    nargout = len(schema.fields)
+
+    def process(batches):
+        import pandas
+
+        engine = _get_engine(backend)
+        for batch in _rebatch(batches, batch_rows):
+            args = [batch[column].to_numpy() for column in columns]
+            try:
+                outputs = backend.call_function(engine, function, args, nargout=nargout)
+            except Exception:
+                # The engine may have exited, the retry of the task starts a new one.
+                _engines.pop(backend.get_key(), None)
+                raise
+            # Integer labels are matched to the output schema by position.
+            yield pandas.DataFrame(dict(enumerate(outputs)))
+
+    return df.select(*columns).mapInPandas(process, schema)
+
+
+################################################
+## Helper Functions
+################################################
+
+
+def _get_engine(backend):
+    """Returns the engine of the backend in this Python worker, started on the first call."""
+    key = backend.get_key()
+    engine = _engines.get(key)
+    if engine is None:
+        engine = _engines[key] = backend.start_engine()
+    return engine
+
+
+def _add_package_to_executors(spark):
+    """Ship this package to the executors, which run the functions of this module."""
+    import glob
+    import os
+    import zipfile
+
+    from . import cache
+
+    try:
+        spark_context = spark.sparkContext
+    except Exception:
+        # Spark Connect does not expose the Spark context, the package must be installed on the cluster.
+        return
+    if id(spark_context) in _spark_context_ids:
+        return
+
+    # Only the modules & the MATLAB helpers are needed on the executors.
+    package_folder = os.path.dirname(os.path.abspath(__file__))
+    archive = os.path.join(cache.get_cache_folder("spark"), f"{__package__}.zip")
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        for pattern in ("*.py", os.path.join("scripts", "*.m")):
+            for path in glob.glob(os.path.join(package_folder, pattern)):
+                zip_file.write(
+                    path,
+                    os.path.join(__package__, os.path.relpath(path, package_folder)),
+                )
+    spark_context.addPyFile(archive)
+    _spark_context_ids.add(id(spark_context))
+
+
+def _rebatch(batches, batch_rows):
+    """Gather the pandas DataFrames into DataFrames of batch_rows rows, except the last one."""
+    import pandas
+
+    pending = []
+    num_pending_rows = 0
+    for batch in batches:
+        pending.append(batch)
+        num_pending_rows += len(batch)
+        if num_pending_rows < batch_rows:
+            continue
+        rows = pandas.concat(pending, ignore_index=True)
+        for start in range(0, len(rows) - batch_rows + 1, batch_rows):
+            yield rows.iloc[start : start + batch_rows]
+        remainder = len(rows) % batch_rows
+        pending = [rows.iloc[len(rows) - remainder :]] if remainder else []
+        num_pending_rows = remainder
+    if num_pending_rows:
+        yield pandas.concat(pending, ignore_index=True)
@@ -0,0 +1,25 @@
+# Copyright 2025 The MathWorks, Inc.
+## Tests of the fake Databricks context, see context.py
+
+from mwhelpers import mwi, mwi_test
+
+
+def test_getters_use_the_fake_context_of_mwi_test():
+    mwi.set_databricks_context(mwi_test.get_databricks_context())
+    try:
+        assert mwi.get_user_name() == mwi_test.get_user_name()
+        assert mwi.get_cluster_name() == mwi_test.get_cluster_name()
+    finally:
+        mwi.set_databricks_context(None)
+
+
+def test_getters_use_the_user_and_cluster_info_given():
+    mwi.set_databricks_context(
+        dict(mwi_test.get_databricks_context(), user="jane@example.com"),
+        cluster_info={"cluster_name": "Training Cluster"},
+    )
+    try:
+        assert mwi.get_user_name() == "jane"
+        assert mwi.get_cluster_name() == "Training Cluster"
+    finally:
+        mwi.set_databricks_context(None)
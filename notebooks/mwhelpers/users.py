@@ -0,0 +1,324 @@
+# Copyright 2025 The MathWorks, Inc.
+## This module hosts functions related to the users of this node.
+
+# User information is looked up in the Name Service Switch Library PASSWD using pwd.getpwnam(),
+# which avoids forking getent. Lookups are cached in process:
+# - Users which exist are cached for USER_INFO_TTL seconds.
+# - Users which do not exist are cached for MISSING_USER_TTL seconds (negative caching).
+# The cache for a user is invalidated when the user is created.
+
+# Users are provisioned in process by create_users(), which creates many users in one batch:
+# /etc/passwd, /etc/shadow, /etc/group & /etc/gshadow are each read & rewritten once per batch,
+# while holding the same lock file as the shadow utilities (/etc/.pwd.lock).
+# Like scripts/CreateUser.sh, each user gets a private group, a home folder populated from
+# /etc/skel, a disabled password & passwordless sudo.
+# All paths are relative to a root folder, so that provisioning can be tested against a
+# temporary root instead of the real system.
+
+import threading
+
+# Range of UIDs & GIDs for new users, as in /etc/adduser.conf
+FIRST_UID = 1000
+LAST_UID = 59999
+
+# Valid usernames, as accepted by useradd.
+USERNAME_PATTERN = r"^[a-z_][a-z0-9_.-]{0,31}$"
+
+USER_INFO_TTL = 300
+MISSING_USER_TTL = 10
+
+# username -> (expiry, user info or None)
+_user_info_cache = {}
+_user_info_lock = threading.Lock()
+
+
+def get_user_info(username):
+    """Get the UID, GID & home folder of the user in a single lookup.
+
+    Returns:
+        dict: The "username", "uid", "gid" & "home_folder" of the user, or None if the user does not exist.
+    """
+    import pwd
+    import time
+
+    if not username:
+        return None
+
+    now = time.monotonic()
+    with _user_info_lock:
+        cached = _user_info_cache.get(username)
+        if cached and cached[0] > now:
+            return cached[1]
+
+    try:
+        entry = pwd.getpwnam(username)
+        user_info = {
+            "username": username,
+            "uid": entry.pw_uid,
+            "gid": entry.pw_gid,
+            "home_folder": entry.pw_dir,
+        }
+        ttl = USER_INFO_TTL
+    except KeyError:
+        user_info = None
+        ttl = MISSING_USER_TTL
+
+    with _user_info_lock:
+        _user_info_cache[username] = (now + ttl, user_info)
+    return user_info
+
+
+def invalidate_user_info(username=None):
+    """Remove the user, or all users if username is None, from the cache."""
+    with _user_info_lock:
+        if username is None:
+            _user_info_cache.clear()
+        else:
+            _user_info_cache.pop(username, None)
+
+
+################################################
+## User Provisioning
+################################################
+
+
+def create_users(usernames, root="/", shell="/bin/bash", grant_sudo=True):
+    """Create the users which do not exist yet, in one batch.
+
+    Args:
+        usernames (list): List of usernames to create.
+        root (str): Root folder containing etc/ & home/, the real system by default.
+        shell (str): Login shell of the new users.
+        grant_sudo (bool): Whether to grant passwordless sudo to the new users.
+
+    Returns:
+        dict: Maps each username to a dictionary with its "uid", "gid", "home_folder",
+              whether it was "created" & an "error", if any.
+    """
+    import fcntl
+    import os
+    import re
+
+    results = {}
+    usernames = list(dict.fromkeys(username for username in usernames if username))
+    for username in usernames:
+        if root == "/":
+            # Users which already exist, also in other NSS databases, are skipped without a fork.
+            # They are skipped before the validation, which only applies to new users.
+            user_info = get_user_info(username)
+            if user_info:
+                results[username] = _user_result(
+                    user_info["uid"], user_info["gid"], user_info["home_folder"]
+                )
+
+    if all(username in results for username in usernames):
+        return results
+
+    new_users = []
+    etc_folder = os.path.join(root, "etc")
+    with _provisioning_lock, open(
+        os.path.join(etc_folder, ".pwd.lock"), "a"
+    ) as lock_file:
+        fcntl.lockf(lock_file, fcntl.LOCK_EX)
+        try:
+            passwd_lines = _read_lines(os.path.join(etc_folder, "passwd"))
+            group_lines = _read_lines(os.path.join(etc_folder, "group"))
+            existing_users = _parse_passwd(passwd_lines)
+            used_uids = {uid for uid, _, _ in existing_users.values()}
+            used_gids = {
+                int(fields[2])
+                for fields in (line.split(":") for line in group_lines)
+                if len(fields) >= 3 and fields[2].isdigit()
+            }
+            used_group_names = {line.split(":")[0] for line in group_lines}
+
+            next_id = FIRST_UID
+            for username in usernames:
+                if username in results:
+                    continue
+                if username in existing_users:
+                    uid, gid, home_folder = existing_users[username]
+                    results[username] = _user_result(uid, gid, home_folder)
+                    continue
+                if not re.match(USERNAME_PATTERN, username):
+                    results[username] = _user_result(
+                        error=f"Invalid username: {username}"
+                    )
+                    continue
+                if username in used_group_names:
+                    results[username] = _user_result(
+                        error=f"A group named {username} already exists"
+                    )
+                    continue
+
+                # Use the same ID for the user & its private group.
+                while next_id <= LAST_UID and (
+                    next_id in used_uids or next_id in used_gids
+                ):
+                    next_id += 1
+                if next_id > LAST_UID:
+                    results[username] = _user_result(error="No UIDs available")
+                    continue
+
+                home_folder = os.path.join("/home", username)
+                existing_users[username] = (next_id, next_id, home_folder)
+                used_uids.add(next_id)
+                used_gids.add(next_id)
+                new_users.append((username, next_id, home_folder))
+                results[username] = _user_result(
+                    next_id, next_id, home_folder, created=True
+                )
+
+            if new_users:
+                _write_user_databases(
+                    etc_folder, passwd_lines, group_lines, new_users, shell
+                )
+        except OSError as e:
+            for username, _, _ in new_users:
+                results[username] = _user_result(
+                    error=f"Failed to create user {username}: {e}"
+                )
+            new_users = []
+        finally:
+            fcntl.lockf(lock_file, fcntl.LOCK_UN)
+
+    for username, uid, home_folder in new_users:
+        try:
+            _create_home_folder(root, home_folder, uid, uid)
+            if grant_sudo:
+                _grant_sudo(root, username)
+        except OSError as e:
+            results[username]["error"] = f"Failed to set up user {username}: {e}"
+        invalidate_user_info(username)
+
+    return {username: results[username] for username in usernames}
+
+
+################################################
+## Helper Functions
+################################################
+
+# Serializes threads of this process, the lock file serializes processes.
+_provisioning_lock = threading.Lock()
+
+
+def _write_user_databases(etc_folder, passwd_lines, group_lines, new_users, shell):
+    """Append the new users to passwd, shadow, group & gshadow, each in a single write."""
+    import os
+    import time
+
+    days_since_epoch = int(time.time() // 86400)
+    _append_lines(
+        os.path.join(etc_folder, "passwd"),
+        passwd_lines,
+        [
+            f"{username}:x:{uid}:{uid}::{home_folder}:{shell}"
+            for username, uid, home_folder in new_users
+        ],
+    )
+    _append_lines(
+        os.path.join(etc_folder, "group"),
+        group_lines,
+        [f"{username}:x:{uid}:" for username, uid, _ in new_users],
+    )
+    _append_lines(
+        os.path.join(etc_folder, "shadow"),
+        None,
+        [
+            f"{username}:!:{days_since_epoch}:0:99999:7:::"
+            for username, _, _ in new_users
+        ],
+    )
+    _append_lines(
+        os.path.join(etc_folder, "gshadow"),
+        None,
+        [f"{username}:!::" for username, _, _ in new_users],
+    )
+
+
+def _user_result(uid=None, gid=None, home_folder=None, created=False, error=None):
+    return {
+        "uid": uid,
+        "gid": gid,
+        "home_folder": home_folder,
+        "created": created,
+        "error": error,
+    }
+
+
+def _read_lines(path):
+    try:
+        with open(path) as f:
+            return f.read().splitlines()
+    except FileNotFoundError:
+        return []
+
+
+def _parse_passwd(passwd_lines):
+    """Returns a dictionary of username -> (uid, gid, home folder)."""
+    users = {}
+    for line in passwd_lines:
+        fields = line.split(":")
+        if len(fields) >= 7 and fields[2].isdigit() and fields[3].isdigit():
+            users[fields[0]] = (int(fields[2]), int(fields[3]), fields[5])
+    return users
+
+
+def _append_lines(path, lines, new_lines):
+    """Atomically rewrite the file with the new lines appended, preserving its mode & owner."""
+    """Files which do not exist are skipped, Example: /etc/gshadow on minimal systems."""
+    import os
+    import tempfile
+
+    if not os.path.exists(path):
+        return
+    if lines is None:
+        lines = _read_lines(path)
+
+    file_stat = os.stat(path)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write("\n".join(lines + new_lines) + "\n")
+        os.chmod(tmp_path, file_stat.st_mode & 0o7777)
+        if os.geteuid() == 0:
+            os.chown(tmp_path, file_stat.st_uid, file_stat.st_gid)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _create_home_folder(root, home_folder, uid, gid):
+    """Create the home folder from /etc/skel, owned by the user."""
+    import os
+    import shutil
+
+    home_path = os.path.join(root, home_folder.lstrip("/"))
+    skel_path = os.path.join(root, "etc", "skel")
+    if os.path.isdir(skel_path):
+        shutil.copytree(skel_path, home_path, symlinks=True, dirs_exist_ok=True)
+    else:
+        os.makedirs(home_path, exist_ok=True)
+    os.chmod(home_path, 0o750)
+
+    if os.geteuid() == 0:
+        for folder, subfolders, files in os.walk(home_path):
+            os.lchown(folder, uid, gid)
+            for name in subfolders + files:
+                os.lchown(os.path.join(folder, name), uid, gid)
+
+
+def _grant_sudo(root, username):
+    """Grant passwordless sudo to the user, as done by scripts/CreateUser.sh"""
+    """sudo ignores the files of sudoers.d whose name contains a ".", so it is replaced with "_"."""
+    import os
+
+    sudoers_folder = os.path.join(root, "etc", "sudoers.d")
+    if not os.path.isdir(sudoers_folder):
+        return
+    sudoers_file = os.path.join(sudoers_folder, username.replace(".", "_"))
+    with open(sudoers_file, "w") as f:
+        f.write(f"{username} ALL=(ALL) NOPASSWD: ALL\n")
+    os.chmod(sudoers_file, 0o440)